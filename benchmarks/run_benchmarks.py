@@ -0,0 +1,291 @@
+"""
+Benchmarks of the lattice generation, the Surface Evolver script emission and the Surface Evolver orchestration.
+Each benchmark records its best time and its peak Python memory, and can be compared against stored baselines.
+Times are stored relative to a reference workload timed on the same machine, so the baselines can be compared on
+machines of different speeds
+
+Usage, with seapipy installed (``pip install -e .``)::
+
+    python benchmarks/run_benchmarks.py --sizes 10 100 1000
+    python benchmarks/run_benchmarks.py --sizes 10 100 --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 10 100 --compare
+
+The orchestration benchmarks run a stub evolver executable, so they measure the overhead of seapipy without Surface
+Evolver installed.
+"""
+import argparse
+import gc
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import seapipy.command as command
+from seapipy.example_tissues import CircularFurrow, NormalFurrow, RandomCellTypes
+from seapipy.lattice_class import Lattice
+from seapipy.surface_evolver import SurfaceEvolver
+from seapipy.worker_pool import EvolverPool
+
+BASELINE_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# Relative slowdown over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.25
+# Number of runs of the stub evolver in the orchestration benchmarks
+ORCHESTRATION_JOBS = 20
+# Timed runs of the reference workload, which has to be stable across runs
+REFERENCE_REPEAT = 5
+
+STUB_EVOLVER = f"""#!{sys.executable}
+import sys
+
+open(sys.argv[1]).read()
+# completion markers of the worker pool
+for line in sys.stdin:
+    if line.startswith("printf"):
+        print(line.split('"')[1][:-2], flush=True)
+    elif line.strip() == "q":
+        break
+"""
+
+
+def measure(run, setup=None, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Time a function and measure its peak memory
+
+    :param run: Function to measure, called with the result of *setup* if given
+    :type run: callable
+    :param setup: Function called before each run, outside of the measurement
+    :type setup: callable, optional
+    :param repeat: Number of timed runs, the best one is kept
+    :type repeat: int
+    :param memory: Whether to do an extra run measuring the peak memory with tracemalloc
+    :type memory: bool
+    :return: Best time in seconds, peak memory in bytes and the result of the last run
+    :rtype: dict
+    """
+    def call():
+        return run(setup()) if setup is not None else run()
+
+    best_time = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = call()
+        best_time = min(best_time, time.perf_counter() - start)
+
+    peak_memory = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        call()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"time": best_time, "peak_memory": peak_memory, "result": result}
+
+
+def reference_workload() -> int:
+    """
+    Fixed mix of the work done by seapipy, formatting lines of text and sorting arrays, used as unit of time
+    """
+    values = np.random.default_rng(0).random(10 ** 6)
+    text = "".join(f"{ii}   {value} {value * 0.5}\n" for ii, value in enumerate(values[:100000].tolist()))
+    return len(text) + int(np.argsort(values)[0])
+
+
+def get_parameters(size: int, save_dir: str) -> dict:
+    return dict(n_cells_x=size, n_cells_y=size, cell_v_mean=450, cell_v_std=5, edge_t_mean=6, edge_t_std=20 * size,
+                axis="x", voronoi_seeds_std=0.15, voronoi_seeds_step=20, edge_tensions=[1, 2, 4],
+                edge_tensions_std=0.1, file_name="step_", save_dir=save_dir)
+
+
+def benchmark_lattice(size: int, repeat: int, memory: bool, records: list, work_directory: str) -> None:
+    """
+    Benchmark the lattice generation and the script emission for a lattice of *size* x *size* cells
+    """
+    def record(name, run, setup=None):
+        measurement = measure(run, setup, repeat, memory)
+        records.append({"benchmark": name, "size": size, "time": measurement["time"],
+                        "peak_memory": measurement["peak_memory"]})
+        return measurement["result"]
+
+    np.random.seed(0)
+    lattice = Lattice(size, size)
+    seeds = record("generate_square_seeds",
+                   lambda: lattice.generate_square_seeds(standard_deviation=0.15, spatial_step=20))
+    record("generate_voronoi_tessellation", lambda: lattice.generate_voronoi_tessellation(seeds))
+    vertices, edges, cells = record("create_lattice_elements", lattice.create_lattice_elements)
+    volumes = lattice.get_normally_distributed_volumes(cells)
+    densities = lattice.get_normally_distributed_densities(edges)
+    new_tensions = {k: value + 1 for k, value in densities.items()}
+
+    def new_se_object():
+        return SurfaceEvolver(vertices, edges, cells, densities, volumes, polygonal=False)
+
+    record("generate_fe_file", lambda se_object: se_object.generate_fe_file(), new_se_object)
+    for mode in ("where", "table"):
+        record(f"change_line_tensions[{mode}]",
+               lambda se_object: se_object.change_line_tensions(new_tensions, mode=mode), new_se_object)
+
+    def stream_fe_file(se_object):
+        se_object.generate_fe_file(os.path.join(work_directory, "stream.fe"))
+        se_object.save_fe_file()
+
+    record("generate_fe_file[stream]", stream_fe_file, new_se_object)
+
+    tissue = record("create_tissue", lattice.create_tissue)
+    tissue.edge_densities = np.fromiter(densities.values(), dtype=np.float64, count=len(densities))
+    tissue.cell_volumes = np.fromiter(volumes.values(), dtype=np.float64, count=len(volumes))
+    record("generate_fe_file[tissue]", lambda se_object: se_object.generate_fe_file(),
+           lambda: SurfaceEvolver.from_tissue(tissue, polygonal=False))
+
+
+def benchmark_example_tissues(size: int, repeat: int, memory: bool, records: list, work_directory: str) -> None:
+    """
+    Benchmark the creation of the example tissues with *size* x *size* cells
+    """
+    for tissue_class in (NormalFurrow, CircularFurrow, RandomCellTypes):
+        np.random.seed(0)
+        measurement = measure(lambda: tissue_class(get_parameters(size, work_directory)), repeat=repeat,
+                              memory=memory)
+        records.append({"benchmark": tissue_class.__name__, "size": size, "time": measurement["time"],
+                        "peak_memory": measurement["peak_memory"]})
+
+
+def benchmark_orchestration(size: int, repeat: int, records: list, work_directory: str,
+                            jobs: int = ORCHESTRATION_JOBS) -> None:
+    """
+    Benchmark running Surface Evolver files of a *size* x *size* tissue with a stub evolver. The times are per file
+    """
+    evolver_filepath = os.path.join(work_directory, "evolver")
+    with open(evolver_filepath, mode="w") as f:
+        f.write(STUB_EVOLVER)
+    os.chmod(evolver_filepath, os.stat(evolver_filepath).st_mode | stat.S_IEXEC)
+
+    np.random.seed(0)
+    tissue = NormalFurrow(get_parameters(size, work_directory))
+    script = tissue.se_object.get_script()
+    paths = []
+    for ii in range(jobs):
+        paths.append(os.path.join(work_directory, f"job_{ii}.fe"))
+        with open(paths[-1], mode="w") as f:
+            f.write(script)
+
+    runners = {
+        "run_evolver": lambda: [command.run_evolver(path, evolver_filepath) for path in paths],
+        "run_evolver_job": lambda: [command.run_evolver_job(path, evolver_filepath) for path in paths],
+        "run_evolver_batch": lambda: command.run_evolver_batch(paths, evolver_filepath),
+    }
+    for name, run in runners.items():
+        measurement = measure(run, repeat=repeat, memory=False)
+        records.append({"benchmark": name, "size": size, "time": measurement["time"] / len(paths),
+                        "peak_memory": None})
+
+    pool = EvolverPool(evolver_filepath)
+    try:
+        measurement = measure(lambda: pool.map(paths), repeat=repeat, memory=False)
+    finally:
+        pool.close()
+    records.append({"benchmark": "EvolverPool.map", "size": size, "time": measurement["time"] / len(paths),
+                    "peak_memory": None})
+
+
+def get_key(record: dict) -> str:
+    return f"{record['benchmark']}@{record['size']}"
+
+
+def compare(records: list, baselines: dict, tolerance: float) -> list:
+    """
+    Compare the records with the baselines, using the times relative to the reference workload
+
+    :param records: Benchmark records
+    :type records: list
+    :param baselines: Stored records, by benchmark and size
+    :type baselines: dict
+    :param tolerance: Relative slowdown reported as a regression
+    :type tolerance: float
+    :return: Keys of the benchmarks slower than their baseline
+    :rtype: list
+    """
+    regressions = []
+    for record in records:
+        baseline = baselines.get(get_key(record))
+        # baselines with absolute times only are not comparable across machines
+        if baseline is None or baseline.get("relative_time") is None:
+            record["ratio"] = None
+            continue
+        record["ratio"] = record["relative_time"] / baseline["relative_time"]
+        if record["ratio"] > 1 + tolerance:
+            regressions.append(get_key(record))
+    return regressions
+
+
+def print_records(records: list) -> None:
+    for record in records:
+        peak = "-" if record["peak_memory"] is None else f"{record['peak_memory'] / 1024 ** 2:.2f}"
+        ratio = "-" if record.get("ratio") is None else f"{record['ratio']:.2f}x"
+        print(f"{record['benchmark']:<32}{record['size']:>8}{record['time']:>14.5f}{peak:>14}{ratio:>14}", flush=True)
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Number of cells per side of the lattices")
+    parser.add_argument("--example-max-size", type=int, default=100,
+                        help="Largest size used for the example tissues and the orchestration benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each benchmark, the best is kept")
+    parser.add_argument("--jobs", type=int, default=ORCHESTRATION_JOBS,
+                        help="Files run with the stub evolver in the orchestration benchmarks")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory")
+    parser.add_argument("--baseline", default=BASELINE_FILEPATH, help="File with the stored baselines")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare with the baselines, exiting with an error if a benchmark is slower")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown reported as a regression")
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    arguments = parser.parse_args(arguments)
+
+    baselines = {}
+    if os.path.isfile(arguments.baseline):
+        with open(arguments.baseline) as f:
+            baselines = json.load(f)
+
+    reference_time = measure(reference_workload, repeat=REFERENCE_REPEAT, memory=False)["time"]
+    print(f"Reference workload: {reference_time:.5f} s")
+    records = []
+    regressions = []
+    print(f"{'benchmark':<32}{'size':>8}{'time [s]':>14}{'peak [MiB]':>14}{'vs baseline':>14}")
+    with tempfile.TemporaryDirectory(prefix="seapipy_benchmarks_") as work_directory:
+        for size in arguments.sizes:
+            # a single run of the largest lattices already takes long
+            repeat = arguments.repeat if size <= 100 else 1
+            size_records = []
+            benchmark_lattice(size, repeat, not arguments.no_memory, size_records, work_directory)
+            if size <= arguments.example_max_size:
+                benchmark_example_tissues(size, repeat, not arguments.no_memory, size_records, work_directory)
+                benchmark_orchestration(size, repeat, size_records, work_directory, arguments.jobs)
+            for record in size_records:
+                record["relative_time"] = record["time"] / reference_time
+            regressions += compare(size_records, baselines, arguments.tolerance)
+            print_records(size_records)
+            records += size_records
+
+    if arguments.output is not None:
+        with open(arguments.output, mode="w") as f:
+            json.dump(records, f, indent=2)
+    if arguments.save_baseline:
+        baselines.update({get_key(record): {"time": record["time"], "relative_time": record["relative_time"],
+                                            "peak_memory": record["peak_memory"]}
+                          for record in records})
+        with open(arguments.baseline, mode="w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+    if arguments.compare and regressions:
+        print(f"Slower than the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,4 +3,16 @@ from . import surface_evolver
 from . import command
 # from . import stats
 from . import example_tissues
+from . import tissue
+from . import dump
+from . import trajectory
+from . import cache
+from . import protocol
+from . import worker_pool
+from . import instrumentation
+from . import tension_fields
+from . import random_generators
+from . import ensemble
+from . import sweep
+from . import job_queue
 # TODO: Add documentation to all functions
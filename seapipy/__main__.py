@@ -0,0 +1,4 @@
+import sys
+from seapipy.cli import main
+
+sys.exit(main())
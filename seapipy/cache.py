@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+import seapipy.command as command
+from seapipy.surface_evolver import relocate_script
+
+METADATA_FILE = "entry.json"
+
+
+def get_evolver_identity(evolver_filepath: str) -> str:
+    """
+    Identify the Surface Evolver interpreter by its resolved path, size and modification time
+
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :return: Identity of the interpreter
+    :rtype: str
+    """
+    path = shutil.which(evolver_filepath) or evolver_filepath
+    path = os.path.realpath(path)
+    try:
+        status = os.stat(path)
+    except OSError:
+        return path
+    return f"{path}:{status.st_size}:{status.st_mtime_ns}"
+
+
+def get_script_key(script: str, evolver_identity: str, dump_patterns: list) -> str:
+    """
+    Get the key of a Surface Evolver run, which only depends on what the run does and not on where it saves its files
+
+    :param script: Contents of the Surface Evolver file
+    :type script: str
+    :param evolver_identity: Identity of the Surface Evolver interpreter
+    :type evolver_identity: str
+    :param dump_patterns: Glob patterns of the dump files written by the script, in the order they appear in it
+    :type dump_patterns: list
+    :return: Hexadecimal hash of the run
+    :rtype: str
+    """
+    # numbered in the order of the script, which does not change when the files are saved somewhere else
+    output_directories = list(dict.fromkeys(os.path.dirname(pattern) for pattern in dump_patterns))
+    digest = hashlib.sha256()
+    digest.update(relocate_script(script, output_directories, numbered=True).encode())
+    digest.update(b"\0" + evolver_identity.encode())
+    for pattern in dump_patterns:
+        digest.update(b"\0" + os.path.basename(pattern).encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class EvolverCache:
+    """
+    Local cache of the dump files written by Surface Evolver runs. Runs of the same script with the same interpreter
+    restore the cached dump files instead of running again, even if they save them in a different folder. The least
+    recently used entries are removed when the cache grows over *max_size* bytes.
+
+    :param directory: Folder where the cached files are kept
+    :type directory: str
+    :param max_size: Maximum size of the cache in bytes
+    :type max_size: int, optional
+    """
+    directory: str
+    max_size: int = 10 * 1024 ** 3
+
+    def __post_init__(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, se_input_filepath: str, evolver_filepath: str = "evolver") -> str:
+        """
+        Get the cache key for running a Surface Evolver file
+
+        :param se_input_filepath: Path to Surface Evolver file
+        :type se_input_filepath: str
+        :param evolver_filepath: Path to the Surface Evolver interpreter
+        :type evolver_filepath: str
+        :return: Cache key of the run
+        :rtype: str
+        """
+        with open(se_input_filepath) as f:
+            script = f.read()
+        return get_script_key(script, get_evolver_identity(evolver_filepath),
+                              command.get_dump_patterns(se_input_filepath))
+
+    def run(self, se_input_filepath: str, evolver_filepath: str = "evolver", bypass: bool = False,
+            **kwargs) -> command.EvolverResult:
+        """
+        Run the Surface Evolver file, or restore its dump files if the same run is in the cache
+
+        :param se_input_filepath: Path to Surface Evolver file
+        :type se_input_filepath: str
+        :param evolver_filepath: Path to the Surface Evolver interpreter
+        :type evolver_filepath: str
+        :param bypass: Always run Surface Evolver, the result is still stored in the cache
+        :type bypass: bool, optional
+        :param kwargs: Arguments passed to :func:`seapipy.command.run_evolver_job`
+        :return: Outcome of the run
+        :rtype: command.EvolverResult
+        """
+        patterns = command.get_dump_patterns(se_input_filepath)
+        key = self.get_key(se_input_filepath, evolver_filepath)
+        if not bypass:
+            start = time.perf_counter()
+            dump_files = self.restore(key, patterns)
+            if dump_files is not None:
+                return command.EvolverResult(se_input_filepath, return_code=0, wall_time=time.perf_counter() - start,
+                                             dump_files=dump_files, cached=True)
+
+        result = command.run_evolver_job(se_input_filepath, evolver_filepath, **kwargs)
+        if result.success:
+            self.store(key, patterns, result.dump_files)
+        return result
+
+    def get_entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str, dump_patterns: list) -> list:
+        """
+        Copy the dump files of a cached run to the folders of the current run
+
+        :param key: Cache key of the run
+        :type key: str
+        :param dump_patterns: Glob patterns of the dump files written by the current run
+        :type dump_patterns: list
+        :return: Paths of the restored dump files, None if the run is not in the cache
+        :rtype: list
+        """
+        entry_path = self.get_entry_path(key)
+        try:
+            with open(os.path.join(entry_path, METADATA_FILE)) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        restored = []
+        for pattern_index, name in metadata["files"]:
+            destination = os.path.join(os.path.dirname(dump_patterns[pattern_index]), name)
+            os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+            shutil.copyfile(os.path.join(entry_path, str(pattern_index), name), destination)
+            restored.append(destination)
+        # the modification time of the entry records its last use
+        os.utime(entry_path)
+        return sorted(restored)
+
+    def store(self, key: str, dump_patterns: list, dump_files: list) -> None:
+        """
+        Add the dump files of a run to the cache and remove the least recently used entries if it is too big
+
+        :param key: Cache key of the run
+        :type key: str
+        :param dump_patterns: Glob patterns of the dump files written by the run
+        :type dump_patterns: list
+        :param dump_files: Paths of the dump files
+        :type dump_files: list
+        :return: None
+        """
+        temporary_path = tempfile.mkdtemp(dir=self.directory, prefix=".")
+        files = []
+        for path in dump_files:
+            pattern_index = next(ii for ii, pattern in enumerate(dump_patterns)
+                                 if os.path.dirname(pattern) == os.path.dirname(path))
+            os.makedirs(os.path.join(temporary_path, str(pattern_index)), exist_ok=True)
+            shutil.copyfile(path, os.path.join(temporary_path, str(pattern_index), os.path.basename(path)))
+            files.append([pattern_index, os.path.basename(path)])
+        with open(os.path.join(temporary_path, METADATA_FILE), mode="w") as f:
+            json.dump({"files": files, "size": sum(os.path.getsize(path) for path in dump_files)}, f)
+
+        entry_path = self.get_entry_path(key)
+        shutil.rmtree(entry_path, ignore_errors=True)
+        try:
+            os.rename(temporary_path, entry_path)
+        except OSError:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+        self.evict()
+
+    def get_size(self) -> int:
+        """
+        Get the size of the cached dump files
+
+        :return: Size in bytes
+        :rtype: int
+        """
+        return sum(size for _, size, _ in self.list_entries())
+
+    def list_entries(self) -> list:
+        """
+        List the cache entries, from the least to the most recently used
+
+        :return: Path, size in bytes and last use time of each entry
+        :rtype: list
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            entry_path = os.path.join(self.directory, name)
+            try:
+                with open(os.path.join(entry_path, METADATA_FILE)) as f:
+                    size = json.load(f)["size"]
+                entries.append((entry_path, size, os.path.getmtime(entry_path)))
+            except (OSError, ValueError, KeyError):
+                continue
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits in *max_size*
+
+        :return: None
+        """
+        entries = self.list_entries()
+        total_size = sum(size for _, size, _ in entries)
+        for entry_path, size, _ in entries:
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """
+        Remove all the entries of the cache
+
+        :return: None
+        """
+        for entry_path, _, _ in self.list_entries():
+            shutil.rmtree(entry_path, ignore_errors=True)
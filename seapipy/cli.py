@@ -0,0 +1,105 @@
+"""
+Command line interface of seapipy, to run Surface Evolver files from a durable job queue
+
+Usage::
+
+    seapipy submit jobs.db path/to/files/*.fe
+    seapipy work jobs.db --evolver path/to/evolver --workers 8 --timeout 3600
+    seapipy status jobs.db
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import seapipy.job_queue as job_queue
+
+
+def submit(arguments) -> int:
+    paths = []
+    for path in arguments.files:
+        if os.path.isdir(path):
+            paths += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".fe"))
+        else:
+            paths.append(path)
+    added = job_queue.JobQueue(arguments.queue).add(paths, arguments.max_attempts)
+    print(f"Added {added} of {len(paths)} files")
+    return 0
+
+
+def work(arguments) -> int:
+    options = dict(queue_path=arguments.queue, evolver_filepath=arguments.evolver, timeout=arguments.timeout,
+                   memory_limit=arguments.memory_limit, wait=arguments.wait, lease_timeout=arguments.lease_timeout)
+    if arguments.workers == 1:
+        jobs_run = job_queue.run_worker(**options)
+    else:
+        with ProcessPoolExecutor(max_workers=arguments.workers) as executor:
+            futures = [executor.submit(job_queue.run_worker, **options) for _ in range(arguments.workers)]
+            jobs_run = sum(future.result() for future in futures)
+    print(f"Ran {jobs_run} jobs")
+    return 0
+
+
+def status(arguments) -> int:
+    queue = job_queue.JobQueue(arguments.queue)
+    counts = queue.count()
+    print(" ".join(f"{name}: {number}" for name, number in counts.items()))
+    if arguments.failed:
+        for job in queue.get_jobs("failed"):
+            print(f"{job['fe_file']}: {job['error']}")
+    return 0
+
+
+def retry(arguments) -> int:
+    queue = job_queue.JobQueue(arguments.queue)
+    retried = queue.retry_failed()
+    if arguments.older_than is not None:
+        retried += queue.requeue_stale(arguments.older_than)
+    print(f"Put {retried} jobs back in the queue")
+    return 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="seapipy", description=__doc__.split("\n\n")[0].strip())
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = subparsers.add_parser("submit", help="Add Surface Evolver files to a queue")
+    submit_parser.add_argument("queue", help="Path of the queue database, created if it does not exist")
+    submit_parser.add_argument("files", nargs="+", help="Surface Evolver files, or folders with .fe files")
+    submit_parser.add_argument("--max-attempts", type=int, default=3,
+                               help="Number of times a file is run before it is marked as failed")
+    submit_parser.set_defaults(function=submit)
+
+    work_parser = subparsers.add_parser("work", help="Run the jobs of a queue")
+    work_parser.add_argument("queue", help="Path of the queue database")
+    work_parser.add_argument("--evolver", default="evolver", help="Path to the Surface Evolver interpreter")
+    work_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                             help="Number of worker processes")
+    work_parser.add_argument("--timeout", type=float, help="Seconds after which a run is killed")
+    work_parser.add_argument("--memory-limit", type=int,
+                             help="Resident memory in bytes above which a run is killed")
+    work_parser.add_argument("--lease-timeout", type=float,
+                             help="Seconds after which the jobs of a worker that died are run again")
+    work_parser.add_argument("--wait", action="store_true",
+                             help="Keep waiting for new jobs instead of stopping when the queue is empty")
+    work_parser.set_defaults(function=work)
+
+    status_parser = subparsers.add_parser("status", help="Count the jobs of a queue in each state")
+    status_parser.add_argument("queue", help="Path of the queue database")
+    status_parser.add_argument("--failed", action="store_true", help="List the failed jobs and their errors")
+    status_parser.set_defaults(function=status)
+
+    retry_parser = subparsers.add_parser("retry", help="Put the failed jobs back in a queue")
+    retry_parser.add_argument("queue", help="Path of the queue database")
+    retry_parser.add_argument("--older-than", type=float,
+                              help="Also put back the jobs running for longer than this number of seconds")
+    retry_parser.set_defaults(function=retry)
+    return parser
+
+
+def main(arguments=None) -> int:
+    arguments = get_parser().parse_args(arguments)
+    return arguments.function(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
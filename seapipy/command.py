@@ -1,4 +1,119 @@
+import asyncio
+import glob
+import inspect
+import os
+import re
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import seapipy.instrumentation as instrumentation
+
+# Seconds between checks for cancellation, timeout and memory use while a job runs
+POLL_INTERVAL = 0.1
+# Resident memory of a process, in pages, is the second field of this file on Linux
+STATM_FILEPATH = "/proc/{}/statm"
+DUMP_PATTERN = re.compile(r'(?:sprintf|dump)\s+"([^"]*\.dmp)"')
+# Line printed by Surface Evolver after every iteration of the g command
+PROGRESS_PATTERN = re.compile(r"^\s*(\d+)\.\s+(?:area|length):\s*(\S+)\s+energy:\s*(\S+)(?:\s+scale:\s*(\S+))?")
+
+
+@dataclass
+class EvolverProgress:
+    """
+    Progress of a Surface Evolver run, parsed from the line printed after each iteration of the g command
+
+    :param iteration: Iteration number printed by Surface Evolver
+    :type iteration: int
+    :param area: Total area (length in the string model) of the system
+    :type area: float
+    :param energy: Total energy of the system
+    :type energy: float
+    :param scale: Scale factor used in the iteration
+    :type scale: float
+    :param line: Line printed by Surface Evolver
+    :type line: str
+    """
+    iteration: int
+    area: float
+    energy: float
+    scale: float
+    line: str
+
+    @classmethod
+    def from_line(cls, line: str):
+        """
+        Parse a line of Surface Evolver output
+
+        :param line: Line printed by Surface Evolver
+        :type line: str
+        :return: Progress in the line, None if it is not an iteration line
+        :rtype: EvolverProgress
+        """
+        match = PROGRESS_PATTERN.match(line)
+        if match is None:
+            return None
+        iteration, area, energy, scale = match.groups()
+        try:
+            return cls(int(iteration), float(area), float(energy), float(scale) if scale else None, line.rstrip())
+        except ValueError:
+            return None
+
+
+@dataclass
+class EvolverResult:
+    """
+    Outcome of a Surface Evolver run
+
+    :param se_input_filepath: Path to the Surface Evolver file that was run
+    :type se_input_filepath: str
+    :param return_code: Return code of the process, None if it never started
+    :type return_code: int
+    :param wall_time: Seconds the process was running
+    :type wall_time: float
+    :param stderr_tail: Last lines written by the process to the standard error
+    :type stderr_tail: str
+    :param dump_files: Dump files written by the process
+    :type dump_files: list
+    :param timed_out: Whether the process was killed after reaching the timeout
+    :type timed_out: bool
+    :param cancelled: Whether the job was cancelled before finishing
+    :type cancelled: bool
+    :param cached: Whether the dump files were restored from a cache instead of running Surface Evolver
+    :type cached: bool
+    :param memory_exceeded: Whether the process was killed after its resident memory reached the memory limit
+    :type memory_exceeded: bool
+    :param user_time: Seconds of CPU time spent by the process in user mode, None if not measured
+    :type user_time: float
+    :param system_time: Seconds of CPU time spent by the process in the kernel, None if not measured
+    :type system_time: float
+    :param max_rss: Peak resident memory of the process in bytes, None if not measured
+    :type max_rss: int
+    """
+    se_input_filepath: str
+    return_code: int = None
+    wall_time: float = 0
+    stderr_tail: str = ""
+    dump_files: list = field(default_factory=list)
+    timed_out: bool = False
+    cancelled: bool = False
+    cached: bool = False
+    memory_exceeded: bool = False
+    user_time: float = None
+    system_time: float = None
+    max_rss: int = None
+
+    @property
+    def success(self) -> bool:
+        return self.return_code == 0 and not self.timed_out and not self.cancelled and not self.memory_exceeded
+
+    @property
+    def cpu_time(self) -> float:
+        if self.user_time is None:
+            return None
+        return self.user_time + self.system_time
 
 
 def run_evolver(se_input_filepath: str, evolver_filepath: str = "evolver ") -> int:
@@ -12,5 +127,328 @@ def run_evolver(se_input_filepath: str, evolver_filepath: str = "evolver ") -> i
     :return: Return code of the subprocess.run() function
     :rtype: int
     """
-    p = subprocess.run([evolver_filepath, se_input_filepath], stdout=subprocess.DEVNULL)
+    with instrumentation.span("command.run_evolver"):
+        p = subprocess.run([evolver_filepath, se_input_filepath], stdout=subprocess.DEVNULL)
     return p.returncode == 0
+
+
+def get_dump_patterns(se_input_filepath: str) -> list:
+    """
+    Get the glob patterns of the dump files that a Surface Evolver file writes, either with sprintf or to a fixed path
+
+    :param se_input_filepath: Path to Surface Evolver file
+    :type se_input_filepath: str
+    :return: Glob patterns for the dump files, in the order they first appear in the script
+    :rtype: list
+    """
+    with open(se_input_filepath) as f:
+        script = f.read()
+    return list(dict.fromkeys(pattern.replace("%d", "*") for pattern in DUMP_PATTERN.findall(script)))
+
+
+def find_dump_files(patterns: list, since: float = 0) -> list:
+    """
+    Find the dump files matching the patterns that were modified after a given time
+
+    :param patterns: Glob patterns for the dump files
+    :type patterns: list
+    :param since: Only files modified at this time or later are returned
+    :type since: float
+    :return: Paths of the dump files
+    :rtype: list
+    """
+    dump_files = set()
+    for pattern in patterns:
+        dump_files.update(path for path in glob.glob(pattern) if os.path.getmtime(path) >= since)
+    return sorted(dump_files)
+
+
+def get_process_rss(pid: int) -> int:
+    """
+    Get the current resident memory of a process. Only available on Linux
+
+    :param pid: Process id
+    :type pid: int
+    :return: Resident memory in bytes, None if it can not be read
+    :rtype: int
+    """
+    try:
+        with open(STATM_FILEPATH.format(pid)) as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def get_max_rss(usage) -> int:
+    """
+    Get the peak resident memory from the resource usage of a process
+
+    :param usage: Resource usage returned by os.wait4
+    :type usage: resource.struct_rusage
+    :return: Peak resident memory in bytes
+    :rtype: int
+    """
+    # reported in bytes on macOS and in kilobytes elsewhere
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def run_evolver_job(se_input_filepath: str, evolver_filepath: str = "evolver", timeout: float = None,
+                    cancel_event: threading.Event = None, stderr_lines: int = 20,
+                    memory_limit: int = None) -> EvolverResult:
+    """
+    Run the Surface Evolver file and collect the outcome of the run, including the CPU time and the peak resident
+    memory of the process where the platform reports them
+
+    :param se_input_filepath: Path to Surface Evolver file
+    :type se_input_filepath: str
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :param timeout: Seconds after which the process is killed
+    :type timeout: float, optional
+    :param cancel_event: Event that kills the process when set
+    :type cancel_event: threading.Event, optional
+    :param stderr_lines: Number of lines to keep from the end of the standard error
+    :type stderr_lines: int
+    :param memory_limit: Resident memory in bytes above which the process is killed. Only enforced on Linux
+    :type memory_limit: int, optional
+    :return: Outcome of the run
+    :rtype: EvolverResult
+    """
+    result = EvolverResult(se_input_filepath)
+    if cancel_event is not None and cancel_event.is_set():
+        result.cancelled = True
+        return result
+
+    patterns = get_dump_patterns(se_input_filepath)
+    # file modification times can be truncated by the file system
+    started_at = int(time.time())
+    start = time.perf_counter()
+    process = subprocess.Popen([evolver_filepath, se_input_filepath], stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    reader.start()
+    delay = POLL_INTERVAL / 128
+    while True:
+        # the standard error is closed when the process exits, then it is polled more and more slowly
+        if reader.is_alive():
+            reader.join(POLL_INTERVAL)
+        else:
+            time.sleep(delay)
+            delay = min(2 * delay, POLL_INTERVAL)
+        if wait_process(process, result):
+            break
+        if timeout is not None and time.perf_counter() - start > timeout:
+            result.timed_out = True
+        elif cancel_event is not None and cancel_event.is_set():
+            result.cancelled = True
+        elif memory_limit is not None and (get_process_rss(process.pid) or 0) > memory_limit:
+            result.memory_exceeded = True
+        else:
+            continue
+        process.kill()
+        wait_process(process, result, blocking=True)
+        break
+    reader.join()
+    process.stderr.close()
+
+    result.wall_time = time.perf_counter() - start
+    result.return_code = process.returncode
+    stderr = stderr[0] if stderr else ""
+    result.stderr_tail = "\n".join(stderr.splitlines()[-stderr_lines:]) if stderr_lines > 0 else ""
+    result.dump_files = find_dump_files(patterns, since=started_at)
+    record_result(result)
+    return result
+
+
+def wait_process(process: subprocess.Popen, result: EvolverResult, blocking: bool = False) -> bool:
+    """
+    Reap the process if it exited, storing its CPU time and peak memory in the result where the platform reports them
+
+    :param process: Surface Evolver process
+    :type process: subprocess.Popen
+    :param result: Outcome of the run
+    :type result: EvolverResult
+    :param blocking: Whether to wait for the process to exit
+    :type blocking: bool
+    :return: Whether the process exited
+    :rtype: bool
+    """
+    if not hasattr(os, "wait4"):
+        try:
+            process.wait(timeout=None if blocking else 0)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+    pid, status, usage = os.wait4(process.pid, 0 if blocking else os.WNOHANG)
+    if pid == 0:
+        return False
+    process.returncode = os.waitstatus_to_exitcode(status)
+    result.user_time = usage.ru_utime
+    result.system_time = usage.ru_stime
+    result.max_rss = get_max_rss(usage)
+    return True
+
+
+def record_result(result: EvolverResult) -> None:
+    """
+    Add the outcome of a run to the instrumentation counters, if the instrumentation is enabled
+
+    :param result: Outcome of the run
+    :type result: EvolverResult
+    :return: None
+    """
+    if instrumentation.get_recorder() is None:
+        return
+    instrumentation.get_recorder().add_span("command.run_evolver", result.wall_time)
+    instrumentation.count("command.jobs")
+    instrumentation.count("command.failed_jobs", 0 if result.success else 1)
+    instrumentation.count("command.dump_files", len(result.dump_files))
+    if result.user_time is not None:
+        instrumentation.count("command.user_time", result.user_time)
+        instrumentation.count("command.system_time", result.system_time)
+
+
+class ChainedEvent(threading.Event):
+    """
+    Event that also counts as set when its parent event is set. Only :meth:`is_set` looks at the parent, which is
+    what the jobs use to check for cancellation
+
+    :param parent: Event whose state is followed
+    :type parent: threading.Event, optional
+    """
+    def __init__(self, parent: threading.Event = None):
+        super().__init__()
+        self.parent = parent
+
+    def is_set(self) -> bool:
+        return super().is_set() or (self.parent is not None and self.parent.is_set())
+
+
+def run_evolver_batch(se_input_filepaths: list, evolver_filepath: str = "evolver", max_workers: int = None,
+                      timeout: float = None, cancel_event: threading.Event = None, cache=None,
+                      memory_limit: int = None, on_result=None) -> list:
+    """
+    Run many Surface Evolver files concurrently, each in its own Surface Evolver process
+
+    :param se_input_filepaths: Paths to the Surface Evolver files
+    :type se_input_filepaths: list
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :param max_workers: Maximum number of simultaneous processes, bounded by the number of cores
+    :type max_workers: int, optional
+    :param timeout: Seconds after which each process is killed
+    :type timeout: float, optional
+    :param cancel_event: Event that cancels the jobs not finished yet when set
+    :type cancel_event: threading.Event, optional
+    :param cache: Cache to restore the dump files of runs done before
+    :type cache: seapipy.cache.EvolverCache, optional
+    :param memory_limit: Resident memory in bytes above which each process is killed. Only enforced on Linux
+    :type memory_limit: int, optional
+    :param on_result: Function called with the outcome of each run as soon as it finishes, in the calling thread and
+        in the order the runs finish. Runs that raise an exception are not passed to it. If it raises, the running
+        processes are killed, the runs not started yet are cancelled and the exception is raised by this function
+    :type on_result: callable, optional
+    :return: Outcome of every run, in the same order as the files
+    :rtype: list
+    """
+    cpu_count = os.cpu_count() or 1
+    max_workers = cpu_count if max_workers is None else max(1, min(max_workers, cpu_count))
+    run = run_evolver_job if cache is None else cache.run
+    # set when the batch is abandoned, so the executor does not wait for the processes still running
+    stop_event = ChainedEvent(cancel_event)
+    with instrumentation.span("command.batch"), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run, path, evolver_filepath, timeout=timeout, cancel_event=stop_event,
+                                   memory_limit=memory_limit)
+                   for path in se_input_filepaths]
+        try:
+            if on_result is not None:
+                for future in as_completed(futures):
+                    if future.exception() is None:
+                        on_result(future.result())
+            return [future.result() for future in futures]
+        except BaseException:
+            stop_event.set()
+            for future in futures:
+                future.cancel()
+            raise
+
+
+async def run_evolver_async(se_input_filepath: str, evolver_filepath: str = "evolver", on_progress=None,
+                            timeout: float = None, stderr_lines: int = 20,
+                            memory_limit: int = None) -> EvolverResult:
+    """
+    Run the Surface Evolver file without blocking the event loop, following the progress of the evolution. Cancelling
+    the task kills the Surface Evolver process
+
+    :param se_input_filepath: Path to Surface Evolver file
+    :type se_input_filepath: str
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :param on_progress: Function or coroutine called with an :class:`EvolverProgress` after every iteration. If it
+        returns True the process is stopped and the run is marked as cancelled
+    :type on_progress: callable, optional
+    :param timeout: Seconds after which the process is killed
+    :type timeout: float, optional
+    :param stderr_lines: Number of lines to keep from the end of the standard error
+    :type stderr_lines: int
+    :param memory_limit: Resident memory in bytes above which the process is killed. Only enforced on Linux. The CPU
+        time and peak memory of the process are not measured in asynchronous runs
+    :type memory_limit: int, optional
+    :return: Outcome of the run
+    :rtype: EvolverResult
+    """
+    result = EvolverResult(se_input_filepath)
+    patterns = get_dump_patterns(se_input_filepath)
+    started_at = int(time.time())
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(evolver_filepath, se_input_filepath,
+                                                   stdin=asyncio.subprocess.DEVNULL,
+                                                   stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+
+    async def follow_stdout():
+        async for raw_line in process.stdout:
+            progress = EvolverProgress.from_line(raw_line.decode(errors="replace"))
+            if progress is None or on_progress is None:
+                continue
+            stop = on_progress(progress)
+            if inspect.isawaitable(stop):
+                stop = await stop
+            if stop:
+                result.cancelled = True
+                process.kill()
+                break
+
+    async def watch_memory():
+        while process.returncode is None:
+            if (get_process_rss(process.pid) or 0) > memory_limit:
+                result.memory_exceeded = True
+                process.kill()
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+
+    stderr_task = asyncio.ensure_future(process.stderr.read())
+    memory_task = asyncio.ensure_future(watch_memory()) if memory_limit is not None else None
+    try:
+        await asyncio.wait_for(follow_stdout(), timeout)
+        await process.wait()
+    except asyncio.TimeoutError:
+        result.timed_out = True
+    except BaseException:
+        stderr_task.cancel()
+        raise
+    finally:
+        if memory_task is not None:
+            memory_task.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    stderr = (await stderr_task).decode(errors="replace")
+    result.wall_time = time.perf_counter() - start
+    result.return_code = process.returncode
+    result.stderr_tail = "\n".join(stderr.splitlines()[-stderr_lines:]) if stderr_lines > 0 else ""
+    result.dump_files = find_dump_files(patterns, since=started_at)
+    record_result(result)
+    return result
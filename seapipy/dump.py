@@ -0,0 +1,347 @@
+import mmap
+import re
+from dataclasses import dataclass
+import numpy as np
+import seapipy.instrumentation as instrumentation
+from seapipy.tissue import Tissue
+
+SECTIONS = (b"vertices", b"edges", b"faces", b"bodies", b"read")
+SECTION_PATTERN = re.compile(rb"^[ \t]*(vertices|edges|faces|bodies|read)\b", re.I | re.M)
+# anything that can not be part of a number
+WORD_PATTERN = re.compile(rb"[a-df-zA-DF-Z_]")
+DIMENSION_PATTERN = re.compile(rb"^[ \t]*space_dimension[ \t]+(\d+)", re.I | re.M)
+COMMENT_PATTERN = re.compile(rb"/\*.*?\*/|//[^\n]*", re.S)
+EDGE_PATTERN = re.compile(rb"^[ \t]*(\d+)[ \t]+(\d+)[ \t]+(\d+)(?:[^\n]*?\bdensity[ \t]+(\S+))?", re.I | re.M)
+FACE_PATTERN = re.compile(rb"^[ \t]*(\d+)((?:[ \t]+-?\d+)+)", re.M)
+BODY_PATTERN = re.compile(rb"^[ \t]*(\d+)((?:[ \t]+-?\d+)*)[^\n]*?\bvolume[ \t]+([^\s/]+)"
+                          rb"(?:[^\n]*?actual:[ \t]*([^\s*]+))?", re.I | re.M)
+BLANKS_PATTERN = re.compile(rb"[ \t]+")
+
+
+@dataclass
+class Dump:
+    """
+    Arrays with the state of the system saved in a Surface Evolver dump file. Ids are the ones in the file, which
+    might not be consecutive after the topology changes during the evolution.
+
+    :param vertex_ids: Id of each vertex
+    :type vertex_ids: np.ndarray
+    :param vertex_coordinates: Coordinates of the vertices
+    :type vertex_coordinates: np.ndarray
+    :param edge_ids: Id of each edge
+    :type edge_ids: np.ndarray
+    :param edge_vertices: Vertex ids at both ends of the edges
+    :type edge_vertices: np.ndarray
+    :param edge_densities: Line tension of each edge
+    :type edge_densities: np.ndarray
+    :param face_ids: Id of each face
+    :type face_ids: np.ndarray
+    :param face_offsets: Start of each face's boundary in *face_edges*, with a final entry for the end of the last one
+    :type face_offsets: np.ndarray
+    :param face_edges: Signed edge ids of all the faces' boundaries
+    :type face_edges: np.ndarray
+    :param body_ids: Id of each body
+    :type body_ids: np.ndarray
+    :param body_offsets: Start of each body's faces in *body_faces*, with a final entry for the end of the last one
+    :type body_offsets: np.ndarray
+    :param body_faces: Signed face ids of all the bodies
+    :type body_faces: np.ndarray
+    :param body_volumes: Target volume of each body
+    :type body_volumes: np.ndarray
+    :param body_actual_volumes: Volume of each body at the moment of the dump, NaN if it was not saved
+    :type body_actual_volumes: np.ndarray
+    """
+    vertex_ids: np.ndarray
+    vertex_coordinates: np.ndarray
+    edge_ids: np.ndarray
+    edge_vertices: np.ndarray
+    edge_densities: np.ndarray
+    face_ids: np.ndarray
+    face_offsets: np.ndarray
+    face_edges: np.ndarray
+    body_ids: np.ndarray
+    body_offsets: np.ndarray
+    body_faces: np.ndarray
+    body_volumes: np.ndarray
+    body_actual_volumes: np.ndarray
+
+    def to_tissue(self) -> Tissue:
+        """
+        Create an array backed tissue from the dump, numbering vertices, edges and cells from 1 in the order of the
+        file. Each face is a cell, oriented as the body that contains it
+
+        :return: Tissue with the state of the dump
+        :rtype: Tissue
+        """
+        edge_vertices = renumber(self.vertex_ids, self.edge_vertices)
+        cell_edges = renumber(self.edge_ids, self.face_edges)
+
+        cell_ids = np.arange(1, len(self.face_ids) + 1)
+        cell_volumes = None
+        if len(self.body_faces) == len(self.body_ids) == len(self.face_ids):
+            # one face per body, as written by SurfaceEvolver.generate_fe_file()
+            body_cells = renumber(self.face_ids, self.body_faces)
+            order = np.abs(body_cells) - 1
+            cell_ids[order] = body_cells
+            cell_volumes = np.empty(len(self.face_ids), dtype=self.body_volumes.dtype)
+            cell_volumes[order] = self.body_volumes
+
+        return Tissue(self.vertex_coordinates[:, :2], edge_vertices, cell_ids, self.face_offsets, cell_edges,
+                      self.edge_densities, cell_volumes)
+
+
+def renumber(ids: np.ndarray, references: np.ndarray) -> np.ndarray:
+    """
+    Replace signed references to element ids by signed positions, starting at 1, in the *ids* array
+
+    :param ids: Ids of the elements, in increasing order
+    :type ids: np.ndarray
+    :param references: Signed references to the elements
+    :type references: np.ndarray
+    :return: Signed position of the referenced elements
+    :rtype: np.ndarray
+    """
+    positions = np.searchsorted(ids, np.abs(references))
+    if np.any(positions >= len(ids)) or np.any(ids[np.minimum(positions, len(ids) - 1)] != np.abs(references)):
+        raise ValueError("Reference to an element that is not in the dump")
+    return np.sign(references) * (positions + 1)
+
+
+def split_sections(data) -> dict:
+    """
+    Split the contents of a Surface Evolver file in its header and element sections
+
+    :param data: Contents of the file
+    :type data: bytes or mmap.mmap
+    :return: Section name to its contents
+    :rtype: dict
+    """
+    starts = []
+    position = 0
+    for name in SECTIONS:
+        # dumps write the section names in lower case at the start of the line
+        found = data.find(b"\n" + name, position)
+        if found < 0:
+            continue
+        end = found + 1 + len(name)
+        if end < len(data) and (data[end:end + 1].isalnum() or data[end:end + 1] == b"_"):
+            # fall back to the slower search for unusual layouts
+            starts = None
+            break
+        starts.append((found + 1, end, name.decode()))
+        position = end
+    if starts is None:
+        starts = [(match.start(), match.end(), match.group(1).lower().decode())
+                  for match in SECTION_PATTERN.finditer(data)]
+
+    sections = {"header": data[:starts[0][0]] if starts else data[:]}
+    for current, following in zip(starts, starts[1:] + [None]):
+        end = following[0] if following is not None else len(data)
+        sections.setdefault(current[2], data[current[1]:end])
+    return sections
+
+
+def strip_comments(section: bytes) -> bytes:
+    """
+    Remove the comments of a section of a Surface Evolver file
+
+    :param section: Contents of the section
+    :type section: bytes
+    :return: Contents without comments
+    :rtype: bytes
+    """
+    if b"/*" not in section and b"//" not in section:
+        return section
+    return COMMENT_PATTERN.sub(b"", section)
+
+
+def tokenize_lines(section: bytes) -> tuple:
+    """
+    Parse a section made only of numbers in bulk, keeping track of the line of each number
+
+    :param section: Contents of the section, without comments or words
+    :type section: bytes
+    :return: All the numbers, the position of the first number of each non empty line and the amount of numbers in
+        each of them. None if the section can not be parsed this way
+    :rtype: tuple
+    """
+    characters = np.frombuffer(section, dtype=np.uint8)
+    blank = (characters == ord(" ")) | (characters == ord("\t")) | (characters == ord("\r"))
+    newline = characters == ord("\n")
+    filled = ~(blank | newline)
+    token_start = filled.copy()
+    token_start[1:] &= ~filled[:-1]
+    token_line = np.cumsum(newline)[token_start]
+
+    values = np.fromstring(section, dtype=np.float64, sep=" ") if len(token_line) > 0 else np.zeros(0)
+    if len(values) != len(token_line):
+        return None
+    line_start = np.ones(len(token_line), dtype=bool)
+    line_start[1:] = token_line[1:] != token_line[:-1]
+    starts = np.flatnonzero(line_start)
+    counts = np.diff(np.append(starts, len(token_line)))
+    return values, starts, counts
+
+
+def parse_vertices(vertices: bytes, dimension: int) -> tuple:
+    """
+    Parse the vertices section of a Surface Evolver file
+
+    :param vertices: Contents of the section, without comments
+    :type vertices: bytes
+    :param dimension: Number of coordinates of each vertex
+    :type dimension: int
+    :return: Vertex ids and coordinates
+    :rtype: tuple
+    """
+    if WORD_PATTERN.search(vertices) is None:
+        tokens = tokenize_lines(vertices)
+        if tokens is not None and np.all(tokens[2] == dimension + 1):
+            rows = tokens[0].reshape(-1, dimension + 1)
+            return rows[:, 0].astype(np.int64), rows[:, 1:]
+
+    vertex_pattern = re.compile(rb"^[ \t]*(\d+)" + rb"[ \t]+(\S+)" * dimension, re.M)
+    vertex_rows = vertex_pattern.findall(vertices)
+    vertex_ids = parse_numbers([row[0] for row in vertex_rows], np.int64)
+    vertex_coordinates = parse_numbers([row[1:] for row in vertex_rows], np.float64).reshape(-1, dimension)
+    return vertex_ids, vertex_coordinates
+
+
+def parse_edges(edges: bytes) -> tuple:
+    """
+    Parse the edges section of a Surface Evolver file
+
+    :param edges: Contents of the section, without comments
+    :type edges: bytes
+    :return: Edge ids, vertex ids at both ends and densities
+    :rtype: tuple
+    """
+    numbers_only = edges.replace(b"density", b"")
+    if WORD_PATTERN.search(numbers_only) is None:
+        tokens = tokenize_lines(numbers_only)
+        if tokens is not None and np.all((tokens[2] == 3) | (tokens[2] == 4)):
+            values, starts, counts = tokens
+            edge_vertices = np.stack([values[starts + 1], values[starts + 2]], axis=1).astype(np.int64)
+            edge_densities = np.where(counts == 4, values[np.minimum(starts + 3, len(values) - 1)], 1.0)
+            return values[starts].astype(np.int64), edge_vertices, edge_densities
+
+    edge_rows = EDGE_PATTERN.findall(edges)
+    edge_ids = parse_numbers([row[0] for row in edge_rows], np.int64)
+    edge_vertices = parse_numbers([row[1:3] for row in edge_rows], np.int64).reshape(-1, 2)
+    edge_densities = parse_numbers([row[3] or b"1" for row in edge_rows], np.float64)
+    return edge_ids, edge_vertices, edge_densities
+
+
+def parse_faces(faces: bytes) -> tuple:
+    """
+    Parse the faces section of a Surface Evolver file
+
+    :param faces: Contents of the section, without comments or line continuations
+    :type faces: bytes
+    :return: Face ids, and the offsets and signed edge ids of their boundaries
+    :rtype: tuple
+    """
+    if WORD_PATTERN.search(faces) is None:
+        tokens = tokenize_lines(faces)
+        if tokens is not None:
+            values, starts, counts = tokens
+            face_offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+            np.cumsum(counts - 1, out=face_offsets[1:])
+            is_edge = np.ones(len(values), dtype=bool)
+            is_edge[starts] = False
+            return values[starts].astype(np.int64), face_offsets, values[is_edge].astype(np.int64)
+
+    face_rows = FACE_PATTERN.findall(faces)
+    face_ids = parse_numbers([row[0] for row in face_rows], np.int64)
+    face_offsets, face_edges = parse_signed_lists([row[1] for row in face_rows])
+    return face_ids, face_offsets, face_edges
+
+
+def parse_numbers(values: list, dtype) -> np.ndarray:
+    """
+    Convert a list of numbers as bytes into an array
+
+    :param values: Numbers as bytes
+    :type values: list
+    :param dtype: Type of the array
+    :return: Array with the numbers
+    :rtype: np.ndarray
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.array(values).astype(dtype)
+
+
+def parse_signed_lists(lists: list) -> tuple:
+    """
+    Convert a list of whitespace separated signed integers as bytes into offsets and values arrays
+
+    :param lists: Lists of integers as bytes
+    :type lists: list
+    :return: Offsets and values of the lists
+    :rtype: tuple
+    """
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    if len(lists) == 0:
+        return offsets, np.zeros(0, dtype=np.int64)
+    normalized = BLANKS_PATTERN.sub(b" ", b"\n".join(lists).strip(b" \t"))
+    values = np.array(normalized.split(), dtype=np.int64)
+    lines = np.array(normalized.split(b"\n"))
+    np.cumsum(np.char.count(np.char.strip(lines), b" ") + (np.char.str_len(np.char.strip(lines)) > 0),
+              out=offsets[1:])
+    return offsets, values
+
+
+def read_dump(file_path: str) -> Dump:
+    """
+    Read the vertices, edges, faces and bodies of a Surface Evolver dump file, as written by
+    :meth:`seapipy.surface_evolver.SurfaceEvolver.save_one_step`, into arrays
+
+    :param file_path: Path to the dump file
+    :type file_path: str
+    :return: Arrays with the state of the system
+    :rtype: Dump
+    """
+    with instrumentation.span("dump.read"), open(file_path, mode="rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can not be mapped
+            data = b""
+        instrumentation.count("dump.bytes_read", len(data))
+        try:
+            return parse_dump(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def parse_dump(data) -> Dump:
+    """
+    Parse the contents of a Surface Evolver dump file into arrays
+
+    :param data: Contents of the file
+    :type data: bytes or mmap.mmap
+    :return: Arrays with the state of the system
+    :rtype: Dump
+    """
+    sections = split_sections(data)
+    header = strip_comments(sections["header"])
+    dimension_match = DIMENSION_PATTERN.search(header)
+    dimension = int(dimension_match.group(1)) if dimension_match else 2
+
+    vertex_ids, vertex_coordinates = parse_vertices(strip_comments(sections.get("vertices", b"")), dimension)
+    edge_ids, edge_vertices, edge_densities = parse_edges(strip_comments(sections.get("edges", b"")))
+    face_ids, face_offsets, face_edges = parse_faces(strip_comments(sections.get("faces", b"").replace(b"\\\n",
+                                                                                                        b" ")))
+
+    # the actual volumes are saved as comments
+    bodies = sections.get("bodies", b"").replace(b"\\\n", b" ")
+    body_rows = BODY_PATTERN.findall(bodies)
+    body_ids = parse_numbers([row[0] for row in body_rows], np.int64)
+    body_offsets, body_faces = parse_signed_lists([row[1] for row in body_rows])
+    body_volumes = parse_numbers([row[2] for row in body_rows], np.float64)
+    body_actual_volumes = parse_numbers([row[3] or b"nan" for row in body_rows], np.float64)
+
+    return Dump(vertex_ids, vertex_coordinates, edge_ids, edge_vertices, edge_densities, face_ids, face_offsets,
+                face_edges, body_ids, body_offsets, body_faces, body_volumes, body_actual_volumes)
@@ -0,0 +1,143 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import seapipy.instrumentation as instrumentation
+import seapipy.random_generators as random_generators
+from seapipy.example_tissues import NormalFurrow
+
+MANIFEST_NAME = "manifest.json"
+
+
+def expand_grid(parameters: dict, grid: dict) -> list:
+    """
+    Get the parameters of every combination of the values in the grid
+
+    :param parameters: Parameters shared by all the points
+    :type parameters: dict
+    :param grid: Parameter name to the list of values it takes
+    :type grid: dict
+    :return: Parameters of each point, with the last parameter of the grid changing fastest
+    :rtype: list
+    """
+    keys = list(grid.keys())
+    return [{**parameters, **dict(zip(keys, values))} for values in itertools.product(*grid.values())]
+
+
+def get_seed_record(seed_sequence: np.random.SeedSequence) -> dict:
+    """
+    Get a JSON serializable record of a seed sequence
+
+    :param seed_sequence: Seed sequence of a replicate
+    :type seed_sequence: numpy.random.SeedSequence
+    :return: Entropy and spawn key of the sequence
+    :rtype: dict
+    """
+    return {"entropy": seed_sequence.entropy, "spawn_key": list(seed_sequence.spawn_key)}
+
+
+def get_seed_sequence(record: dict) -> np.random.SeedSequence:
+    """
+    Get the seed sequence of a replicate from its record in a manifest
+
+    :param record: Entropy and spawn key of the sequence
+    :type record: dict
+    :return: Seed sequence of the replicate
+    :rtype: numpy.random.SeedSequence
+    """
+    return np.random.SeedSequence(record["entropy"], spawn_key=tuple(record["spawn_key"]))
+
+
+def generate_member(tissue_class, parameters: dict, seed_record: dict, fe_filepath: str) -> int:
+    """
+    Create one tissue of an ensemble and save its Surface Evolver file. Run in the processes of the pool
+
+    :param tissue_class: Class of the tissue
+    :type tissue_class: type
+    :param parameters: Parameters of the tissue, without the seed
+    :type parameters: dict
+    :param seed_record: Entropy and spawn key of the seed sequence of the tissue
+    :type seed_record: dict
+    :param fe_filepath: Path of the Surface Evolver file
+    :type fe_filepath: str
+    :return: Size of the Surface Evolver file in bytes
+    :rtype: int
+    """
+    os.makedirs(parameters["save_dir"], exist_ok=True)
+    tissue = tissue_class({**parameters, "seed": get_seed_sequence(seed_record)})
+    tissue.se_object.save_fe_file(fe_filepath)
+    return os.path.getsize(fe_filepath)
+
+
+def generate_ensemble(parameters, output_directory: str, tissue_class=NormalFurrow, replicates: int = 1,
+                      grid: dict = None, seed: int = None, max_workers: int = None) -> dict:
+    """
+    Create the Surface Evolver files of many tissues across a pool of processes. Each replicate gets its own seed
+    sequence spawned from *seed*, so the same call always writes the same files whatever the number of processes.
+    The dumps of each tissue are saved in its own folder, inside the "save_dir" parameter or the output folder
+
+    :param parameters: Parameters of a tissue, see :class:`seapipy.example_tissues.ExampleTissues`, or a list of them
+    :type parameters: dict
+    :param output_directory: Folder for the Surface Evolver files and the manifest
+    :type output_directory: str
+    :param tissue_class: Class of the tissues
+    :type tissue_class: type
+    :param replicates: Number of tissues created with each set of parameters
+    :type replicates: int
+    :param grid: Parameter name to the list of values it takes, combined with each set of parameters
+    :type grid: dict, optional
+    :param seed: Root seed of the ensemble. If None, a random one is drawn and stored in the manifest
+    :type seed: int, optional
+    :param max_workers: Maximum number of processes. Defaults to the number of cores, and larger values are lowered
+        to it, as creating the tissues is CPU bound and more processes than cores would only add overhead
+    :type max_workers: int, optional
+    :return: Manifest with the seed of the ensemble and, for each tissue, its file, parameters and seed
+    :rtype: dict
+    """
+    points = [parameters] if isinstance(parameters, dict) else list(parameters)
+    if grid is not None:
+        points = [point for base in points for point in expand_grid(base, grid)]
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seed_sequences = random_generators.spawn_seeds(root, len(points) * replicates)
+
+    os.makedirs(output_directory, exist_ok=True)
+    point_width, replicate_width = len(str(max(len(points) - 1, 0))), len(str(max(replicates - 1, 0)))
+    members = []
+    for ii, point in enumerate(points):
+        for replicate in range(replicates):
+            name = f"point_{ii:0{point_width}d}_replicate_{replicate:0{replicate_width}d}"
+            save_dir = os.path.join(point.get("save_dir", output_directory), name)
+            members.append({"name": name,
+                            "point": ii,
+                            "replicate": replicate,
+                            "fe_file": os.path.join(output_directory, f"{name}.fe"),
+                            "parameters": {**point, "save_dir": save_dir},
+                            "seed": get_seed_record(seed_sequences[ii * replicates + replicate])})
+
+    cpu_count = os.cpu_count() or 1
+    max_workers = cpu_count if max_workers is None else max(1, min(max_workers, cpu_count))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [instrumentation.submit(executor, generate_member, tissue_class, member["parameters"],
+                                          member["seed"], member["fe_file"])
+                   for member in members]
+        for member, future in zip(members, futures):
+            member["bytes"] = instrumentation.get_result(future)
+
+    manifest = {"tissue": tissue_class.__name__, "seed": get_seed_record(root), "members": members}
+    with open(os.path.join(output_directory, MANIFEST_NAME), mode="w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(output_directory: str) -> dict:
+    """
+    Load the manifest written by :func:`generate_ensemble`
+
+    :param output_directory: Folder of the ensemble
+    :type output_directory: str
+    :return: Manifest of the ensemble
+    :rtype: dict
+    """
+    with open(os.path.join(output_directory, MANIFEST_NAME)) as f:
+        return json.load(f)
@@ -1,31 +1,112 @@
+from functools import cached_property
 import numpy as np
-import scipy.stats as sps
 import seapipy.lattice_class as lattice_class
+import seapipy.random_generators as random_generators
 import seapipy.surface_evolver as surface_evolver
+import seapipy.tension_fields as tension_fields
+
+# Stages of a tissue that draw random numbers, each with its own generator
+RANDOM_STAGES = ("seeds", "volumes", "densities", "new_densities")
 
 
 class ExampleTissues:
     """
-    Parent class for creating tissues
+    Parent class for creating tissues. The tissue is built in stages, lattice -> parameters -> script -> protocol,
+    each one computed once when it is first needed. Subclasses change a stage by overriding its method
+    (:meth:`create_lattice`, :meth:`get_initial_densities`, :meth:`create_se_file`, :meth:`evolve` or
+    :meth:`get_new_densities`) without repeating the earlier ones
 
     :param parameters: Dictionary with all the relevant parameters of the system
     :type parameters: dict
+    :param tissue: Array backed tissue to use instead of creating a new lattice. If it has densities and volumes, they
+        are used as the initial ones
+    :type tissue: tissue.Tissue, optional
+    :param lazy: If True, the stages are only computed when they are accessed instead of when the object is created
+    :type lazy: bool, optional
     """
-    def __init__(self, parameters):
-        self.cells = None
-        self.edges = None
-        self.vertices = None
-
+    def __init__(self, parameters, tissue=None, lazy=False):
         self.parameters = parameters
+        self.tissue = tissue
+        self.base_dump_path = None
+        self.base_dump_counter = 0
 
-        self.lattice = self.create_lattice()
+        if not lazy:
+            self.se_object
 
-        self.volumes, self.densities = self.get_initial_densities()
-        self.se_object = self.create_se_file()
+    @cached_property
+    def rngs(self):
+        """
+        Random number generators of the tissue, one per stage in *RANDOM_STAGES*, created from the "seed" parameter
+        so every stage draws the same numbers whatever the order the stages are computed in. Without a seed, the
+        global numpy random state is used
+        """
+        return random_generators.get_stage_generators(self.parameters.get("seed"), RANDOM_STAGES)
 
-        self.se_object.generate_fe_file()
+    @cached_property
+    def lattice(self):
+        """
+        Lattice with the initial Voronoi tessellation
+        """
+        return self.create_lattice()
+
+    @cached_property
+    def elements(self):
+        """
+        Vertices, edges and cells dictionaries of the tissue
+        """
+        if self.tissue is not None:
+            return self.tissue.vertices, self.tissue.edges, self.tissue.cells
+        return self.lattice.create_lattice_elements()
 
-        self.evolve()
+    @property
+    def vertices(self):
+        return self.elements[0]
+
+    @property
+    def edges(self):
+        return self.elements[1]
+
+    @property
+    def cells(self):
+        return self.elements[2]
+
+    @cached_property
+    def initial_densities(self):
+        """
+        Cell volumes and membrane densities of the initial Surface Evolver simulation
+        """
+        return self.get_initial_densities()
+
+    @property
+    def volumes(self):
+        return self.initial_densities[0]
+
+    @property
+    def densities(self):
+        return self.initial_densities[1]
+
+    @cached_property
+    def new_densities(self):
+        """
+        Membrane densities assigned after the initial evolution, None if the tissue keeps the initial ones
+        """
+        return self.get_new_densities()
+
+    @cached_property
+    def se_object(self):
+        """
+        Surface Evolver slate with the tissue and the whole protocol written to it
+        """
+        se_object = self.create_se_file()
+        # cached before writing the protocol, which adds its steps to self.se_object
+        self.__dict__["se_object"] = se_object
+        if self.base_dump_path is None:
+            se_object.generate_fe_file()
+            self.evolve()
+        else:
+            se_object.generate_from_dump(self.base_dump_path, dump_counter=self.base_dump_counter)
+        self.change_tensions()
+        return se_object
 
     def create_lattice(self):
         """
@@ -35,15 +116,17 @@ class ExampleTissues:
         :rtype: lattice_class.Lattice
         """
         # TODO Use the lattice_class.create_example_lattice() instead of this function
-        lattice = lattice_class.Lattice(self.parameters["n_cells_x"], self.parameters["n_cells_y"])
+        lattice = lattice_class.Lattice(self.parameters.get("n_cells_x"), self.parameters.get("n_cells_y"))
+        if self.tissue is not None:
+            return lattice
 
         lattice.generate_voronoi_tessellation(
             lattice.generate_square_seeds(
                 standard_deviation=self.parameters["voronoi_seeds_std"],
-                spatial_step=self.parameters["voronoi_seeds_step"]
+                spatial_step=self.parameters["voronoi_seeds_step"],
+                rng=self.rngs["seeds"]
             )
         )
-        self.vertices, self.edges, self.cells = lattice.create_lattice_elements()
         return lattice
 
     def create_se_file(self):
@@ -69,30 +152,120 @@ class ExampleTissues:
 
         :return: cell volumes and membrane densities
         """
+        if self.tissue is not None and self.tissue.edge_densities is not None and self.tissue.cell_volumes is not None:
+            return self.tissue.volumes, self.tissue.densities
+
         cell_volumes = self.lattice.get_normally_distributed_volumes(self.cells,
                                                                      means=(self.parameters['cell_v_mean'],),
                                                                      stds=(self.parameters['cell_v_std'],),
-                                                                     weights=None)
+                                                                     weights=None,
+                                                                     rng=self.rngs["volumes"])
 
         densities = self.lattice.get_normally_distributed_densities(self.edges,
                                                                     1,
-                                                                    0.1)
+                                                                    0.1,
+                                                                    rng=self.rngs["densities"])
 
         return cell_volumes, densities
 
-    def evolve(self):
+    def get_new_densities(self):
+        """
+        Create the densities dictionary assigned after the initial evolution. The parent class keeps the initial
+        densities
+
+        :return: None
+        """
+        return None
+
+    def evolve(self, se_object=None):
+        """
+        Add the initial evolution steps to the Surface Evolver slate. If the parameters have a "tolerance", each
+        evolution stops once the relative energy change is below it instead of running the whole number of steps
+
+        :param se_object: Slate to write to, defaults to the one of the tissue
+        :type se_object: surface_evolver.SurfaceEvolver, optional
+        :return: None
+        """
+        se_object = self.se_object if se_object is None else se_object
+        tolerance = self.parameters.get("tolerance")
+        se_object.initial_relaxing(evolve_step=10000, tolerance=tolerance)
+        se_object.evolve_relaxing(10, 2500, tolerance=tolerance)
+        se_object.add_vertex_averaging(100)
+        se_object.change_scale(0.005)
+        se_object.evolve_relaxing(5, 5000, tolerance=tolerance)
+        se_object.save_one_step(self.parameters['save_dir'], self.parameters['file_name'])
+        se_object.evolve_relaxing(5, 5000, tolerance=tolerance)
+
+    def change_tensions(self):
         """
-        Add the initial evolution steps to the Surface Evolver slate
+        Add the change to the new membrane densities after the initial evolution, if the tissue has any
 
         :return: None
         """
-        self.se_object.initial_relaxing(evolve_step=10000)
-        self.se_object.evolve_relaxing(10, 2500)
-        self.se_object.add_vertex_averaging(100)
-        self.se_object.change_scale(0.005)
-        self.se_object.evolve_relaxing(5, 5000)
+        if self.new_densities is None:
+            return None
+        self.se_object.change_line_tensions(self.new_densities)
         self.se_object.save_one_step(self.parameters['save_dir'], self.parameters['file_name'])
-        self.se_object.evolve_relaxing(5, 5000)
+
+    def save_base_fe_file(self, file_name: str, base_dump_path: str):
+        """
+        Save a Surface Evolver file that only creates and relaxes the tissue, dumping the relaxed state to
+        *base_dump_path*. Running it once allows many variants to start from the relaxed state with :meth:`fork`
+
+        :param file_name: Path of the Surface Evolver file
+        :type file_name: str
+        :param base_dump_path: Path of the dump with the relaxed tissue
+        :type base_dump_path: str
+        :return: Success state of the saving
+        :rtype: bool
+        """
+        base = self.create_se_file()
+        base.generate_fe_file()
+        self.evolve(base)
+        base.dump(base_dump_path)
+        return base.save_fe_file(file_name)
+
+    def get_base_dump_counter(self) -> int:
+        """
+        Get the number of dumps saved by the file of :meth:`save_base_fe_file`, which the dumps of the variants follow.
+        The protocol is recorded again without writing it, so the file does not have to be saved by this object
+
+        :return: Number of dumps saved before the relaxed state
+        :rtype: int
+        """
+        base = self.create_se_file()
+        self.evolve(base)
+        return base.dump_counter
+
+    @classmethod
+    def fork(cls, base, base_dump_path: str, parameters: dict, dump_counter: int = None):
+        """
+        Create a tissue that starts from the relaxed state of *base*, dumped by running the file saved with
+        :meth:`save_base_fe_file`, and only adds its own change of densities. The lattice and initial densities are
+        shared with *base*
+
+        :param base: Tissue whose relaxed state is reused
+        :type base: ExampleTissues
+        :param base_dump_path: Path of the dump with the relaxed tissue
+        :type base_dump_path: str
+        :param parameters: Parameters that replace the ones of *base*. They need a "save_dir" or "file_name" of their
+            own, so the dumps of the variant do not overwrite the ones of *base* or of other variants
+        :type parameters: dict
+        :param dump_counter: Number of dumps saved by the base file, counted from the protocol of *base* if not given
+        :type dump_counter: int, optional
+        :return: Tissue of this class that starts from the relaxed state
+        :rtype: ExampleTissues
+        """
+        parameters = {**base.parameters, **parameters}
+        if (parameters["save_dir"], parameters["file_name"]) == (base.parameters["save_dir"],
+                                                                 base.parameters["file_name"]):
+            raise ValueError("A variant needs its own \"save_dir\" or \"file_name\" parameter")
+        variant = cls(parameters, base.tissue, lazy=True)
+        variant.lattice, variant.elements = base.lattice, base.elements
+        variant.initial_densities = base.initial_densities
+        variant.base_dump_path = base_dump_path
+        variant.base_dump_counter = base.get_base_dump_counter() if dump_counter is None else dump_counter
+        return variant
 
     def save_many_steps(self, max_steps: int = 50, step: int = 50):
         """
@@ -114,49 +287,34 @@ class NormalFurrow(ExampleTissues):
 
     :param parameters: Dictionary with all the relevant parameters of the system
     :type parameters: dict
+    :param tissue: Array backed tissue to use instead of creating a new lattice
+    :type tissue: tissue.Tissue, optional
+    :param lazy: If True, the stages are only computed when they are accessed
+    :type lazy: bool, optional
     """
-    def __init__(self, parameters):
-        super().__init__(parameters)
-
-        self.new_densities = self.get_new_densities(axis=self.parameters["axis"])
-        self.se_object.change_line_tensions(self.new_densities)
-        self.se_object.save_one_step(self.parameters['save_dir'], self.parameters['file_name'])
-
-    def get_new_densities(self, axis="x"):
+    def get_new_densities(self, axis=None):
         """
         Create the densities dictionary with the normal distribution in the horizontal or vertical axis
 
-        :param axis: x or y
-        :type axis: str
+        :param axis: x or y, defaults to the axis in the parameters
+        :type axis: str, optional
         :return: Dictionary with the new densities to be assigned to the membranes
         :rtype: dict
         """
-        tissue_center = np.mean(self.lattice.get_coordinates(self.vertices), axis=1)
-        tissue_min = np.min(self.lattice.get_coordinates(self.vertices), axis=1)
-        tissue_max = np.max(self.lattice.get_coordinates(self.vertices), axis=1)
-        if axis == "x":
-            xrange = np.arange(tissue_min[0], tissue_max[0])
-            distribution_peak = np.max(sps.norm.pdf(xrange, loc=tissue_center[0], scale=self.parameters['edge_t_std']))
-            norm_value = {k: sps.norm.pdf(self.lattice.get_edge_centroid(k, self.vertices, self.edges)[0],
-                                          tissue_center[0],
-                                          self.parameters['edge_t_std']) / distribution_peak
-                          for k, _ in self.edges.items()}
-
-            new_densities = {k: self.densities[k] + self.parameters['edge_t_mean'] * norm_value[k]
-                             for k, edge in self.edges.items()}
-        elif axis == "y":
-            xrange = np.arange(tissue_min[1], tissue_max[1])
-            distribution_peak = np.max(sps.norm.pdf(xrange, loc=tissue_center[1], scale=self.parameters['edge_t_std']))
-            norm_value = {k: sps.norm.pdf(self.lattice.get_edge_centroid(k, self.vertices, self.edges)[1],
-                                          tissue_center[1],
-                                          self.parameters['edge_t_std']) / distribution_peak
-                          for k, _ in self.edges.items()}
-            new_densities = {k: self.densities[k] + self.parameters['edge_t_mean'] * norm_value[k]
-                             for k, edge in self.edges.items()}
-        else:
-            raise NotImplementedError
-
-        return new_densities
+        if axis is None:
+            axis = self.parameters["axis"]
+        axis_index = tension_fields.get_axis(axis)
+        edge_ids, centroids = tension_fields.get_edge_centroids(self.vertices, self.edges)
+        tissue_center, tissue_min, tissue_max = tension_fields.get_tissue_bounds(self.vertices)
+
+        norm_value = tension_fields.gaussian_stripe(centroids, tissue_center, self.parameters['edge_t_std'], axis)
+        # normalized by the highest value at integer distances, as the densities were done before
+        xrange = np.arange(tissue_min[axis_index], tissue_max[axis_index])
+        distribution_peak = np.max(tension_fields.gaussian(xrange - tissue_center[axis_index],
+                                                           self.parameters['edge_t_std']))
+        new_densities = (tension_fields.get_aligned_values(self.densities, edge_ids) +
+                         self.parameters['edge_t_mean'] * norm_value / distribution_peak)
+        return tension_fields.to_dict(edge_ids, new_densities)
 
 
 class CircularFurrow(ExampleTissues):
@@ -166,19 +324,11 @@ class CircularFurrow(ExampleTissues):
 
     :param parameters: Dictionary with all the relevant parameters of the system
     :type parameters: dict
+    :param tissue: Array backed tissue to use instead of creating a new lattice
+    :type tissue: tissue.Tissue, optional
+    :param lazy: If True, the stages are only computed when they are accessed
+    :type lazy: bool, optional
     """
-    def __init__(self, parameters):
-        super().__init__(parameters)
-
-        self.volumes, self.densities = self.get_initial_densities()
-        self.se_object = self.create_se_file()
-
-        self.se_object.generate_fe_file()
-        self.evolve()
-        self.new_densities = self.get_new_densities()
-        self.se_object.change_line_tensions(self.new_densities)
-        self.se_object.save_one_step(self.parameters['save_dir'], self.parameters['file_name'])
-
     def get_new_densities(self):
         """
         Create the densities dictionary with the normal distribution in a circular furrow
@@ -186,21 +336,11 @@ class CircularFurrow(ExampleTissues):
         :return: Dictionary with the new densities to be assigned to the membranes
         :rtype: dict
         """
-        new_densities = {}
-        tissue_center = np.mean(self.lattice.get_coordinates(self.vertices), axis=1)
-
-        for k, edge in self.edges.items():
-            centroid = self.lattice.get_edge_centroid(k, self.vertices, self.edges)
-            distance = np.linalg.norm(tissue_center - centroid)
-            distribution_peak = sps.norm.pdf(0, loc=0, scale=self.parameters['edge_t_std'])
-
-            new_densities[k] = sps.norm.pdf(distance,
-                                            loc=0,
-                                            scale=self.parameters['edge_t_std']) / distribution_peak
+        edge_ids, centroids = tension_fields.get_edge_centroids(self.vertices, self.edges)
+        tissue_center = tension_fields.get_tissue_bounds(self.vertices)[0]
+        new_densities = tension_fields.gaussian_ring(centroids, tissue_center, self.parameters['edge_t_std'])
         # make densities have an average of 1:
-        mean_value = np.mean(list(new_densities.values()))
-        new_densities = {k: value / mean_value for k, value in new_densities.items()}
-        return new_densities
+        return tension_fields.to_dict(edge_ids, new_densities / np.mean(new_densities))
 
 
 class RandomCellTypes(ExampleTissues):
@@ -209,20 +349,11 @@ class RandomCellTypes(ExampleTissues):
 
     :param parameters: Dictionary with all the relevant parameters of the system
     :type parameters: dict
+    :param tissue: Array backed tissue to use instead of creating a new lattice
+    :type tissue: tissue.Tissue, optional
+    :param lazy: If True, the stages are only computed when they are accessed
+    :type lazy: bool, optional
     """
-    def __init__(self, parameters):
-        super().__init__(parameters)
-
-        self.volumes, self.densities = self.get_initial_densities()
-        self.se_object = self.create_se_file()
-
-        self.se_object.generate_fe_file()
-        self.evolve()
-        self.new_densities = self.get_new_densities()
-
-        self.se_object.change_line_tensions(self.new_densities)
-        self.se_object.save_one_step(self.parameters['save_dir'], self.parameters['file_name'])
-
     def get_new_densities(self):
         """
         Create the densities dictionary using a random assignment of values. It can be controlled using the parameters
@@ -231,11 +362,9 @@ class RandomCellTypes(ExampleTissues):
         :return: Dictionary with the new densities to be assigned to the membranes
         :rtype: dict
         """
-        new_densities = {}
-        for k, _ in self.edges.items():
-            chosen = np.random.choice(self.parameters["edge_tensions"])
-            scale = self.parameters["edge_tensions_std"] * chosen
-
-            new_densities[k] = np.random.normal(loc=chosen, scale=scale)
+        rng = self.rngs["new_densities"]
+        chosen = rng.choice(self.parameters["edge_tensions"], size=len(self.edges))
+        scale = self.parameters["edge_tensions_std"] * chosen
 
-        return new_densities
+        new_densities = rng.normal(loc=chosen, scale=scale)
+        return dict(zip(self.edges.keys(), new_densities.tolist()))
@@ -0,0 +1,204 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Returned by span() while instrumentation is disabled
+DISABLED_SPAN = nullcontext()
+
+_recorder = None
+
+
+class Recorder:
+    """
+    Collects the timed spans and counters of the instrumented stages. Recording is thread safe, so the jobs of a batch
+    run are aggregated in the same recorder
+
+    :param callback: Function called as callback(kind, name, value) for every finished span, with kind "span" and the
+        duration in seconds, and for every counter increment, with kind "counter"
+    :type callback: callable, optional
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.spans = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Time the code inside the with block
+
+        :param name: Name of the stage
+        :type name: str
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, time.perf_counter() - start)
+
+    def add_span(self, name: str, duration: float) -> None:
+        """
+        Record a finished span
+
+        :param name: Name of the stage
+        :type name: str
+        :param duration: Duration in seconds
+        :type duration: float
+        :return: None
+        """
+        with self._lock:
+            stats = self.spans.setdefault(name, {"count": 0, "total_time": 0.0, "max_time": 0.0})
+            stats["count"] += 1
+            stats["total_time"] += duration
+            stats["max_time"] = max(stats["max_time"], duration)
+        if self.callback is not None:
+            self.callback("span", name, duration)
+
+    def count(self, name: str, value=1) -> None:
+        """
+        Increment a counter
+
+        :param name: Name of the counter
+        :type name: str
+        :param value: Increment
+        :return: None
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.callback is not None:
+            self.callback("counter", name, value)
+
+    def report(self) -> dict:
+        """
+        Get the recorded spans and counters
+
+        :return: Dictionary with the "spans", each with its count, total and maximum time, and the "counters"
+        :rtype: dict
+        """
+        with self._lock:
+            return {"spans": {name: dict(stats) for name, stats in self.spans.items()},
+                    "counters": dict(self.counters)}
+
+    def merge(self, report: dict) -> None:
+        """
+        Add a report of another recorder, for instance one from another process
+
+        :param report: Report returned by :meth:`report`
+        :type report: dict
+        :return: None
+        """
+        with self._lock:
+            for name, other in report["spans"].items():
+                stats = self.spans.setdefault(name, {"count": 0, "total_time": 0.0, "max_time": 0.0})
+                stats["count"] += other["count"]
+                stats["total_time"] += other["total_time"]
+                stats["max_time"] = max(stats["max_time"], other["max_time"])
+            for name, value in report["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+@contextmanager
+def instrument(callback=None, recorder: Recorder = None):
+    """
+    Enable the instrumentation inside the with block
+
+    :param callback: Function called for every span and counter, see :class:`Recorder`
+    :type callback: callable, optional
+    :param recorder: Recorder to add to, instead of a new one
+    :type recorder: Recorder, optional
+    :return: Recorder with the spans and counters
+    :rtype: Recorder
+    """
+    global _recorder
+    previous = _recorder
+    _recorder = Recorder(callback) if recorder is None else recorder
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+def get_recorder() -> Recorder:
+    """
+    Get the active recorder
+
+    :return: Active recorder, None if the instrumentation is disabled
+    :rtype: Recorder
+    """
+    return _recorder
+
+
+def span(name: str):
+    """
+    Time the code inside the with block if the instrumentation is enabled
+
+    :param name: Name of the stage
+    :type name: str
+    """
+    if _recorder is None:
+        return DISABLED_SPAN
+    return _recorder.span(name)
+
+
+def count(name: str, value=1) -> None:
+    """
+    Increment a counter if the instrumentation is enabled
+
+    :param name: Name of the counter
+    :type name: str
+    :param value: Increment
+    :return: None
+    """
+    if _recorder is not None:
+        _recorder.count(name, value)
+
+
+def call_recorded(function, *args, **kwargs) -> tuple:
+    """
+    Call a function with its own recorder, for instance in another process, whose spans and counters would be lost
+
+    :param function: Function to call with the other arguments
+    :type function: callable
+    :return: Result of the function and report of its recorder
+    :rtype: tuple
+    """
+    with instrument() as recorder:
+        result = function(*args, **kwargs)
+    return result, recorder.report()
+
+
+def submit(executor, function, *args, **kwargs):
+    """
+    Submit a function to a pool of processes. If the instrumentation is enabled, the function is recorded in its
+    process and :func:`get_result` adds its report to the active recorder
+
+    :param executor: Pool of processes
+    :type executor: concurrent.futures.Executor
+    :param function: Function to run with the other arguments
+    :type function: callable
+    :return: Future of the call
+    :rtype: concurrent.futures.Future
+    """
+    if _recorder is None:
+        return executor.submit(function, *args, **kwargs)
+    future = executor.submit(call_recorded, function, *args, **kwargs)
+    future.recorder = _recorder
+    return future
+
+
+def get_result(future):
+    """
+    Get the result of a call made with :func:`submit`, merging the spans and counters of the call into the recorder
+    that was active when it was submitted
+
+    :param future: Future returned by :func:`submit`
+    :type future: concurrent.futures.Future
+    :return: Result of the call
+    """
+    recorder = getattr(future, "recorder", None)
+    if recorder is None:
+        return future.result()
+    result, report = future.result()
+    recorder.merge(report)
+    return result
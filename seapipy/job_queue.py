@@ -0,0 +1,286 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+import seapipy.command as command
+
+# Seconds a connection waits for the lock held by another worker
+LOCK_TIMEOUT = 60
+# Seconds between checks for new jobs of workers that wait for them
+WAIT_INTERVAL = 5
+STATUSES = ("pending", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    fe_file TEXT UNIQUE NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    claimed_at REAL,
+    finished_at REAL,
+    return_code INTEGER,
+    wall_time REAL,
+    cpu_time REAL,
+    max_rss INTEGER,
+    dump_files TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+def get_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class JobQueue:
+    """
+    Queue of Surface Evolver files kept in a SQLite database, so it survives restarts and can be shared by many worker
+    processes. Jobs are claimed in a write transaction, so each one is given to a single worker. Failed jobs are put
+    back in the queue until they reach their maximum number of attempts. The database uses the default rollback
+    journal, which works on shared file systems as long as they implement file locking
+
+    :param path: Path of the database, created if it does not exist
+    :type path: str
+    :param lease_timeout: Seconds after which a running job is considered abandoned by its worker and put back in the
+        queue. It has to be longer than the longest run
+    :type lease_timeout: float, optional
+    """
+    path: str
+    lease_timeout: float = None
+
+    def __post_init__(self):
+        with closing(self.connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """
+        Open a connection to the database holding its write lock, committing when the with block ends
+
+        :return: Connection to the database
+        :rtype: sqlite3.Connection
+        """
+        # a new connection each time, so the queue can be used from any thread or process
+        with closing(self.connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def add(self, se_input_filepaths: list, max_attempts: int = 3) -> int:
+        """
+        Add Surface Evolver files to the queue. Files already in the queue are left as they are
+
+        :param se_input_filepaths: Paths to the Surface Evolver files
+        :type se_input_filepaths: list
+        :param max_attempts: Number of times each file is run before it is marked as failed
+        :type max_attempts: int
+        :return: Number of files added
+        :rtype: int
+        """
+        with self.transaction() as connection:
+            before = connection.total_changes
+            connection.executemany("INSERT OR IGNORE INTO jobs (fe_file, max_attempts) VALUES (?, ?)",
+                                   [(os.path.abspath(path), max_attempts) for path in se_input_filepaths])
+            return connection.total_changes - before
+
+    def claim(self, worker: str = None) -> tuple:
+        """
+        Take the oldest pending job, marking it as running
+
+        :param worker: Name of the worker, defaults to the host name and process id
+        :type worker: str, optional
+        :return: Job id and path of its Surface Evolver file, None if there are no pending jobs
+        :rtype: tuple
+        """
+        with self.transaction() as connection:
+            if self.lease_timeout is not None:
+                self._requeue_stale(connection, self.lease_timeout)
+            row = connection.execute("SELECT id, fe_file FROM jobs WHERE status = 'pending' "
+                                     "ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                               "claimed_at = ? WHERE id = ?",
+                               (worker or get_worker_name(), time.time(), row["id"]))
+            return row["id"], row["fe_file"]
+
+    def complete(self, job_id: int, result: command.EvolverResult, worker: str = None) -> str:
+        """
+        Record the outcome of a job. A failed job goes back to the queue if it has attempts left. The outcome is only
+        recorded if the job is still run by *worker*, so a worker whose lease expired does not overwrite the job after
+        it was given to another one
+
+        :param job_id: Id of the job
+        :type job_id: int
+        :param result: Outcome of the run
+        :type result: command.EvolverResult
+        :param worker: Name of the worker that claimed the job, defaults to the host name and process id
+        :type worker: str, optional
+        :return: New status of the job, None if the job is not run by this worker anymore
+        :rtype: str
+        """
+        with self.transaction() as connection:
+            row = connection.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'running' "
+                                     "AND worker = ?", (job_id, worker or get_worker_name())).fetchone()
+            if row is None:
+                return None
+            if result.success:
+                status = "done"
+            else:
+                status = "pending" if row["attempts"] < row["max_attempts"] else "failed"
+            connection.execute("UPDATE jobs SET status = ?, finished_at = ?, return_code = ?, wall_time = ?, "
+                               "cpu_time = ?, max_rss = ?, dump_files = ?, error = ? WHERE id = ?",
+                               (status, time.time(), result.return_code, result.wall_time, result.cpu_time,
+                                result.max_rss, json.dumps(result.dump_files), get_error(result), job_id))
+        return status
+
+    def release(self, job_id: int, worker: str = None) -> None:
+        """
+        Put a running job back in the queue without counting the attempt, for instance when its worker is stopped
+
+        :param job_id: Id of the job
+        :type job_id: int
+        :param worker: Name of the worker that claimed the job, defaults to the host name and process id
+        :type worker: str, optional
+        :return: None
+        """
+        with self.transaction() as connection:
+            connection.execute("UPDATE jobs SET status = 'pending', attempts = attempts - 1 "
+                               "WHERE id = ? AND status = 'running' AND worker = ?",
+                               (job_id, worker or get_worker_name()))
+
+    def requeue_stale(self, older_than: float) -> int:
+        """
+        Put back in the queue the running jobs claimed more than *older_than* seconds ago, whose workers probably died.
+        The ones that used all their attempts are marked as failed instead
+
+        :param older_than: Seconds since the job was claimed
+        :type older_than: float
+        :return: Number of jobs put back in the queue
+        :rtype: int
+        """
+        with self.transaction() as connection:
+            return self._requeue_stale(connection, older_than)
+
+    @staticmethod
+    def _requeue_stale(connection: sqlite3.Connection, older_than: float) -> int:
+        now = time.time()
+        connection.execute("UPDATE jobs SET status = 'failed', finished_at = ?, error = 'abandoned by its worker' "
+                           "WHERE status = 'running' AND claimed_at < ? AND attempts >= max_attempts",
+                           (now, now - older_than))
+        return connection.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running' AND claimed_at < ?",
+                                  (now - older_than,)).rowcount
+
+    def retry_failed(self) -> int:
+        """
+        Put the failed jobs back in the queue with all their attempts
+
+        :return: Number of jobs put back in the queue
+        :rtype: int
+        """
+        with self.transaction() as connection:
+            return connection.execute("UPDATE jobs SET status = 'pending', attempts = 0 "
+                                      "WHERE status = 'failed'").rowcount
+
+    def count(self) -> dict:
+        """
+        Count the jobs in each status
+
+        :return: Status to number of jobs
+        :rtype: dict
+        """
+        with self.transaction() as connection:
+            counts = dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def get_jobs(self, status: str = None) -> list:
+        """
+        Get the jobs of the queue
+
+        :param status: Only get the jobs with this status
+        :type status: str, optional
+        :return: One dictionary per job, with the columns of the database
+        :rtype: list
+        """
+        with self.transaction() as connection:
+            if status is None:
+                rows = connection.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+            else:
+                rows = connection.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+def get_error(result: command.EvolverResult) -> str:
+    """
+    Describe why a run failed
+
+    :param result: Outcome of the run
+    :type result: command.EvolverResult
+    :return: Reason of the failure, None if the run succeeded
+    :rtype: str
+    """
+    if result.success:
+        return None
+    if result.timed_out:
+        return "timed out"
+    if result.memory_exceeded:
+        return "memory limit exceeded"
+    if result.cancelled:
+        return "cancelled"
+    return f"return code {result.return_code}: {result.stderr_tail}"
+
+
+def run_worker(queue_path: str, evolver_filepath: str = "evolver", timeout: float = None, memory_limit: int = None,
+               wait: bool = False, lease_timeout: float = None) -> int:
+    """
+    Run the jobs of a queue one after the other until there are none left
+
+    :param queue_path: Path of the queue database
+    :type queue_path: str
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :param timeout: Seconds after which each process is killed
+    :type timeout: float, optional
+    :param memory_limit: Resident memory in bytes above which each process is killed
+    :type memory_limit: int, optional
+    :param wait: Keep waiting for new jobs instead of stopping when the queue is empty
+    :type wait: bool
+    :param lease_timeout: Seconds after which running jobs of other workers are put back in the queue
+    :type lease_timeout: float, optional
+    :return: Number of jobs run
+    :rtype: int
+    """
+    queue = JobQueue(queue_path, lease_timeout)
+    worker = get_worker_name()
+    jobs_run = 0
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            if not wait:
+                return jobs_run
+            time.sleep(WAIT_INTERVAL)
+            continue
+        job_id, fe_file = job
+        try:
+            result = command.run_evolver_job(fe_file, evolver_filepath, timeout=timeout, memory_limit=memory_limit)
+        except BaseException:
+            queue.release(job_id, worker)
+            raise
+        queue.complete(job_id, result, worker)
+        jobs_run += 1
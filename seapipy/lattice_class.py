@@ -2,6 +2,10 @@ from dataclasses import dataclass
 import numpy as np
 import scipy.spatial as spatial
 from copy import deepcopy
+from itertools import chain
+import seapipy.instrumentation as instrumentation
+import seapipy.random_generators as random_generators
+from seapipy.tissue import Tissue
 
 
 @dataclass
@@ -13,16 +17,24 @@ class Lattice:
     :type  number_cells_x: int
     :param number_cells_y: Number of cells in the x-axis to create
     :type  number_cells_y: int
+    :param region_filter: Method used to drop the regions at the border of the tessellation, see
+        :meth:`remove_infinite_regions`
+    :type region_filter: str, optional
+    :param max_distance: Maximum distance between consecutive vertices of a region for the "distance" filter
+    :type max_distance: float, optional
     """
     number_cells_x: int
     number_cells_y: int
 
     tessellation: object = None
 
+    region_filter: str = "distance"
+    max_distance: float = 50
+
     def __post_init__(self):
         ...
 
-    def generate_square_seeds(self, standard_deviation: float = 0, spatial_step: int = 1) -> list:
+    def generate_square_seeds(self, standard_deviation: float = 0, spatial_step: int = 1, rng=None) -> list:
         """
         Generate seeds for tessellation as a rectangular grid
 
@@ -30,12 +42,17 @@ class Lattice:
         :type standard_deviation: float
         :param spatial_step:
         :type spatial_step: int
+        :param rng: Random number generator or seed, see :func:`seapipy.random_generators.get_generator`
+        :type rng: numpy.random.Generator, optional
         :return: List of [x,y] coordinates for the seeds
         :rtype: list
         """
-        grid_values = ([[(i + np.random.normal(0, standard_deviation)) * spatial_step,
-                         (j + np.random.normal(0, standard_deviation)) * spatial_step]
-                        for j in range(0, self.number_cells_y) for i in range(0, self.number_cells_x)])
+        with instrumentation.span("lattice.seeds"):
+            rng = random_generators.get_generator(rng)
+            grid = np.stack(np.meshgrid(np.arange(self.number_cells_x), np.arange(self.number_cells_y)),
+                            axis=-1).reshape(-1, 2)
+            # drawn in the order x, y of each seed, as they were drawn one by one
+            grid_values = ((grid + rng.normal(0, standard_deviation, size=grid.shape)) * spatial_step).tolist()
         return grid_values
 
     def generate_voronoi_tessellation(self, seed_values: list) -> object:
@@ -47,22 +64,38 @@ class Lattice:
         :return: Voronoi tessellation object generated from the seed values
         :rtype: scipy.spatial.Voronoi()
         """
-        self.tessellation = spatial.Voronoi(list(seed_values))
+        with instrumentation.span("lattice.tessellation"):
+            self.tessellation = spatial.Voronoi(list(seed_values))
 
         return self.tessellation
 
-    def create_lattice_elements(self) -> tuple:
+    def create_lattice_elements(self, vectorized: bool = True) -> tuple:
         """
         Create the vertices, edges and cells from the scipy.spatial.Voronoi() objects
 
+        :param vectorized: Build the elements with :meth:`create_lattice_arrays` instead of looping over every polygon
+            side. Both methods give the same vertices, edges and cells
+        :type vectorized: bool, optional
         :return: Vertices, edges and cell's list
         :rtype: tuple
         """
+        if vectorized:
+            with instrumentation.span("lattice.elements"):
+                return self.arrays_to_elements(*self.create_lattice_arrays())
+
+        with instrumentation.span("lattice.elements"):
+            return self._create_lattice_elements_by_polygon()
+
+    def _create_lattice_elements_by_polygon(self) -> tuple:
         new_vertices = {}
         new_cells = {}
         new_edges = {}
         regions = deepcopy(self.tessellation.regions)
         big_edge = []
+        # hash indexes to find already known vertices and edges in constant time
+        vertex_index = {}
+        edge_index = {}
+        number_of_sides = 0
 
         cnum = 1
 
@@ -76,11 +109,8 @@ class Lattice:
                 c.append(c[0])
                 for ii in range(0, len(c) - 1):
                     temp_big_edge = []
-                    x_coordinate = np.around(np.linspace(round(self.tessellation.vertices[c[ii]][0], 3),
-                                                         round(self.tessellation.vertices[c[ii + 1]][0], 3), 2), 3)
-                    y_coordinate = np.around(self.line_eq(self.tessellation.vertices[c[ii]],
-                                                          self.tessellation.vertices[c[ii + 1]],
-                                                          x_coordinate), 3)
+                    x_coordinate, y_coordinate = self.get_side_coordinates(self.tessellation.vertices[c[ii]],
+                                                                           self.tessellation.vertices[c[ii + 1]])
 
                     new_edge_vertices = list(zip(x_coordinate, y_coordinate))
                     # add new edges to the global list
@@ -88,11 +118,12 @@ class Lattice:
                         v0 = new_edge_vertices[v]
                         v1 = new_edge_vertices[v + 1]
 
-                        vertex_number_1 = self.get_vertex_number(v0, new_vertices)
+                        vertex_number_1 = self.get_vertex_number(v0, new_vertices, vertex_index)
 
-                        vertex_number_2 = self.get_vertex_number(v1, new_vertices)
+                        vertex_number_2 = self.get_vertex_number(v1, new_vertices, vertex_index)
 
-                        enum = self.get_enum([vertex_number_1, vertex_number_2], new_edges)
+                        enum = self.get_enum([vertex_number_1, vertex_number_2], new_edges, edge_index)
+                        number_of_sides += 1
 
                         temp_big_edge.append(enum)
                         temp_for_cell.append(enum)
@@ -107,8 +138,109 @@ class Lattice:
                 # calculate cell_vertices centroid
                 cnum += 1
 
+        instrumentation.count("lattice.vertices_deduplicated", 2 * number_of_sides - len(new_vertices))
+        instrumentation.count("lattice.edges_deduplicated", number_of_sides - len(new_edges))
         return new_vertices, new_edges, new_cells
 
+    def create_lattice_arrays(self) -> tuple:
+        """
+        Create the vertices, edges and cells from the scipy.spatial.Voronoi() objects using bulk array operations.
+        Elements are numbered in the same way as :meth:`create_lattice_elements`, with ids starting at 1
+
+        :return: Vertex coordinates with shape (n, 2), edge vertex ids with shape (m, 2), signed cell ids, and the
+            offsets and signed edge ids of the cells' boundaries in compressed sparse row layout
+        :rtype: tuple
+        """
+        regions = self.remove_infinite_regions(list(self.tessellation.regions))
+        regions = [c for c in regions if len(c) != 0 and -1 not in c]
+
+        sides_per_cell = np.fromiter(map(len, regions), dtype=np.int64, count=len(regions))
+        cell_offsets = np.zeros(len(regions) + 1, dtype=np.int64)
+        np.cumsum(sides_per_cell, out=cell_offsets[1:])
+        number_of_sides = int(cell_offsets[-1])
+
+        side_start = np.fromiter(chain.from_iterable(regions), dtype=np.int64, count=number_of_sides)
+        # every side goes to the next vertex in the region, the last one closes the polygon
+        next_position = np.arange(1, number_of_sides + 1)
+        next_position[cell_offsets[1:] - 1] = cell_offsets[:-1]
+        side_end = side_start[next_position]
+
+        p0 = self.tessellation.vertices[side_start]
+        p1 = self.tessellation.vertices[side_end]
+        x0 = np.around(np.around(p0[:, 0], 3), 3)
+        x1 = np.around(np.around(p1[:, 0], 3), 3)
+        p0_rounded = np.around(p0, 3)
+        p1_rounded = np.around(p1, 3)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (p1_rounded[:, 1] - p0_rounded[:, 1]) / (p1_rounded[:, 0] - p0_rounded[:, 0])
+            y0 = np.around(p0_rounded[:, 1] + slope * (x0 - p0_rounded[:, 0]), 3)
+            y1 = np.around(p0_rounded[:, 1] + slope * (x1 - p0_rounded[:, 0]), 3)
+        # vertical sides, the slope is not defined
+        vertical = ~(np.isfinite(y0) & np.isfinite(y1))
+        y0[vertical] = p0_rounded[vertical, 1]
+        y1[vertical] = p1_rounded[vertical, 1]
+
+        # vertex occurrences in the order they are visited: start and end of every side
+        occurrences = np.empty((2 * number_of_sides, 2), dtype=np.float64)
+        occurrences[0::2, 0] = x0
+        occurrences[0::2, 1] = y0
+        occurrences[1::2, 0] = x1
+        occurrences[1::2, 1] = y1
+        # adding zero maps -0.0 to 0.0 so both are taken as the same position
+        vertex_keys = (occurrences + 0.0).view(np.int64)
+        vertex_first, vertex_number = self._number_by_first_occurrence(vertex_keys)
+        vertex_coordinates = occurrences[vertex_first]
+
+        side_vertices = vertex_number.reshape(-1, 2)
+        edge_keys = np.sort(side_vertices, axis=1)
+        edge_first, edge_number = self._number_by_first_occurrence(edge_keys)
+        edge_vertices = side_vertices[edge_first]
+        same_orientation = side_vertices[:, 0] == edge_vertices[edge_number - 1, 0]
+        cell_edges = np.where(same_orientation, edge_number, -edge_number)
+
+        # shoelace formula over the visited vertices of each cell
+        visited = vertex_coordinates[vertex_number - 1]
+        previous_position = np.arange(-1, 2 * number_of_sides - 1)
+        previous_position[2 * cell_offsets[:-1]] = 2 * cell_offsets[1:] - 1
+        previous = visited[previous_position]
+        cross = visited[:, 0] * previous[:, 1] - visited[:, 1] * previous[:, 0]
+        if number_of_sides > 0:
+            area = 0.5 * np.add.reduceat(cross, 2 * cell_offsets[:-1])
+        else:
+            area = np.zeros(0)
+        cell_ids = -np.arange(1, len(regions) + 1) * np.sign(area).astype(np.int64)
+
+        instrumentation.count("lattice.vertices_deduplicated", len(occurrences) - len(vertex_coordinates))
+        instrumentation.count("lattice.edges_deduplicated", number_of_sides - len(edge_vertices))
+        return vertex_coordinates, edge_vertices, cell_ids, cell_offsets, cell_edges
+
+    @staticmethod
+    def arrays_to_elements(vertex_coordinates: np.ndarray, edge_vertices: np.ndarray, cell_ids: np.ndarray,
+                           cell_offsets: np.ndarray, cell_edges: np.ndarray) -> tuple:
+        """
+        Convert the arrays of :meth:`create_lattice_arrays` into vertices, edges and cells dictionaries
+
+        :param vertex_coordinates: Coordinates of the vertices
+        :type vertex_coordinates: np.ndarray
+        :param edge_vertices: Vertex ids of each edge
+        :type edge_vertices: np.ndarray
+        :param cell_ids: Signed id of each cell
+        :type cell_ids: np.ndarray
+        :param cell_offsets: Start of each cell in *cell_edges*
+        :type cell_offsets: np.ndarray
+        :param cell_edges: Signed edge ids of all the cells' boundaries
+        :type cell_edges: np.ndarray
+        :return: Vertices, edges and cell's list
+        :rtype: tuple
+        """
+        vertices = dict(zip(range(1, len(vertex_coordinates) + 1),
+                            zip(vertex_coordinates[:, 0], vertex_coordinates[:, 1])))
+        edges = dict(zip(range(1, len(edge_vertices) + 1), edge_vertices.tolist()))
+        boundaries = cell_edges.tolist()
+        limits = cell_offsets.tolist()
+        cells = {cid: boundaries[limits[ii]:limits[ii + 1]] for ii, cid in enumerate(cell_ids.tolist())}
+        return vertices, edges, cells
+
     def get_middle_cells(self):
         # TODO implement function
         return None
@@ -132,31 +264,56 @@ class Lattice:
         #
         # return middle_cells, other_cells
 
-    def remove_infinite_regions(self, regions: list, max_distance: float = 50) -> list:
+    def remove_infinite_regions(self, regions: list, max_distance: float = None, region_filter: str = None) -> list:
         """
         Remove regions that have a vertex too far away to be part of the tissue. This solves vertices placed in
-        'infinity' by the tessellation
+        'infinity' by the tessellation. All the regions are checked at once, and the list is updated in place
 
         :param regions: List of the voronoi regions
         :type regions: list
-        :param max_distance: Maximum distance of a vertex in a polygon
+        :param max_distance: Maximum distance of a vertex in a polygon. Defaults to the lattice's *max_distance*
         :type max_distance: float, optional
+        :param region_filter: How to find the offending regions. "distance" removes regions with two consecutive
+            vertices further apart than *max_distance*, "bounding_box" and "convex_hull" remove regions with a vertex
+            outside the bounding box or the convex hull of the seeds. Defaults to the lattice's *region_filter*
+        :type region_filter: str, optional
         :return: List of regions without the offending ones
         :rtype: list
         """
-        to_delete = []
-        for c in regions:
-            distances = []
-            if len(c) != 0 and -1 not in c:
-                for ii in range(0, len(c) - 1):
-                    distances.append(
-                        np.linalg.norm(self.tessellation.vertices[c[ii]] - self.tessellation.vertices[c[ii + 1]]))
-                distances = np.array(distances)
-                if np.any(np.where(distances > max_distance, True, False)):
-                    to_delete.append(c)
-
-        for c in to_delete:
-            regions.remove(c)
+        max_distance = self.max_distance if max_distance is None else max_distance
+        region_filter = self.region_filter if region_filter is None else region_filter
+
+        finite = [len(c) != 0 and -1 not in c for c in regions]
+        checked = [c for c, is_finite in zip(regions, finite) if is_finite]
+        vertices_per_region = np.fromiter(map(len, checked), dtype=np.int64, count=len(checked))
+        region_vertices = np.fromiter(chain.from_iterable(checked), dtype=np.int64,
+                                      count=int(vertices_per_region.sum()))
+        region_of_vertex = np.repeat(np.arange(len(checked)), vertices_per_region)
+
+        if region_filter == "distance":
+            # sides between consecutive vertices of the same region, without the one closing the polygon
+            same_region = region_of_vertex[:-1] == region_of_vertex[1:]
+            side_start = self.tessellation.vertices[region_vertices[:-1][same_region]]
+            side_end = self.tessellation.vertices[region_vertices[1:][same_region]]
+            distances = np.sqrt(np.sum((side_start - side_end) ** 2, axis=1))
+            offending = region_of_vertex[:-1][same_region][distances > max_distance]
+        elif region_filter == "bounding_box":
+            lower = np.min(self.tessellation.points, axis=0)
+            upper = np.max(self.tessellation.points, axis=0)
+            vertices = self.tessellation.vertices[region_vertices]
+            outside = np.any((vertices < lower) | (vertices > upper), axis=1)
+            offending = region_of_vertex[outside]
+        elif region_filter == "convex_hull":
+            hull = spatial.Delaunay(self.tessellation.points)
+            outside = hull.find_simplex(self.tessellation.vertices[region_vertices]) < 0
+            offending = region_of_vertex[outside]
+        else:
+            raise NotImplementedError(f"Unknown region filter '{region_filter}'")
+
+        to_delete = np.zeros(len(checked), dtype=bool)
+        to_delete[offending] = True
+        to_delete = iter(to_delete.tolist())
+        regions[:] = [c for c, is_finite in zip(regions, finite) if not (is_finite and next(to_delete))]
         return regions
 
     def get_cell_area_sign(self, cell: list, all_vertices: dict) -> int:
@@ -172,7 +329,8 @@ class Lattice:
         """
         return int(np.sign(self.get_cell_area(cell, all_vertices)))
 
-    def create_example_lattice(self, voronoi_seeds_std: float = 0.15, voronoi_seeds_step: int = 20) -> tuple[dict, dict, dict]:
+    def create_example_lattice(self, voronoi_seeds_std: float = 0.15, voronoi_seeds_step: int = 20,
+                               rng=None) -> tuple[dict, dict, dict]:
         """
         Create a lattice with the initial Voronoi tessellation
 
@@ -180,16 +338,49 @@ class Lattice:
         :type voronoi_seeds_std: float
         :param voronoi_seeds_step: SSpatial step to deposition of seeds in the tessellation
         :type voronoi_seeds_step: float
+        :param rng: Random number generator or seed, see :func:`seapipy.random_generators.get_generator`
+        :type rng: numpy.random.Generator, optional
         :return: The vertices, edges and cells generated
         :rtype: tuple
         """
         self.generate_voronoi_tessellation(
             self.generate_square_seeds(standard_deviation=voronoi_seeds_std,
-                                       spatial_step=voronoi_seeds_step))
+                                       spatial_step=voronoi_seeds_step,
+                                       rng=rng))
         vertices, edges, cells = self.create_lattice_elements()
 
         return vertices, edges, cells
 
+    def create_tissue(self) -> Tissue:
+        """
+        Create an array backed tissue from the scipy.spatial.Voronoi() objects
+
+        :return: Tissue with the vertices, edges and cells of the lattice
+        :rtype: Tissue
+        """
+        with instrumentation.span("lattice.elements"):
+            return Tissue(*self.create_lattice_arrays())
+
+    def create_example_tissue(self, voronoi_seeds_std: float = 0.15, voronoi_seeds_step: int = 20,
+                              rng=None) -> Tissue:
+        """
+        Create an array backed tissue with the initial Voronoi tessellation
+
+        :param voronoi_seeds_std: Noise taken from a normal of mean zero and this value as standard deviation
+        :type voronoi_seeds_std: float
+        :param voronoi_seeds_step: Spatial step to deposition of seeds in the tessellation
+        :type voronoi_seeds_step: float
+        :param rng: Random number generator or seed, see :func:`seapipy.random_generators.get_generator`
+        :type rng: numpy.random.Generator, optional
+        :return: Tissue with the vertices, edges and cells generated
+        :rtype: Tissue
+        """
+        self.generate_voronoi_tessellation(
+            self.generate_square_seeds(standard_deviation=voronoi_seeds_std,
+                                       spatial_step=voronoi_seeds_step,
+                                       rng=rng))
+        return self.create_tissue()
+
     @staticmethod
     def get_coordinates(vertices: dict) -> tuple:
         """
@@ -224,7 +415,8 @@ class Lattice:
         return xm, ym
 
     @staticmethod
-    def get_normally_distributed_densities(edges: dict, center: float = 1, standard_deviation: float = 0.01) -> dict:
+    def get_normally_distributed_densities(edges: dict, center: float = 1, standard_deviation: float = 0.01,
+                                           rng=None) -> dict:
         """
         Get a dictionary of tensions that is normally distributed around the center with a certain standard deviation
 
@@ -234,23 +426,56 @@ class Lattice:
         :type center: float
         :param standard_deviation: Standard deviation for the distribution of tensions
         :type standard_deviation: float
+        :param rng: Random number generator or seed, see :func:`seapipy.random_generators.get_generator`
+        :type rng: numpy.random.Generator, optional
         :return: Dictionary with the keys as edge ids and the tensions as values
         :rtype: dict
         """
-        return {k: np.random.normal(center, standard_deviation) for k, _ in edges.items()}
+        rng = random_generators.get_generator(rng)
+        return dict(zip(edges.keys(), rng.normal(center, standard_deviation, size=len(edges)).tolist()))
 
     @staticmethod
-    def get_normally_distributed_volumes(cells: dict, means=(500,), stds=(50,), weights=None) -> dict:
+    def get_normally_distributed_volumes(cells: dict, means=(500,), stds=(50,), weights=None, rng=None) -> dict:
         assert len(means) == len(stds)
+        rng = random_generators.get_generator(rng)
         if len(means) > 1:
             assert (weights is None) or (
                         len(weights) == len(means)), f'"weights" and "values" have to be of equal length'
-            v = np.random.choice(len(means), len(cells), p=weights)
-            return {k: int(np.random.normal(means[v[i]], stds[v[i]])) for i, k in enumerate(cells.keys())}
-        return {k: int(np.random.normal(means[0], stds[0])) for k in cells.keys()}
+            v = rng.choice(len(means), len(cells), p=weights)
+            volumes = rng.normal(np.asarray(means)[v], np.asarray(stds)[v])
+        else:
+            volumes = rng.normal(means[0], stds[0], size=len(cells))
+        # truncated towards zero, as int() does
+        return dict(zip(cells.keys(), volumes.astype(np.int64).tolist()))
+
+    @staticmethod
+    def _number_by_first_occurrence(keys: np.ndarray) -> tuple:
+        """
+        Number the distinct rows of *keys* from 1 in order of first appearance
+
+        :param keys: Two dimensional array with one key per row
+        :type keys: np.ndarray
+        :return: Position of the first appearance of each distinct row and the number of every row
+        :rtype: tuple
+        """
+        if len(keys) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        # lexsort is stable, so the first row of every group of equal keys is its first appearance
+        order = np.lexsort(keys.T[::-1])
+        sorted_keys = keys[order]
+        group_start = np.ones(len(keys), dtype=bool)
+        group_start[1:] = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+        first = order[group_start]
+        group = np.cumsum(group_start) - 1
+        # number the groups by first appearance
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(1, len(first) + 1)
+        number = np.empty(len(keys), dtype=np.int64)
+        number[order] = rank[group]
+        return np.sort(first), number
 
     @staticmethod
-    def get_vertex_number(vertex: list, vertices: dict) -> int:
+    def get_vertex_number(vertex: list, vertices: dict, index: dict = None) -> int:
         """
         Get id of the vertex from the vertex position or new possible ID if the vertex is already known
 
@@ -258,9 +483,20 @@ class Lattice:
         :type vertex: list
         :param vertices: Dictionary of the vertices currently identified
         :type vertices: dict
+        :param index: Position to vertex id mapping, kept up to date alongside *vertices*. When given, the lookup is
+            done in constant time instead of scanning all the vertices
+        :type index: dict, optional
         :return: Vertex id if the vertex exists, if not the next possible id to assign
         :rtype: int
         """
+        if index is not None:
+            vertex_number = index.get(vertex)
+            if vertex_number is None:
+                vertex_number = len(index) + 1
+                index[vertex] = vertex_number
+                vertices[vertex_number] = vertex
+            return vertex_number
+
         if vertex in vertices.values():
             vertex_number = list(vertices.keys())[list(vertices.values()).index(vertex)]
         else:
@@ -272,7 +508,7 @@ class Lattice:
         return vertex_number
 
     @staticmethod
-    def get_enum(edge: list, edges: dict) -> int:
+    def get_enum(edge: list, edges: dict, index: dict = None) -> int:
         """
         Get id of the edge from the vertex position or new possible ID if the vertex is already known
 
@@ -280,9 +516,26 @@ class Lattice:
         :type edge: list
         :param edges: Dictionary of the edges currently identified
         :type edges: dict
-        :return: edge id if the edge exists, if not the next possible id to assign
+        :param index: (v0, v1) to edge id mapping, kept up to date alongside *edges*. When given, the lookup is done in
+            constant time instead of scanning all the edges
+        :type index: dict, optional
+        :return: edge id if the edge exists, if not the next possible id to assign. The id is negative if the edge
+            exists with the opposite orientation
         :rtype: int
         """
+        if index is not None:
+            key = (edge[0], edge[1])
+            enum = index.get(key)
+            if enum is None:
+                enum = index.get(key[::-1])
+                if enum is None:
+                    enum = len(index) + 1
+                    index[key] = enum
+                    edges[enum] = [edge[0], edge[1]]
+                else:
+                    enum = -enum
+            return enum
+
         if edge in edges.values():
             enum = list(edges.keys())[list(edges.values()).index(edge)]
         elif edge[::-1] in edges.values():
@@ -295,6 +548,26 @@ class Lattice:
             edges[enum] = [edge[0], edge[1]]
         return enum
 
+    @classmethod
+    def get_side_coordinates(cls, p0: np.ndarray, p1: np.ndarray) -> tuple:
+        """
+        Get the rounded coordinates of the endpoints of a polygon side going from p0 to p1
+
+        :param p0: First vertex of the side
+        :type p0: np.ndarray
+        :param p1: Second vertex of the side
+        :type p1: np.ndarray
+        :return: x and y coordinates of the side's endpoints
+        :rtype: tuple
+        """
+        x_coordinate = np.around(np.linspace(round(p0[0], 3), round(p1[0], 3), 2), 3)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y_coordinate = np.around(cls.line_eq(p0, p1, x_coordinate), 3)
+        if not np.all(np.isfinite(y_coordinate)):
+            # vertical side, the slope is not defined
+            y_coordinate = np.around([p0[1], p1[1]], 3)
+        return x_coordinate, y_coordinate
+
     @staticmethod
     def line_eq(p0: float, p1: float, x: np.ndarray) -> list:
         """
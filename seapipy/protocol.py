@@ -0,0 +1,234 @@
+from dataclasses import dataclass
+import hashlib
+from numbers import Number
+
+# Text of each command, formatted with its arguments
+COMMAND_FORMATS = {
+    "g": "g {}; ",
+    "V": "V {}; ",
+    "r": "r {}; ",
+    "scale": "scale := {}; ",
+    "t1_edgeswap": "t1_edgeswap edge where length < {}; ",
+    "save": 'ff := sprintf "{}/{}%d.dmp",ii; dump ff; ii+=1; ',
+    "dump": 'dump "{}"; ',
+    "save_many": 'while ii < {2} do {{ g {3}; V {4}; t1_edgeswap edge where length < {5}; ff := sprintf '
+                 '"{0}/{1}%d.dmp",ii; dump ff; ii:=ii+1}}',
+    "assign": "{} := {}; ",
+    "ramp_densities": "set edges density {0}[original] + ({1}[original] - {0}[original]) * {2} / {3} "
+                      "where original > 0; ",
+    "define_vertex_position": "define vertex attribute old_x real; define vertex attribute old_y real; ",
+}
+# Commands kept before each chunk of a convergence loop, and change measured after it
+CONVERGENCE_SETUP = {
+    "energy": "conv_energy := total_energy; ",
+    "displacement": "set vertex old_x x; set vertex old_y y; ",
+}
+CONVERGENCE_CHANGE = {
+    "energy": "abs(total_energy - conv_energy) / maximum(abs(conv_energy), 1e-12)",
+    "displacement": "max(vertex, sqrt((x - old_x)^2 + (y - old_y)^2))",
+}
+# Commands holding a block of commands that is run several times
+LOOP_COMMANDS = ("repeat", "for")
+# Commands whose count is a number of repetitions, so consecutive ones can be added up
+ADDITIVE_COMMANDS = ("g", "V", "r")
+# Commands that do not depend on the scale, a scale change followed only by these before the next one is never used
+SCALE_INDEPENDENT_COMMANDS = ("V", "r", "t1_edgeswap")
+# Longest block of commands looked for when hoisting repetitions
+MAX_REPEATED_BLOCK = 8
+
+
+@dataclass(frozen=True)
+class Command:
+    """
+    One operation of a Surface Evolver protocol. Commands are immutable and hashable, so protocols can be compared
+    and used as keys
+
+    :param name: Name of the operation, one of *COMMAND_FORMATS* or *LOOP_COMMANDS*
+    :type name: str
+    :param args: Arguments of the operation. For "repeat" the number of repetitions, for "for" the loop variable and
+        the number of iterations, for "converge" the arguments of :func:`format_convergence_loop`
+    :type args: tuple, optional
+    :param block: Commands repeated by a loop
+    :type block: tuple, optional
+    """
+    name: str
+    args: tuple = ()
+    block: tuple = ()
+
+    @property
+    def text(self) -> str:
+        """
+        Surface Evolver code of the command
+        """
+        if self.name == "repeat":
+            return f"{{ {''.join(command.text for command in self.block)}}} {self.args[0]}; "
+        if self.name == "for":
+            variable, times = self.args
+            return (f"for ( {variable} := 1 ; {variable} <= {times} ; {variable} += 1 ) "
+                    f"{{ {''.join(command.text for command in self.block)}}} ")
+        if self.name == "converge":
+            return format_convergence_loop(*self.args)
+        return COMMAND_FORMATS[self.name].format(*self.args)
+
+
+def format_convergence_loop(criterion: str, tolerance: float, chunk: int, max_steps: int, max_size: float) -> str:
+    """
+    Write a Surface Evolver loop that evolves in chunks of *chunk* steps until the change of the system in a chunk is
+    below *tolerance* or *max_steps* steps are done
+
+    :param criterion: "energy" for the relative change of the total energy, "displacement" for the largest vertex
+        displacement
+    :type criterion: str
+    :param tolerance: Change below which the system is converged
+    :type tolerance: float
+    :param chunk: Evolution steps between checks
+    :type chunk: int
+    :param max_steps: Maximum number of evolution steps
+    :type max_steps: int
+    :param max_size: Maximum size allowed for membranes before a T1 swap after each chunk, None for no T1 swaps
+    :type max_size: float
+    :return: Surface Evolver code
+    :rtype: str
+    """
+    if criterion not in CONVERGENCE_CHANGE:
+        raise NotImplementedError(f"Unknown convergence criterion '{criterion}'")
+    t1_swaps = "" if max_size is None else COMMAND_FORMATS["t1_edgeswap"].format(max_size)
+    return (f"conv_steps := 0; do {{ {CONVERGENCE_SETUP[criterion]}g {chunk}; {t1_swaps}conv_steps += {chunk}; "
+            f"conv_change := {CONVERGENCE_CHANGE[criterion]} }} while conv_change > {tolerance} "
+            f"and conv_steps < {max_steps}; ")
+
+
+def emit(commands) -> str:
+    """
+    Write commands as Surface Evolver code, one per line
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :return: Surface Evolver code
+    :rtype: str
+    """
+    return "".join(f"{command.text}\n" for command in commands)
+
+
+def get_protocol_key(commands) -> str:
+    """
+    Get a hash of a protocol that only depends on the code it emits
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :return: Hexadecimal hash of the protocol
+    :rtype: str
+    """
+    return hashlib.sha256(emit(commands).encode()).hexdigest()
+
+
+def merge_steps(commands: list) -> list:
+    """
+    Add up consecutive evolution, averaging and refinement commands, so g 10; g 5 becomes g 15. Counts given by
+    Evolver expressions are kept as they are
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :return: Merged commands
+    :rtype: list
+    """
+    merged = []
+    for command in commands:
+        if (merged and command.name in ADDITIVE_COMMANDS and merged[-1].name == command.name
+                and isinstance(command.args[0], Number) and isinstance(merged[-1].args[0], Number)):
+            merged[-1] = Command(command.name, (merged[-1].args[0] + command.args[0],))
+        else:
+            merged.append(command)
+    return merged
+
+
+def drop_dead_scales(commands: list) -> list:
+    """
+    Remove the scale changes that are replaced by another one before anything uses the scale
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :return: Commands without the unused scale changes
+    :rtype: list
+    """
+    alive = []
+    next_scale_is_dead = False
+    # walking backwards, a scale change is dead if the next command depending on the scale is another scale change
+    for command in reversed(commands):
+        if command.name == "scale":
+            if next_scale_is_dead:
+                continue
+            next_scale_is_dead = True
+        elif command.name not in SCALE_INDEPENDENT_COMMANDS:
+            next_scale_is_dead = False
+        alive.append(command)
+    return alive[::-1]
+
+
+def count_repetitions(commands: list, start: int, length: int) -> int:
+    """
+    Count how many times the block of *length* commands at *start* is repeated back to back
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :param start: Position of the block
+    :type start: int
+    :param length: Number of commands in the block
+    :type length: int
+    :return: Number of consecutive copies of the block, including itself
+    :rtype: int
+    """
+    block = commands[start:start + length]
+    times = 1
+    while commands[start + times * length:start + (times + 1) * length] == block:
+        times += 1
+    return times
+
+
+def hoist_repeats(commands: list) -> list:
+    """
+    Replace blocks of commands repeated back to back by a single block with a repetition count, so
+    g 10; t1_edgeswap ...; g 10; t1_edgeswap ... becomes { g 10; t1_edgeswap ...; } 2
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :return: Commands with the repetitions hoisted
+    :rtype: list
+    """
+    hoisted = []
+    ii = 0
+    while ii < len(commands):
+        best_length, best_times = 1, 1
+        for length in range(1, min(MAX_REPEATED_BLOCK, len(commands) - ii) + 1):
+            if any(command.name in LOOP_COMMANDS or command.name == "save_many"
+                   for command in commands[ii:ii + length]):
+                break
+            times = count_repetitions(commands, ii, length)
+            if (times - 1) * length > (best_times - 1) * best_length:
+                best_length, best_times = length, times
+        if best_times > 1:
+            hoisted.append(Command("repeat", (best_times,), tuple(commands[ii:ii + best_length])))
+        else:
+            hoisted.append(commands[ii])
+        ii += best_length * best_times
+    return hoisted
+
+
+def optimize(commands) -> list:
+    """
+    Shorten a protocol without changing what it does: merge consecutive steps, drop dead scale changes and hoist
+    repeated blocks
+
+    :param commands: Commands of the protocol
+    :type commands: list
+    :return: Optimized commands
+    :rtype: list
+    """
+    commands = [Command(command.name, command.args, tuple(optimize(command.block)))
+                if command.name in LOOP_COMMANDS else command for command in commands]
+    while True:
+        optimized = merge_steps(drop_dead_scales(commands))
+        if optimized == commands:
+            break
+        commands = optimized
+    return hoist_repeats(commands)
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+def get_generator(seed=None):
+    """
+    Get the random number generator used to draw the random parameters of a tissue
+
+    :param seed: Seed, numpy.random.SeedSequence or numpy.random.Generator. If None, the functions of numpy.random
+        are used, so the results can still be fixed with numpy.random.seed()
+    :type seed: int, optional
+    :return: Random number generator, or the numpy.random module
+    :rtype: numpy.random.Generator
+    """
+    if seed is None or seed is np.random:
+        return np.random
+    return np.random.default_rng(seed)
+
+
+def spawn_seeds(seed, number: int) -> list:
+    """
+    Get independent seed sequences, one for each job of an ensemble. The same seed always gives the same sequences
+
+    :param seed: Root seed of the ensemble, or its numpy.random.SeedSequence
+    :type seed: int
+    :param number: Number of seed sequences
+    :type number: int
+    :return: Independent numpy.random.SeedSequence objects
+    :rtype: list
+    """
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return sequence.spawn(number)
+
+
+def spawn_generators(seed, number: int) -> list:
+    """
+    Get independent random number generators, one for each job of an ensemble
+
+    :param seed: Root seed of the ensemble, or its numpy.random.SeedSequence
+    :type seed: int
+    :param number: Number of generators
+    :type number: int
+    :return: Independent random number generators
+    :rtype: list
+    """
+    return [np.random.default_rng(sequence) for sequence in spawn_seeds(seed, number)]
+
+
+def get_stage_generators(seed, stages: tuple) -> dict:
+    """
+    Get one random number generator per stage of a tissue, so the numbers drawn by a stage do not depend on which
+    stages were computed before it. The same seed always gives the same generators
+
+    :param seed: Seed, numpy.random.SeedSequence or numpy.random.Generator. If None, every stage uses the functions
+        of numpy.random
+    :type seed: int, optional
+    :param stages: Names of the stages
+    :type stages: tuple
+    :return: Stage name to its random number generator
+    :rtype: dict
+    """
+    if seed is None or seed is np.random:
+        return dict.fromkeys(stages, np.random)
+    if isinstance(seed, np.random.Generator):
+        seed = np.random.SeedSequence(seed.integers(2 ** 63, size=2).tolist())
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    # the children are built from the spawn key instead of spawned, so a sequence shared by many tissues gives each
+    # of them the same generators
+    return {stage: np.random.default_rng(np.random.SeedSequence(sequence.entropy,
+                                                                spawn_key=sequence.spawn_key + (ii,),
+                                                                pool_size=sequence.pool_size))
+            for ii, stage in enumerate(stages)}
@@ -1,5 +1,48 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
 import io
+import os
+import shutil
+from itertools import islice
+import numpy as np
+import seapipy.instrumentation as instrumentation
+import seapipy.protocol as protocol
+from seapipy.tissue import CellView, EdgeView, ElementView, Tissue, VertexView
+
+# Number of lines formatted before each write to the slate
+WRITE_CHUNK_SIZE = 65536
+# Surface Evolver array holding the tensions for change_line_tensions(mode="table")
+DENSITY_TABLE = "density_table"
+TABLE_ASSIGNMENTS_PER_LINE = 16
+# Surface Evolver array holding the tensions at the start of add_tension_schedule
+DENSITY_START_TABLE = "density_start"
+# Evolution steps between checks of convergence_loop when they are not given
+CONVERGENCE_CHUNK = 100
+# Stands for the output folders in relocatable scripts
+OUTPUT_DIRECTORY_PLACEHOLDER = "<output_directory>"
+
+
+def relocate_script(script: str, output_directories: list, numbered: bool = False) -> str:
+    """
+    Replace the output folders of the files saved by a Surface Evolver script by *OUTPUT_DIRECTORY_PLACEHOLDER*
+
+    :param script: Contents of the Surface Evolver file
+    :type script: str
+    :param output_directories: Folders to replace
+    :type output_directories: list
+    :param numbered: Add the position of each folder in *output_directories* to its placeholder, so the folders of a
+        script that saves files in many of them are told apart
+    :type numbered: bool, optional
+    :return: Script that does not depend on the output folders
+    :rtype: str
+    """
+    numbers = {output_directory: ii for ii, output_directory in enumerate(output_directories)}
+    for output_directory in sorted(output_directories, key=len, reverse=True):
+        placeholder = OUTPUT_DIRECTORY_PLACEHOLDER
+        if numbered:
+            placeholder += str(numbers[output_directory])
+        script = script.replace(f'"{output_directory}/', f'"{placeholder}/')
+    return script
 
 
 @dataclass
@@ -19,6 +62,9 @@ class SurfaceEvolver:
     :type volume_values: dict
     :param polygonal: Whether to use polygons or allowed curved edges
     :type polygonal: bool, optional
+    :param optimize: Whether to optimize the protocol commands before writing them to the slate. Off by default, so
+        the slate has one line per call as before
+    :type optimize: bool, optional
     """
     vertices: dict
     edges: dict
@@ -28,119 +74,323 @@ class SurfaceEvolver:
     volume_values: dict
 
     polygonal: bool = True
+    optimize: bool = False
 
     def __post_init__(self):
+        # commands recorded by the protocol methods, the ones after _written_commands are not in the slate yet
+        self.commands = []
+        self._written_commands = 0
+        self._open_loops = 0
         self.fe_file = io.StringIO()
-        self.density_values = {key: round(value, 3) for key, value in self.density_values.items()}
+        self.streaming = False
+        self._close_on_save = False
+        self._density_table_defined = False
+        self._density_start_defined = False
+        self._vertex_position_defined = False
+        self.output_directories = []
+        # value of the ii variable used to number the dumps
+        self.dump_counter = 0
+        self.tension_updates = {}
+        if isinstance(self.density_values, ElementView):
+            self.density_values = self.density_values.rounded(3)
+        else:
+            self.density_values = {key: round(value, 3) for key, value in self.density_values.items()}
+
+    @property
+    def fe_file(self):
+        """
+        Surface Evolver slate. The recorded protocol commands are written to it before it is returned, so it holds the
+        whole protocol and anything written to it comes after the earlier commands. It can not be used inside a loop,
+        where only protocol commands can be added
+        """
+        return self.write_commands()
+
+    @fe_file.setter
+    def fe_file(self, slate) -> None:
+        self._slate = slate
 
-    def generate_fe_file(self) -> io.StringIO:
+    @classmethod
+    def from_tissue(cls, tissue: Tissue, polygonal: bool = True) -> "SurfaceEvolver":
+        """
+        Create the Surface Evolver object from an array backed tissue, without copying its elements into dictionaries
+
+        :param tissue: Tissue with densities and volumes assigned
+        :type tissue: Tissue
+        :param polygonal: Whether to use polygons or allowed curved edges
+        :type polygonal: bool, optional
+        :return: Surface Evolver object for the tissue
+        :rtype: SurfaceEvolver
+        """
+        if tissue.edge_densities is None or tissue.cell_volumes is None:
+            raise ValueError("The tissue needs edge densities and cell volumes")
+        return cls(tissue.vertices, tissue.edges, tissue.cells, tissue.densities, tissue.volumes,
+                   polygonal=polygonal)
+
+    def generate_fe_file(self, sink=None) -> io.StringIO:
         """
         Generate the initial Surface Evolver slate to write into
 
+        :param sink: Path or writable file-like object to stream the slate into. If None, the slate is kept in memory
+            until :meth:`save_fe_file` is called
+        :type sink: str or file-like, optional
         :return: Initialized Surface Evolver slate
         :rtype: io.StringIO()
         """
+        if sink is not None:
+            self.stream_to(sink)
+
+        with instrumentation.span("surface_evolver.generate"):
+            self.write_elements()
+        instrumentation.count("surface_evolver.element_lines",
+                              len(self.vertices) + len(self.edges) + 2 * len(self.cells))
+
+        if not self.polygonal:
+            self.add_refining_triangulation(3)
+        return self.fe_file
+
+    def write_elements(self) -> None:
+        """
+        Write the vertices, edges, faces and bodies of the slate, followed by the start of the read section
+
+        :return: None
+        """
         self.fe_file.write("SPACE_DIMENSION 2 \n")
         self.fe_file.write("SCALE 0.005 FIXED\n")
         self.fe_file.write("STRING \n")
         self.fe_file.write("\n")
         self.fe_file.write("vertices \n")
-
-        for k, v in self.vertices.items():
-            self.fe_file.write(f"{k}   {round(v[0], 3)} {round(v[1], 3)}\n")
+        self.write_vertices()
         self.fe_file.write("\n")
         self.fe_file.write("edges \n")
-        for k, v in self.edges.items():
-            # lambda_val = round(new_edges_tensions[[k in ee for ee in bedge].index(True)], 3)
-            lambda_val = self.density_values[k]
-            self.fe_file.write(f"{abs(k)}   {v[0]}   {v[1]}   density {lambda_val}\n")
-
+        self.write_edges()
         self.fe_file.write("\n")
         self.fe_file.write("faces \n")
-        for k, v in self.cells.items():
-            # color = np.random.choice(list(color_list))
-            str_value = " ".join(str(vv) for vv in v)
-            self.fe_file.write(f"{abs(k)}   {str_value} \n")
-
+        self.write_faces()
         self.fe_file.write("\n")
         self.fe_file.write("bodies \n")
-        for k, v in self.cells.items():
-            self.fe_file.write(f"{abs(k)}   {k}    VOLUME {self.volume_values[k]} \n")
+        self.write_bodies()
 
         self.fe_file.write("\n \n")
         self.fe_file.write("read \n \n")
+        self.write_settings()
+        self.fe_file.write("ii := 0; \n")
+
+    def generate_from_dump(self, dump_path: str, sink=None, dump_counter: int = 0) -> io.StringIO:
+        """
+        Generate the initial Surface Evolver slate from a dump file, so the simulation continues from the saved state
+        instead of the initial lattice. The dump has to exist when this function is called, as it is copied into the
+        slate
+
+        :param dump_path: Path to the dump file
+        :type dump_path: str
+        :param sink: Path or writable file-like object to stream the slate into
+        :type sink: str or file-like, optional
+        :param dump_counter: Number used by the next :meth:`save_one_step`
+        :type dump_counter: int, optional
+        :return: Initialized Surface Evolver slate
+        :rtype: io.StringIO()
+        """
+        if sink is not None:
+            self.stream_to(sink)
+
+        with open(dump_path) as dump_file:
+            shutil.copyfileobj(dump_file, self.fe_file)
+        self.fe_file.write("\n")
+        self.write_settings()
+        self.fe_file.write(f"ii := {dump_counter}; \n")
+        self.dump_counter = dump_counter
+        return self.fe_file
+
+    def write_settings(self) -> None:
+        """
+        Write the Surface Evolver toggles used by the simulations
+
+        :return: None
+        """
         self.fe_file.write("show_all_edges off \n")
         # f.write("clipped on \n")
         self.fe_file.write("metric_conversion off \n")
         self.fe_file.write("autorecalc on \n")
         self.fe_file.write("gv_binary off \n")
         self.fe_file.write("gravity off \n")
-        self.fe_file.write("ii := 0; \n")
 
-        if not self.polygonal:
-            self.add_refining_triangulation(3)
-        return self.fe_file
+    def stream_to(self, sink) -> None:
+        """
+        Write the Surface Evolver slate straight into a file instead of keeping it in memory. Anything already in the
+        slate is written first
+
+        :param sink: Path or writable file-like object
+        :type sink: str or file-like
+        :return: None
+        """
+        current = "" if self.streaming else self.fe_file.getvalue()
+        if isinstance(sink, (str, os.PathLike)):
+            self.fe_file = open(sink, mode="w")
+            self._close_on_save = True
+        else:
+            self.fe_file = sink
+            self._close_on_save = False
+        self.streaming = True
+        self.fe_file.write(current)
+
+    def _write_chunked(self, lines) -> None:
+        """
+        Write formatted lines to the slate, joining them in chunks of *WRITE_CHUNK_SIZE* lines
+
+        :param lines: Iterable of formatted lines
+        :return: None
+        """
+        lines = iter(lines)
+        while True:
+            chunk = "".join(islice(lines, WRITE_CHUNK_SIZE))
+            if not chunk:
+                break
+            self.fe_file.write(chunk)
+
+    def write_vertices(self) -> None:
+        """
+        Write the vertices section of the slate
+
+        :return: None
+        """
+        if isinstance(self.vertices, VertexView):
+            coordinates = self.vertices.values_array
+            for start in range(0, len(coordinates), WRITE_CHUNK_SIZE):
+                block = np.round(coordinates[start:start + WRITE_CHUNK_SIZE], 3).tolist()
+                self.fe_file.write("".join(f"{k}   {x} {y}\n"
+                                           for k, (x, y) in enumerate(block, start=start + 1)))
+        else:
+            self._write_chunked(f"{k}   {round(v[0], 3)} {round(v[1], 3)}\n" for k, v in self.vertices.items())
+
+    def write_edges(self) -> None:
+        """
+        Write the edges section of the slate
 
-    def add_vertex_averaging(self, how_many: int = 1) -> io.StringIO:
+        :return: None
+        """
+        if (isinstance(self.edges, EdgeView) and isinstance(self.density_values, ElementView)
+                and self.density_values.ids is None):
+            edge_vertices = self.edges.values_array
+            densities = self.density_values.values_array
+            for start in range(0, len(edge_vertices), WRITE_CHUNK_SIZE):
+                stop = start + WRITE_CHUNK_SIZE
+                self.fe_file.write("".join(f"{k}   {v0}   {v1}   density {lambda_val}\n"
+                                           for k, (v0, v1), lambda_val in zip(range(start + 1, stop + 1),
+                                                                              edge_vertices[start:stop].tolist(),
+                                                                              densities[start:stop].tolist())))
+        else:
+            self._write_chunked(f"{abs(k)}   {v[0]}   {v[1]}   density {self.density_values[k]}\n"
+                                for k, v in self.edges.items())
+
+    def write_faces(self) -> None:
+        """
+        Write the faces section of the slate
+
+        :return: None
+        """
+        if isinstance(self.cells, CellView):
+            offsets = self.cells.offsets
+            for start in range(0, len(self.cells.ids), WRITE_CHUNK_SIZE):
+                stop = min(start + WRITE_CHUNK_SIZE, len(self.cells.ids))
+                limits = (offsets[start:stop + 1] - offsets[start]).tolist()
+                boundaries = [str(e) for e in self.cells.values_array[offsets[start]:offsets[stop]].tolist()]
+                self.fe_file.write("".join(f"{abs(k)}   {' '.join(boundaries[limits[ii]:limits[ii + 1]])} \n"
+                                           for ii, k in enumerate(self.cells.ids[start:stop].tolist())))
+        else:
+            self._write_chunked(f"{abs(k)}   {' '.join(str(vv) for vv in v)} \n" for k, v in self.cells.items())
+
+    def write_bodies(self) -> None:
+        """
+        Write the bodies section of the slate
+
+        :return: None
+        """
+        if isinstance(self.cells, CellView) and isinstance(self.volume_values, ElementView):
+            for start in range(0, len(self.cells.ids), WRITE_CHUNK_SIZE):
+                stop = start + WRITE_CHUNK_SIZE
+                self.fe_file.write("".join(f"{abs(k)}   {k}    VOLUME {volume} \n"
+                                           for k, volume in zip(self.cells.ids[start:stop].tolist(),
+                                                                self.volume_values.values_array[start:stop].tolist())))
+        else:
+            self._write_chunked(f"{abs(k)}   {k}    VOLUME {self.volume_values[k]} \n" for k in self.cells.keys())
+
+    def add_vertex_averaging(self, how_many: int = 1) -> None:
         """
         Add vertex averaging using the V Surface Evolver function, at the end of the Surface Evolver slate
 
         :param how_many: Number of times the averaging should be done
-        :return: Current Surface Evolver slate
-        :rtype: io.StringIO()
+        :return: None
         """
-        self.fe_file.write(f"V {how_many}; \n")
-        return self.fe_file
+        self.add_command("V", how_many)
 
-    def add_refining_triangulation(self, how_many: int = 1) -> io.StringIO:
+    def add_refining_triangulation(self, how_many: int = 1) -> None:
         """
         Add a mesh refinement using the r Surface Evolver function, at the end of the Surface Evolver slate
 
         :param how_many: Number of times the refinement should be done
         :type how_many: int
-        :return: Current Surface Evolver slate
-        :rtype: io.StringIO()
+        :return: None
         """
-        self.fe_file.write(f"r {how_many}; \n")
-        return self.fe_file
+        self.add_command("r", how_many)
 
-    def change_scale(self, new_scale: float) -> io.StringIO:
+    def change_scale(self, new_scale: float) -> None:
         """
         Change the scale of the Surface Evolver simulation at the end of the Surface Evolver slate
 
         :param new_scale: Numerical value of the new scale
         :type new_scale: float
-        :return: Current Surface Evolver slate
-        :rtype: io.StringIO()
+        :return: None
         """
-        self.fe_file.write(f"scale := {new_scale}; \n")
-        return self.fe_file
+        self.add_command("scale", new_scale)
 
-    def evolve_system(self, steps: int = 1) -> io.StringIO:
+    def evolve_system(self, steps: int = 1) -> None:
         """
         Add evolution function using the Surface Evolver go function
 
         :param steps: Number of steps to evolve for
         :type steps: int
-        :return: Current Surface Evolver slate
-        :rtype: io.StringIO()
+        :return: None
         """
-        self.fe_file.write(f"g {steps}; \n")
-        return self.fe_file
+        self.add_command("g", steps)
 
-    def add_t1_swaps(self, max_size: float = 0.1) -> io.StringIO:
+    def add_t1_swaps(self, max_size: float = 0.1) -> None:
         """
         Add check for T1 swaps using the Surface Evolver t1_edgeswap function
 
         :param max_size: Maximum size of interfaces before making a T1 swap
         :type max_size: float
-        :return: Current Surface Evolver slate
-        :rtype: io.StringIO()
+        :return: None
         """
-        self.fe_file.write(f"t1_edgeswap edge where length < {max_size}; \n")
-        return self.fe_file
+        self.add_command("t1_edgeswap", max_size)
 
-    def initial_relaxing(self, evolve_step: int = 2500, averaging: int = 100) -> io.StringIO:
+    def evolve_until_converged(self, tolerance: float = 1e-6, max_steps: int = 10000,
+                               chunk: int = CONVERGENCE_CHUNK, criterion: str = "energy",
+                               max_size: float = None) -> None:
+        """
+        Evolve the system in chunks of *chunk* steps until the change in a chunk drops below *tolerance*, or at most
+        *max_steps* steps
+
+        :param tolerance: Change below which the system is converged
+        :type tolerance: float
+        :param max_steps: Maximum number of evolution steps
+        :type max_steps: int
+        :param chunk: Evolution steps between checks
+        :type chunk: int
+        :param criterion: "energy" for the relative change of the total energy in a chunk, "displacement" for the
+            largest vertex displacement in a chunk
+        :type criterion: str, optional
+        :param max_size: Maximum size allowed for membranes before a T1 happens after each chunk, None for no T1 swaps
+        :type max_size: float, optional
+        :return: None
+        """
+        if criterion not in protocol.CONVERGENCE_CHANGE:
+            raise NotImplementedError(f"Unknown convergence criterion '{criterion}'")
+        if criterion == "displacement" and not self._vertex_position_defined:
+            self.add_command("define_vertex_position")
+            self._vertex_position_defined = True
+        self.add_command("converge", criterion, tolerance, min(chunk, max_steps), max_steps, max_size)
+
+    def initial_relaxing(self, evolve_step: int = 2500, averaging: int = 100, tolerance: float = None) -> None:
         """
         Initial standard relaxing with vertex averaging and scale change followed by evolution
 
@@ -148,20 +398,23 @@ class SurfaceEvolver:
         :type evolve_step: int
         :param averaging: Number of vertex averagings to perform
         :type evolve_step: int
-        :return: Current Surface Evolver slate
-        :rtype: io.StringIO
+        :param tolerance: If given, the evolution at each scale stops when the relative energy change is below it, with
+            *evolve_step* as the maximum number of steps
+        :type tolerance: float, optional
+        :return: None
         """
-        self.add_vertex_averaging(averaging)
-        self.change_scale(0.25)
-        self.evolve_system(evolve_step)
-        self.add_vertex_averaging(averaging)
-        self.change_scale(0.1)
-        self.evolve_system(evolve_step)
+        for scale in (0.25, 0.1):
+            self.add_vertex_averaging(averaging)
+            self.change_scale(scale)
+            if tolerance is None:
+                self.evolve_system(evolve_step)
+            else:
+                self.evolve_until_converged(tolerance, evolve_step)
         self.add_vertex_averaging(averaging)
         self.change_scale(0.01)
-        return self.fe_file
 
-    def evolve_relaxing(self, number_of_times: int = 1, steps: int = 1, max_size: float = 0.1) -> io.StringIO:
+    def evolve_relaxing(self, number_of_times: int = 1, steps: int = 1, max_size: float = 0.1,
+                        tolerance: float = None) -> None:
         """
         Evolve the system a fixed number of steps and perform T1 swaps after a definite number of times
 
@@ -171,15 +424,96 @@ class SurfaceEvolver:
         :type steps: int
         :param max_size: Maximum size allowed for membranes before a T1 happens
         :type max_size: float
+        :param tolerance: If given, the iterations stop when the relative energy change of one of them is below it
+        :type tolerance: float, optional
+        :return: None
+        """
+        if tolerance is not None:
+            self.evolve_until_converged(tolerance, number_of_times * steps, steps, max_size=max_size)
+            return
+        with self.repeat(number_of_times):
+            self.evolve_system(steps)
+            self.add_t1_swaps(max_size)
+
+    @contextmanager
+    def repeat(self, number_of_times: int, variable: str = None):
+        """
+        Run the commands added inside the with block *number_of_times* times with a Surface Evolver loop, so the size
+        of the script does not depend on the number of iterations. With *variable*, a for loop counts the iterations
+        from 1 in that Surface Evolver variable, which the commands can use in their arguments, e.g.
+        ``se_object.change_scale("0.1 / kk")``
+
+        :param number_of_times: Number of iterations
+        :type number_of_times: int
+        :param variable: Name of the Surface Evolver variable holding the iteration number
+        :type variable: str, optional
+        """
+        start = len(self.commands)
+        dump_counter = self.dump_counter
+        self._open_loops += 1
+        try:
+            yield
+        finally:
+            self._open_loops -= 1
+        block = tuple(self.commands[start:])
+        del self.commands[start:]
+        self.dump_counter += (number_of_times - 1) * (self.dump_counter - dump_counter)
+
+        if variable is not None and number_of_times > 0:
+            self.commands.append(protocol.Command("for", (variable, number_of_times), block))
+        elif number_of_times > 1:
+            self.commands.append(protocol.Command("repeat", (number_of_times,), block))
+        elif number_of_times == 1:
+            self.commands.extend(block)
+
+    def set_variable(self, name: str, value) -> None:
+        """
+        Assign a value to a Surface Evolver variable, which later commands can use in their arguments
+
+        :param name: Name of the variable
+        :type name: str
+        :param value: Number or Surface Evolver expression
+        :return: None
+        """
+        self.add_command("assign", name, value)
+
+    def add_tension_schedule(self, new_tensions: dict, number_of_changes: int, steps: int = 1,
+                             max_size: float = 0.1, variable: str = "tt") -> io.StringIO:
+        """
+        Change the membranes' densities gradually, from the current ones to *new_tensions* in *number_of_changes*
+        equal changes, evolving *steps* steps and performing T1 swaps after each change. The schedule is a Surface
+        Evolver for loop, so the script only grows with the number of edges and not with *number_of_changes*
+
+        :param new_tensions: Edge id to final tension
+        :type new_tensions: dict
+        :param number_of_changes: Number of changes until the final tensions are reached
+        :type number_of_changes: int
+        :param steps: Evolution steps after each change
+        :type steps: int
+        :param max_size: Maximum size allowed for membranes before a T1 happens
+        :type max_size: float
+        :param variable: Name of the Surface Evolver variable counting the changes
+        :type variable: str, optional
         :return: Current Surface Evolver slate
         :rtype: io.StringIO
         """
-        for _ in range(0, number_of_times):
+        self.write_commands()
+        self.define_density_table()
+        if not self._density_start_defined:
+            self.fe_file.write(f"define {DENSITY_START_TABLE} real[{self.get_density_table_size()}]; \n")
+            self._density_start_defined = True
+        self.fe_file.write(f"foreach edge ee where original > 0 do {{ {DENSITY_START_TABLE}[ee.original] := "
+                           f"ee.density; {DENSITY_TABLE}[ee.original] := ee.density }}; \n")
+        self.write_density_table(new_tensions)
+        self.tension_updates.update((abs(eid), tension) for eid, tension in new_tensions.items())
+
+        with self.repeat(number_of_changes, variable):
+            self.add_command("ramp_densities", DENSITY_START_TABLE, DENSITY_TABLE, variable, number_of_changes)
             self.evolve_system(steps)
             self.add_t1_swaps(max_size)
         return self.fe_file
 
-    def save_one_step(self, output_directory: str, file_name: str) -> io.StringIO:
+    def save_one_step(self, output_directory: str, file_name: str) -> None:
         """
         Add a savepoint to the Surface Evolver slate using the sprintf function
 
@@ -187,40 +521,222 @@ class SurfaceEvolver:
         :type output_directory: str
         :param file_name: Name of the file to be saved
         :type file_name: str
+        :return: None
+        """
+        self.add_output_directory(output_directory)
+        self.dump_counter += 1
+        self.add_command("save", output_directory, file_name)
+
+    def dump(self, file_path: str) -> None:
+        """
+        Add a dump of the current state to a fixed file, which can be used later with :meth:`generate_from_dump`
+
+        :param file_path: Path of the dump file
+        :type file_path: str
+        :return: None
+        """
+        self.add_output_directory(os.path.dirname(file_path))
+        self.add_command("dump", file_path)
+
+    def save_many_steps(self, output_directory, file_name, max_steps, time_step=1, averaging=1, max_size=0.1):
+        self.add_output_directory(output_directory)
+        self.dump_counter = max(self.dump_counter, max_steps)
+        self.add_command("save_many", output_directory, file_name, max_steps, time_step, averaging, max_size)
+
+    def add_command(self, name: str, *args) -> None:
+        """
+        Record a protocol command. Commands are written to the slate, optimized if *optimize* is set, when something
+        else has to be written after them or when the slate is saved
+
+        :param name: Name of the command, one of :data:`seapipy.protocol.COMMAND_FORMATS`
+        :type name: str
+        :param args: Arguments of the command
+        :return: None
+        """
+        self.commands.append(protocol.Command(name, args))
+
+    def get_pending_commands(self) -> list:
+        """
+        Get the recorded commands that are not in the slate yet, as they will be written
+
+        :return: Commands to write
+        :rtype: list
+        """
+        commands = self.commands[self._written_commands:]
+        if self.optimize:
+            commands = protocol.optimize(commands)
+        return commands
+
+    def write_commands(self) -> io.StringIO:
+        """
+        Write the recorded commands that are not in the slate yet
+
         :return: Current Surface Evolver slate
         :rtype: io.StringIO
         """
-        self.fe_file.write(f'ff := sprintf "{output_directory}/{file_name}%d.dmp",ii; dump ff; ii+=1; \n')
-        return self.fe_file
+        if self._open_loops > 0:
+            raise ValueError("Only protocol commands can be added inside a loop")
+        if self._written_commands < len(self.commands):
+            commands = self.get_pending_commands()
+            self._slate.write(protocol.emit(commands))
+            instrumentation.count("surface_evolver.commands", len(commands))
+            self._written_commands = len(self.commands)
+        return self._slate
+
+    def get_commands_key(self) -> str:
+        """
+        Get a hash of the protocol commands recorded so far, as they are written to the slate. Only the command stream
+        is hashed: the geometry, tension changes and anything else written directly to the slate are not, so use
+        :meth:`get_script` to tell whole Surface Evolver files apart
 
-    def save_many_steps(self, output_directory, file_name, max_steps, time_step=1, averaging=1, max_size=0.1):
-        self.fe_file.write(f'while ii < {max_steps} do {{ g {time_step}; V {averaging}; '
-                           f't1_edgeswap edge where length < {max_size}; ff := sprintf '
-                           f'"{output_directory}/{file_name}%d.dmp",ii; dump ff; ii:=ii+1}}\n')
-        return self.fe_file
+        :return: Hexadecimal hash of the protocol commands
+        :rtype: str
+        """
+        commands = protocol.optimize(self.commands) if self.optimize else self.commands
+        return protocol.get_protocol_key(commands)
+
+    def add_output_directory(self, output_directory: str) -> None:
+        """
+        Keep track of a folder where the Surface Evolver simulation saves files
+
+        :param output_directory: Folder to save files into
+        :type output_directory: str
+        :return: None
+        """
+        if output_directory not in self.output_directories:
+            self.output_directories.append(output_directory)
 
-    def save_fe_file(self, file_name: str) -> bool:
+    def get_script(self, relocatable: bool = False) -> str:
+        """
+        Get the Surface Evolver file exactly as :meth:`save_fe_file` would save it, without modifying the slate
+
+        :param relocatable: Replace the output folders by *OUTPUT_DIRECTORY_PLACEHOLDER*, so the script does not depend
+            on where the results are saved
+        :type relocatable: bool, optional
+        :return: Contents of the Surface Evolver file
+        :rtype: str
+        """
+        if self.streaming:
+            raise ValueError("The script is not kept in memory when it is streamed")
+        script = self._slate.getvalue() + protocol.emit(self.get_pending_commands()) + 'q; \n\n'
+        if relocatable:
+            script = relocate_script(script, self.output_directories)
+        return script
+
+    def save_fe_file(self, file_name: str = None) -> bool:
         """
-        Save the Surface Evolver slate to disk
+        Save the Surface Evolver slate to disk. If the slate is streamed, it is finished and closed instead and
+        *file_name* is not used
 
-        :param file_name:
+        :param file_name: Path of the file to save
+        :type file_name: str, optional
         :return: Success state of the saving
         :rtype: bool
         """
-        self.fe_file.write('q; \n')
-        with open(f'{file_name}', mode='w') as f:
-            print(self.fe_file.getvalue(), file=f)
+        with instrumentation.span("surface_evolver.save"):
+            self.write_commands()
+            self.fe_file.write('q; \n')
+            if self.streaming:
+                self.fe_file.write('\n')
+                if self._close_on_save:
+                    instrumentation.count("surface_evolver.bytes_written", self.fe_file.tell())
+                    self.fe_file.close()
+                else:
+                    self.fe_file.flush()
+                return True
+
+            with open(f'{file_name}', mode='w') as f:
+                self.fe_file.seek(0)
+                shutil.copyfileobj(self.fe_file, f)
+                f.write('\n')
+                instrumentation.count("surface_evolver.bytes_written", f.tell())
         return True
 
-    def change_line_tensions(self, new_tensions: dict) -> io.StringIO:
+    def change_line_tensions(self, new_tensions: dict, mode: str = "where") -> io.StringIO:
         """
         Set new densities for the system's  membranes. Setting is done using the dictionary key as membrane id and the
         value as the new tension
 
-        :param new_tensions:
+        :param new_tensions: Edge id to new tension
+        :type new_tensions: dict
+        :param mode: "where" writes one set command per edge. "table" stores the new tensions in a Surface Evolver
+            array and sets all the edges in a single pass. "diff" does the same, but only with the tensions that
+            differ from the ones currently loaded
+        :type mode: str, optional
+        :return: Current Surface Evolver slate
+        :rtype: io.StringIO
+        """
+        with instrumentation.span("surface_evolver.change_line_tensions"):
+            self.write_commands()
+            if mode == "where":
+                for eid, tension in new_tensions.items():
+                    self.fe_file.write(f"set edges density {tension} where original == {abs(eid)}; \n")
+                if self._density_table_defined:
+                    # keep the array in step, a later "table" or "diff" change sets every edge from it
+                    self.write_density_table(new_tensions)
+            elif mode in ("table", "diff"):
+                if mode == "diff":
+                    new_tensions = {eid: tension for eid, tension in new_tensions.items()
+                                    if tension != self.get_loaded_density(eid)}
+                    if len(new_tensions) == 0:
+                        return self.fe_file
+                self.define_density_table()
+                self.write_density_table(new_tensions)
+                self.fe_file.write(f"set edges density {DENSITY_TABLE}[original] where original > 0; \n")
+            else:
+                raise NotImplementedError(f"Unknown tension change mode '{mode}'")
+
+        instrumentation.count("surface_evolver.tension_changes", len(new_tensions))
+        self.tension_updates.update((abs(eid), tension) for eid, tension in new_tensions.items())
+        return self.fe_file
+
+    def define_density_table(self) -> io.StringIO:
+        """
+        Define the Surface Evolver array used to change tensions in a single pass, filled with the current densities.
+        It is only written the first time it is needed
+
+        :return: Current Surface Evolver slate
+        :rtype: io.StringIO
+        """
+        if not self._density_table_defined:
+            self.fe_file.write(f"define {DENSITY_TABLE} real[{self.get_density_table_size()}]; \n")
+            self.fe_file.write(f"foreach edge ee where original > 0 do {DENSITY_TABLE}[ee.original] := ee.density; \n")
+            self._density_table_defined = True
+        return self.fe_file
+
+    def get_density_table_size(self) -> int:
+        """
+        Get the size of the Surface Evolver arrays indexed by the original edge id
+
+        :return: Largest edge id
+        :rtype: int
+        """
+        return max((abs(k) for k in self.edges.keys()), default=0)
+
+    def write_density_table(self, new_tensions: dict) -> io.StringIO:
+        """
+        Write the assignments of new tensions to the Surface Evolver density array
+
+        :param new_tensions: Edge id to new tension
+        :type new_tensions: dict
         :return: Current Surface Evolver slate
         :rtype: io.StringIO
         """
-        for eid, tension in new_tensions.items():
-            self.fe_file.write(f"set edges density {tension} where original == {abs(eid)}; \n")
+        assignments = [f"{DENSITY_TABLE}[{abs(eid)}] := {tension}; " for eid, tension in new_tensions.items()]
+        self._write_chunked("".join(assignments[ii:ii + TABLE_ASSIGNMENTS_PER_LINE]) + "\n"
+                            for ii in range(0, len(assignments), TABLE_ASSIGNMENTS_PER_LINE))
         return self.fe_file
+
+    def get_loaded_density(self, edge_id: int) -> float:
+        """
+        Get the density of an edge at the current end of the Surface Evolver slate
+
+        :param edge_id: Id of the edge
+        :type edge_id: int
+        :return: Density of the edge
+        :rtype: float
+        """
+        edge_id = abs(edge_id)
+        if edge_id in self.tension_updates:
+            return self.tension_updates[edge_id]
+        return self.density_values[edge_id]
@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import numpy as np
+import seapipy.instrumentation as instrumentation
+import seapipy.command as command
+from seapipy.ensemble import expand_grid, get_seed_record, get_seed_sequence
+from seapipy.example_tissues import NormalFurrow
+from seapipy.surface_evolver import OUTPUT_DIRECTORY_PLACEHOLDER
+
+MANIFEST_NAME = "sweep.json"
+# Folder given to the tissues while their scripts are generated, replaced by the folder of each script
+PENDING_DIRECTORY = "pending"
+
+
+def to_json(value):
+    """
+    Convert the numpy values of the parameters to Python ones, so they can be stored in JSON. Used as the default of
+    json.dump, so values of any other type are not stored
+
+    :param value: Value that json can not store
+    :return: Python value
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Parameters of type {type(value).__name__} can not be stored in the manifest")
+
+
+def get_python_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def random_design(parameters: dict, distributions: dict, number: int, seed: int = None) -> list:
+    """
+    Get the parameters of random points of the parameter space
+
+    :param parameters: Parameters shared by all the points
+    :type parameters: dict
+    :param distributions: Parameter name to a list of values to choose from, a (low, high) tuple to draw uniformly
+        from, or a function that takes a numpy.random.Generator and returns a value
+    :type distributions: dict
+    :param number: Number of points
+    :type number: int
+    :param seed: Seed of the design
+    :type seed: int, optional
+    :return: Parameters of each point
+    :rtype: list
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, distribution in distributions.items():
+        if callable(distribution):
+            columns[name] = [get_python_value(distribution(rng)) for _ in range(number)]
+        elif isinstance(distribution, tuple):
+            columns[name] = rng.uniform(distribution[0], distribution[1], size=number).tolist()
+        else:
+            columns[name] = [get_python_value(distribution[ii])
+                             for ii in rng.integers(len(distribution), size=number).tolist()]
+    return [{**parameters, **{name: values[ii] for name, values in columns.items()}} for ii in range(number)]
+
+
+def get_point_key(parameters: dict) -> str:
+    """
+    Get the key of a point of the sweep, which only depends on its parameters as they are stored in the manifest
+
+    :param parameters: Parameters of the point
+    :type parameters: dict
+    :return: Hexadecimal key
+    :rtype: str
+    """
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True, default=to_json).encode()).hexdigest()[:16]
+
+
+def generate_script(tissue_class, parameters: dict, seed_record: dict) -> str:
+    """
+    Create the tissue of a point and get its Surface Evolver file, with the output folders replaced by
+    *OUTPUT_DIRECTORY_PLACEHOLDER*. Run in the processes of the pool
+
+    :param tissue_class: Class of the tissue
+    :type tissue_class: type
+    :param parameters: Parameters of the tissue, without the seed
+    :type parameters: dict
+    :param seed_record: Entropy and spawn key of the seed sequence of the tissue
+    :type seed_record: dict
+    :return: Contents of the Surface Evolver file
+    :rtype: str
+    """
+    tissue = tissue_class({**parameters, "save_dir": PENDING_DIRECTORY, "seed": get_seed_sequence(seed_record)},
+                          lazy=True)
+    return tissue.se_object.get_script(relocatable=True)
+
+
+@dataclass
+class Sweep:
+    """
+    Sweep over the parameters of a tissue. The state of every point is kept in a manifest in *directory*, so a sweep
+    that is interrupted or extended with new points only generates and runs what is missing. Points whose Surface
+    Evolver files are identical share a single file and a single run. All the points of a replicate use the same
+    random numbers, which only depend on the seed of the sweep, so adding points does not change the existing ones
+    and points that differ in parameters the tissue does not use collapse into one
+
+    :param directory: Folder of the manifest, the Surface Evolver files and the results
+    :type directory: str
+    :param tissue_class: Class of the tissues
+    :type tissue_class: type
+    :param seed: Root seed of the sweep. If None, the one in the manifest or a random one is used
+    :type seed: int, optional
+    """
+    directory: str
+    tissue_class: type = NormalFurrow
+    seed: int = None
+
+    def __post_init__(self):
+        self.manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["tissue"] != self.tissue_class.__name__:
+                raise ValueError(f"The sweep in {self.directory} is of {self.manifest['tissue']} tissues")
+            if self.seed is not None and self.seed != self.manifest["seed"]:
+                raise ValueError(f"The sweep in {self.directory} has seed {self.manifest['seed']}")
+            self.seed = self.manifest["seed"]
+        else:
+            if self.seed is None:
+                self.seed = int(np.random.SeedSequence().entropy)
+            self.manifest = {"tissue": self.tissue_class.__name__, "seed": self.seed, "points": {}, "scripts": {}}
+
+    @property
+    def points(self) -> dict:
+        return self.manifest["points"]
+
+    @property
+    def scripts(self) -> dict:
+        return self.manifest["scripts"]
+
+    def save(self) -> None:
+        """
+        Write the manifest, replacing the previous one only once it is complete
+
+        :return: None
+        """
+        with self._lock:
+            self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = self.manifest_path + ".tmp"
+        try:
+            with open(temporary_path, mode="w") as f:
+                json.dump(self.manifest, f, indent=2, default=to_json)
+            os.replace(temporary_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def add_points(self, points: list, replicates: int = 1) -> list:
+        """
+        Add points to the sweep. Points already in the sweep are kept as they are
+
+        :param points: Parameters of each point
+        :type points: list
+        :param replicates: Number of tissues created with each set of parameters, told apart by a "replicate" parameter
+        :type replicates: int
+        :return: Keys of the points
+        :rtype: list
+        """
+        keys = []
+        for point in points:
+            for replicate in range(replicates):
+                parameters = point if replicates == 1 else {**point, "replicate": replicate}
+                key = get_point_key(parameters)
+                if key not in self.points:
+                    seed_sequence = np.random.SeedSequence([self.seed, replicate])
+                    self.points[key] = {"parameters": parameters, "seed": get_seed_record(seed_sequence),
+                                        "script": None}
+                keys.append(key)
+        self.save()
+        return keys
+
+    def add_grid(self, parameters: dict, grid: dict, replicates: int = 1) -> list:
+        """
+        Add every combination of the values in the grid to the sweep
+
+        :param parameters: Parameters shared by all the points
+        :type parameters: dict
+        :param grid: Parameter name to the list of values it takes
+        :type grid: dict
+        :param replicates: Number of tissues created with each set of parameters
+        :type replicates: int
+        :return: Keys of the points
+        :rtype: list
+        """
+        return self.add_points(expand_grid(parameters, grid), replicates)
+
+    def generate(self, max_workers: int = None) -> int:
+        """
+        Create the Surface Evolver files of the points that do not have one yet, across a pool of processes. The
+        manifest is updated as each file is written, so the files already written are kept if the generation is
+        interrupted. If the tissue of a point can not be created, the other points are still generated and the first
+        error is raised at the end
+
+        :param max_workers: Maximum number of processes, bounded by the number of cores
+        :type max_workers: int, optional
+        :return: Number of new Surface Evolver files
+        :rtype: int
+        """
+        new_points = [key for key, point in self.points.items() if point["script"] is None]
+        if len(new_points) == 0:
+            return 0
+        cpu_count = os.cpu_count() or 1
+        max_workers = cpu_count if max_workers is None else max(1, min(max_workers, cpu_count))
+        new_scripts = 0
+        error = None
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {instrumentation.submit(executor, generate_script, self.tissue_class,
+                                              self.points[key]["parameters"], self.points[key]["seed"]): key
+                       for key in new_points}
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                script = instrumentation.get_result(future)
+                script_key = hashlib.sha256(script.encode()).hexdigest()[:16]
+                if script_key not in self.scripts:
+                    new_scripts += 1
+                    self.add_script(script_key, script)
+                self.points[futures[future]]["script"] = script_key
+                self.save()
+        if error is not None:
+            raise error
+        return new_scripts
+
+    def add_script(self, script_key: str, script: str) -> None:
+        """
+        Write a Surface Evolver file of the sweep, saving its results into its own folder
+
+        :param script_key: Key of the script
+        :type script_key: str
+        :param script: Contents of the Surface Evolver file, with placeholders for the output folders
+        :type script: str
+        :return: None
+        """
+        output_directory = os.path.join(self.directory, "results", script_key)
+        os.makedirs(output_directory, exist_ok=True)
+        fe_filepath = os.path.join(self.directory, "scripts", f"{script_key}.fe")
+        os.makedirs(os.path.dirname(fe_filepath), exist_ok=True)
+        with open(fe_filepath, mode="w") as f:
+            f.write(script.replace(f'"{OUTPUT_DIRECTORY_PLACEHOLDER}/', f'"{output_directory}/'))
+        self.scripts[script_key] = {"fe_file": fe_filepath, "output_directory": output_directory,
+                                    "status": "pending"}
+
+    def run(self, evolver_filepath: str = "evolver", max_workers: int = None, retry_failed: bool = True,
+            **kwargs) -> list:
+        """
+        Run the Surface Evolver files that have not run yet, or that failed. The manifest is updated after every run
+
+        :param evolver_filepath: Path to the Surface Evolver interpreter
+        :type evolver_filepath: str
+        :param max_workers: Maximum number of simultaneous processes, bounded by the number of cores
+        :type max_workers: int, optional
+        :param retry_failed: Whether to run again the files that failed before
+        :type retry_failed: bool
+        :param kwargs: Arguments passed to :func:`seapipy.command.run_evolver_batch`, such as timeout or memory_limit
+        :return: Outcome of every run
+        :rtype: list
+        """
+        statuses = ("pending", "failed") if retry_failed else ("pending",)
+        script_keys = [key for key, script in self.scripts.items() if script["status"] in statuses]
+        by_path = {self.scripts[key]["fe_file"]: key for key in script_keys}
+
+        def record(result):
+            with self._lock:
+                self.scripts[by_path[result.se_input_filepath]].update(
+                    status="done" if result.success else "failed", return_code=result.return_code,
+                    wall_time=result.wall_time, cpu_time=result.cpu_time, max_rss=result.max_rss,
+                    dump_files=result.dump_files)
+                self._write_manifest()
+
+        return command.run_evolver_batch(list(by_path), evolver_filepath, max_workers, on_result=record, **kwargs)
+
+    def get_status(self) -> dict:
+        """
+        Get the state of every point: "new" before its Surface Evolver file is generated, then the state of its file,
+        "pending", "done" or "failed"
+
+        :return: Point key to its state
+        :rtype: dict
+        """
+        return {key: "new" if point["script"] is None else self.scripts[point["script"]]["status"]
+                for key, point in self.points.items()}
@@ -0,0 +1,208 @@
+import numpy as np
+from seapipy.tissue import ElementView
+
+
+def get_element_arrays(elements) -> tuple:
+    """
+    Get the ids and the values of a dictionary of elements as arrays. Views of a :class:`seapipy.tissue.Tissue` are
+    not copied
+
+    :param elements: Element id to value, such as the vertices or edges dictionaries
+    :type elements: dict
+    :return: Ids and values of the elements, in the same order
+    :rtype: tuple
+    """
+    if isinstance(elements, ElementView):
+        values = elements.values_array
+        ids = np.arange(1, len(values) + 1) if elements.ids is None else elements.ids
+        return ids, values
+    ids = np.fromiter(elements.keys(), dtype=np.int64, count=len(elements))
+    return ids, np.array(list(elements.values()))
+
+
+def get_positions(ids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """
+    Get the position of each key in the array of ids
+
+    :param ids: Ids of the elements
+    :type ids: np.ndarray
+    :param keys: Ids to look up
+    :type keys: np.ndarray
+    :return: Position of each key, with the shape of *keys*
+    :rtype: np.ndarray
+    """
+    if np.array_equal(ids, np.arange(1, len(ids) + 1)):
+        positions = keys - 1
+        if len(keys) and (positions.min() < 0 or positions.max() >= len(ids)):
+            raise KeyError("Unknown element ids")
+        return positions
+    order = np.argsort(ids, kind="stable")
+    positions = order[np.clip(np.searchsorted(ids, keys, sorter=order), 0, len(ids) - 1)]
+    if not np.array_equal(ids[positions], keys):
+        raise KeyError("Unknown element ids")
+    return positions
+
+
+def get_edge_centroids(vertices: dict, edges: dict) -> tuple:
+    """
+    Get the centers of all the edges in a single pass
+
+    :param vertices: Vertex id to (x, y) coordinates
+    :type vertices: dict
+    :param edges: Edge id to [v0, v1] vertex ids
+    :type edges: dict
+    :return: Edge ids and the (x, y) coordinates of their centroids, one row per edge
+    :rtype: tuple
+    """
+    vertex_ids, coordinates = get_element_arrays(vertices)
+    edge_ids, edge_vertices = get_element_arrays(edges)
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    edge_vertices = np.asarray(edge_vertices, dtype=np.int64).reshape(-1, 2)
+    return edge_ids, coordinates[get_positions(vertex_ids, edge_vertices)].mean(axis=1)
+
+
+def get_tissue_bounds(vertices: dict) -> tuple:
+    """
+    Get the center and the bounding box of the tissue
+
+    :param vertices: Vertex id to (x, y) coordinates
+    :type vertices: dict
+    :return: Mean, minimum and maximum of the vertex coordinates
+    :rtype: tuple
+    """
+    coordinates = np.asarray(get_element_arrays(vertices)[1], dtype=np.float64).reshape(-1, 2)
+    return coordinates.mean(axis=0), coordinates.min(axis=0), coordinates.max(axis=0)
+
+
+def get_axis(axis) -> int:
+    """
+    Get the column of the coordinates for an axis
+
+    :param axis: Axis name, "x" or "y", or its column, 0 or 1
+    :type axis: str or int
+    :return: Column of the axis in the coordinate arrays
+    :rtype: int
+    """
+    if axis in ("x", 0):
+        return 0
+    if axis in ("y", 1):
+        return 1
+    raise NotImplementedError(f"Unknown axis '{axis}'")
+
+
+def gaussian(distances: np.ndarray, standard_deviation: float) -> np.ndarray:
+    """
+    Normal profile scaled to 1 at zero distance
+
+    :param distances: Distances to the peak of the profile
+    :type distances: np.ndarray
+    :param standard_deviation: Width of the profile
+    :type standard_deviation: float
+    :return: Value of the profile at each distance
+    :rtype: np.ndarray
+    """
+    return np.exp(-0.5 * np.square(np.asarray(distances, dtype=np.float64) / standard_deviation))
+
+
+def gaussian_stripe(centroids: np.ndarray, center, standard_deviation: float, axis="x") -> np.ndarray:
+    """
+    Normal profile along one axis, giving a straight furrow
+
+    :param centroids: Coordinates of the edge centroids, one row per edge
+    :type centroids: np.ndarray
+    :param center: (x, y) coordinates of a point in the middle of the stripe
+    :type center: tuple
+    :param standard_deviation: Width of the stripe
+    :type standard_deviation: float
+    :param axis: Axis across the stripe, x or y
+    :type axis: str
+    :return: Value of the profile at each centroid, 1 in the middle of the stripe
+    :rtype: np.ndarray
+    """
+    axis = get_axis(axis)
+    return gaussian(centroids[:, axis] - center[axis], standard_deviation)
+
+
+def gaussian_ring(centroids: np.ndarray, center, standard_deviation: float, radius: float = 0) -> np.ndarray:
+    """
+    Normal profile of the distance to a circle, giving a circular furrow. With a radius of 0 it is a spot
+
+    :param centroids: Coordinates of the edge centroids, one row per edge
+    :type centroids: np.ndarray
+    :param center: (x, y) coordinates of the center of the circle
+    :type center: tuple
+    :param standard_deviation: Width of the ring
+    :type standard_deviation: float
+    :param radius: Radius of the circle
+    :type radius: float
+    :return: Value of the profile at each centroid, 1 on the circle
+    :rtype: np.ndarray
+    """
+    distances = np.linalg.norm(centroids - np.asarray(center, dtype=np.float64), axis=1)
+    return gaussian(distances - radius, standard_deviation)
+
+
+def radial_gradient(centroids: np.ndarray, center, radius: float = None) -> np.ndarray:
+    """
+    Profile decreasing linearly from the center
+
+    :param centroids: Coordinates of the edge centroids, one row per edge
+    :type centroids: np.ndarray
+    :param center: (x, y) coordinates of the center
+    :type center: tuple
+    :param radius: Distance at which the profile reaches 0, defaults to the farthest centroid
+    :type radius: float, optional
+    :return: Value of the profile at each centroid, 1 at the center
+    :rtype: np.ndarray
+    """
+    distances = np.linalg.norm(centroids - np.asarray(center, dtype=np.float64), axis=1)
+    if radius is None:
+        radius = distances.max(initial=0)
+    if radius == 0:
+        return np.ones(len(distances))
+    return np.clip(1 - distances / radius, 0, 1)
+
+
+def from_function(function, centroids: np.ndarray) -> np.ndarray:
+    """
+    Profile given by a function of the coordinates
+
+    :param function: Function called once with the x and y arrays of the centroids, returning an array of values or a
+        single value
+    :type function: callable
+    :param centroids: Coordinates of the edge centroids, one row per edge
+    :type centroids: np.ndarray
+    :return: Value of the profile at each centroid
+    :rtype: np.ndarray
+    """
+    values = np.asarray(function(centroids[:, 0], centroids[:, 1]), dtype=np.float64)
+    return np.broadcast_to(values, (len(centroids),)).copy()
+
+
+def get_aligned_values(values: dict, ids: np.ndarray) -> np.ndarray:
+    """
+    Get the values of the elements in the order of *ids*
+
+    :param values: Element id to value, such as the densities dictionary
+    :type values: dict
+    :param ids: Ids of the elements
+    :type ids: np.ndarray
+    :return: Value of each element
+    :rtype: np.ndarray
+    """
+    value_ids, value_array = get_element_arrays(values)
+    return np.asarray(value_array, dtype=np.float64)[get_positions(value_ids, ids)]
+
+
+def to_dict(ids: np.ndarray, values: np.ndarray) -> dict:
+    """
+    Get the dictionary of values used by :class:`seapipy.surface_evolver.SurfaceEvolver`
+
+    :param ids: Ids of the elements
+    :type ids: np.ndarray
+    :param values: Value of each element
+    :type values: np.ndarray
+    :return: Element id to value
+    :rtype: dict
+    """
+    return dict(zip(ids.tolist(), values.tolist()))
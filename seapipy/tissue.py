@@ -0,0 +1,259 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from numbers import Integral
+import numpy as np
+
+
+class ElementView(Mapping):
+    """
+    Read-only dictionary view over per-element arrays of a :class:`Tissue`. Nothing is copied, values are taken from
+    the arrays when they are requested.
+
+    :param values: Array with one row per element
+    :type values: np.ndarray
+    :param ids: Signed ids of the elements. If None, the elements are numbered from 1
+    :type ids: np.ndarray, optional
+    """
+    def __init__(self, values: np.ndarray, ids: np.ndarray = None):
+        self.values_array = values
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.values_array)
+
+    def __iter__(self):
+        if self.ids is None:
+            return iter(range(1, len(self.values_array) + 1))
+        return iter(self.ids.tolist())
+
+    def __getitem__(self, key):
+        return self.get_value(self.get_position(key))
+
+    def get_position(self, key) -> int:
+        """
+        Get the row of the element with the requested id
+
+        :param key: Id of the element
+        :type key: int
+        :return: Position of the element in the arrays
+        :rtype: int
+        """
+        if not isinstance(key, Integral):
+            raise KeyError(key)
+        position = abs(int(key)) - 1
+        if not 0 <= position < len(self.values_array):
+            raise KeyError(key)
+        if (self.ids is None and key < 0) or (self.ids is not None and self.ids[position] != key):
+            raise KeyError(key)
+        return position
+
+    def get_value(self, position: int):
+        """
+        Get the value stored at a position of the arrays
+
+        :param position: Position of the element in the arrays
+        :type position: int
+        :return: Value of the element
+        """
+        return self.values_array[position].item()
+
+    def rounded(self, decimals: int) -> "ElementView":
+        """
+        Get a view of the same elements with the values rounded
+
+        :param decimals: Number of decimals to keep
+        :type decimals: int
+        :return: View over the rounded values
+        :rtype: ElementView
+        """
+        return type(self)(np.round(self.values_array, decimals), self.ids)
+
+
+class VertexView(ElementView):
+    """
+    Dictionary view of the vertices, with the vertex id as key and the (x, y) coordinates as value
+    """
+    def get_value(self, position: int) -> tuple:
+        return self.values_array[position, 0], self.values_array[position, 1]
+
+
+class EdgeView(ElementView):
+    """
+    Dictionary view of the edges, with the edge id as key and the [v0, v1] vertex ids as value
+    """
+    def get_value(self, position: int) -> list:
+        return self.values_array[position].tolist()
+
+
+class CellView(ElementView):
+    """
+    Dictionary view of the cells, with the signed cell id as key and the list of signed edge ids as value
+
+    :param offsets: Start of each cell in *values*
+    :type offsets: np.ndarray
+    :param values: Signed edge ids of all the cells' boundaries
+    :type values: np.ndarray
+    :param ids: Signed ids of the cells
+    :type ids: np.ndarray
+    """
+    def __init__(self, offsets: np.ndarray, values: np.ndarray, ids: np.ndarray):
+        super().__init__(values, ids)
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_position(self, key) -> int:
+        if not isinstance(key, Integral):
+            raise KeyError(key)
+        position = abs(int(key)) - 1
+        if not 0 <= position < len(self.ids) or self.ids[position] != key:
+            raise KeyError(key)
+        return position
+
+    def get_value(self, position: int) -> list:
+        return self.values_array[self.offsets[position]:self.offsets[position + 1]].tolist()
+
+
+@dataclass
+class Tissue:
+    """
+    Array backed tissue. Vertices, edges and cells are numbered from 1 in the order of the arrays, cells ids carry
+    the orientation of the polygon as a sign.
+
+    :param vertex_coordinates: (x, y) coordinates of the vertices
+    :type vertex_coordinates: np.ndarray
+    :param edge_vertices: Vertex ids at both ends of the edges
+    :type edge_vertices: np.ndarray
+    :param cell_ids: Signed id of each cell
+    :type cell_ids: np.ndarray
+    :param cell_offsets: Start of each cell's boundary in *cell_edges*, with a final entry for the end of the last one
+    :type cell_offsets: np.ndarray
+    :param cell_edges: Signed edge ids of all the cells' boundaries
+    :type cell_edges: np.ndarray
+    :param edge_densities: Line tension of each edge
+    :type edge_densities: np.ndarray, optional
+    :param cell_volumes: Target area of each cell
+    :type cell_volumes: np.ndarray, optional
+    """
+    vertex_coordinates: np.ndarray
+    edge_vertices: np.ndarray
+    cell_ids: np.ndarray
+    cell_offsets: np.ndarray
+    cell_edges: np.ndarray
+
+    edge_densities: np.ndarray = None
+    cell_volumes: np.ndarray = None
+
+    def __post_init__(self):
+        self.vertex_coordinates = np.asarray(self.vertex_coordinates, dtype=np.float64).reshape(-1, 2)
+        self.edge_vertices = np.asarray(self.edge_vertices, dtype=np.int32).reshape(-1, 2)
+        self.cell_ids = np.asarray(self.cell_ids, dtype=np.int32)
+        self.cell_offsets = np.asarray(self.cell_offsets, dtype=np.int64)
+        self.cell_edges = np.asarray(self.cell_edges, dtype=np.int32)
+
+        if not np.array_equal(np.abs(self.cell_ids), np.arange(1, len(self.cell_ids) + 1)):
+            raise ValueError("Cell ids have to be numbered from 1 in the order of the arrays")
+        if len(self.cell_offsets) != len(self.cell_ids) + 1 or self.cell_offsets[-1] != len(self.cell_edges):
+            raise ValueError("Cell offsets do not match the cells' boundaries")
+        if self.edge_densities is not None:
+            self.edge_densities = np.asarray(self.edge_densities, dtype=np.float64)
+            if len(self.edge_densities) != len(self.edge_vertices):
+                raise ValueError("There has to be one density per edge")
+        if self.cell_volumes is not None:
+            self.cell_volumes = np.asarray(self.cell_volumes)
+            if len(self.cell_volumes) != len(self.cell_ids):
+                raise ValueError("There has to be one volume per cell")
+
+    @classmethod
+    def from_dicts(cls, vertices: dict, edges: dict, cells: dict, density_values: dict = None,
+                   volume_values: dict = None) -> "Tissue":
+        """
+        Create a tissue from the vertices, edges and cells dictionaries used by
+        :meth:`seapipy.lattice_class.Lattice.create_lattice_elements`
+
+        :param vertices: Vertex id to (x, y) coordinates
+        :type vertices: dict
+        :param edges: Edge id to [v0, v1] vertex ids
+        :type edges: dict
+        :param cells: Signed cell id to list of signed edge ids
+        :type cells: dict
+        :param density_values: Edge id to line tension
+        :type density_values: dict, optional
+        :param volume_values: Signed cell id to target area
+        :type volume_values: dict, optional
+        :return: Array backed tissue with the same elements
+        :rtype: Tissue
+        """
+        if list(vertices.keys()) != list(range(1, len(vertices) + 1)):
+            raise ValueError("Vertex ids have to be numbered from 1 in order")
+        if list(edges.keys()) != list(range(1, len(edges) + 1)):
+            raise ValueError("Edge ids have to be numbered from 1 in order")
+
+        cell_offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, cells.values()), dtype=np.int64, count=len(cells)), out=cell_offsets[1:])
+        cell_edges = np.fromiter((e for boundary in cells.values() for e in boundary), dtype=np.int32,
+                                 count=int(cell_offsets[-1]))
+
+        edge_densities = None
+        if density_values is not None:
+            edge_densities = np.array([density_values[k] for k in edges.keys()], dtype=np.float64)
+        cell_volumes = None
+        if volume_values is not None:
+            cell_volumes = np.array([volume_values[k] for k in cells.keys()])
+
+        return cls(np.array(list(vertices.values()), dtype=np.float64),
+                   np.array(list(edges.values()), dtype=np.int32),
+                   np.fromiter(cells.keys(), dtype=np.int32, count=len(cells)),
+                   cell_offsets,
+                   cell_edges,
+                   edge_densities,
+                   cell_volumes)
+
+    @property
+    def vertices(self) -> VertexView:
+        """
+        Dictionary view of the vertices
+        """
+        return VertexView(self.vertex_coordinates)
+
+    @property
+    def edges(self) -> EdgeView:
+        """
+        Dictionary view of the edges
+        """
+        return EdgeView(self.edge_vertices)
+
+    @property
+    def cells(self) -> CellView:
+        """
+        Dictionary view of the cells
+        """
+        return CellView(self.cell_offsets, self.cell_edges, self.cell_ids)
+
+    @property
+    def densities(self) -> ElementView:
+        """
+        Dictionary view of the edges' line tensions, keyed by edge id
+        """
+        if self.edge_densities is None:
+            return None
+        return ElementView(self.edge_densities)
+
+    @property
+    def volumes(self) -> ElementView:
+        """
+        Dictionary view of the cells' target areas, keyed by signed cell id
+        """
+        if self.cell_volumes is None:
+            return None
+        return ElementView(self.cell_volumes, self.cell_ids)
+
+    def cell_sizes(self) -> np.ndarray:
+        """
+        Get the number of edges in each cell's boundary
+
+        :return: Number of edges per cell
+        :rtype: np.ndarray
+        """
+        return np.diff(self.cell_offsets)
@@ -0,0 +1,132 @@
+import dataclasses
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+import numpy as np
+from seapipy.dump import Dump, read_dump
+
+CACHE_DIRECTORY_NAME = ".seapipy_cache"
+
+
+@dataclass
+class Trajectory:
+    """
+    Series of dump files written by :meth:`seapipy.surface_evolver.SurfaceEvolver.save_many_steps` or repeated calls
+    to :meth:`seapipy.surface_evolver.SurfaceEvolver.save_one_step`. Frames are only read when they are accessed, and
+    each frame is parsed once into a binary cache that later sessions memory-map instead of parsing the text again.
+
+    :param output_directory: Folder where the dump files were saved
+    :type output_directory: str
+    :param file_name: Name of the dump files, without the step number
+    :type file_name: str
+    :param cache_directory: Folder for the binary cache. Defaults to a hidden folder inside *output_directory*
+    :type cache_directory: str, optional
+    :param use_cache: Whether to read and write the binary cache
+    :type use_cache: bool, optional
+    """
+    output_directory: str
+    file_name: str
+    cache_directory: str = None
+    use_cache: bool = True
+
+    def __post_init__(self):
+        if self.cache_directory is None:
+            self.cache_directory = os.path.join(self.output_directory, CACHE_DIRECTORY_NAME)
+        self.files = []
+        self.steps = []
+        self.refresh()
+
+    def refresh(self) -> list:
+        """
+        Look again for the dump files of the series, for series that are still being written
+
+        :return: Paths of the dump files, ordered by step
+        :rtype: list
+        """
+        pattern = re.compile(rf"^{re.escape(self.file_name)}(\d+)\.dmp$")
+        found = []
+        for name in os.listdir(self.output_directory):
+            match = pattern.match(name)
+            if match is not None:
+                found.append((int(match.group(1)), os.path.join(self.output_directory, name)))
+        found.sort()
+        self.steps = [step for step, _ in found]
+        self.files = [path for _, path in found]
+        return self.files
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self):
+        for path in self.files:
+            yield self.load_frame(path)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.load_frame(path) for path in self.files[index]]
+        return self.load_frame(self.files[index])
+
+    def get_cache_path(self, file_path: str) -> str:
+        """
+        Get the cache folder for a dump file, which depends on the size and modification time of the file
+
+        :param file_path: Path to the dump file
+        :type file_path: str
+        :return: Path of the cache folder
+        :rtype: str
+        """
+        status = os.stat(file_path)
+        return os.path.join(self.cache_directory,
+                            f"{os.path.basename(file_path)}-{status.st_size}-{status.st_mtime_ns}")
+
+    def load_frame(self, file_path: str) -> Dump:
+        """
+        Get the arrays of a dump file, from the binary cache if it is up to date
+
+        :param file_path: Path to the dump file
+        :type file_path: str
+        :return: Arrays with the state of the system
+        :rtype: Dump
+        """
+        if not self.use_cache:
+            return read_dump(file_path)
+
+        cache_path = self.get_cache_path(file_path)
+        if os.path.isdir(cache_path):
+            return Dump(**{f.name: np.load(os.path.join(cache_path, f"{f.name}.npy"), mmap_mode="r")
+                           for f in dataclasses.fields(Dump)})
+
+        frame = read_dump(file_path)
+        self.save_cache(file_path, cache_path, frame)
+        return frame
+
+    def save_cache(self, file_path: str, cache_path: str, frame: Dump) -> None:
+        """
+        Write the arrays of a dump file to the binary cache, replacing older versions of the same file
+
+        :param file_path: Path to the dump file
+        :type file_path: str
+        :param cache_path: Cache folder for the current version of the file
+        :type cache_path: str
+        :param frame: Arrays of the dump file
+        :type frame: Dump
+        :return: None
+        """
+        os.makedirs(self.cache_directory, exist_ok=True)
+        prefix = f"{os.path.basename(file_path)}-"
+        for name in os.listdir(self.cache_directory):
+            stale = os.path.join(self.cache_directory, name)
+            if name.startswith(prefix) and name.count("-") == prefix.count("-") + 1 and stale != cache_path:
+                shutil.rmtree(stale, ignore_errors=True)
+
+        # write to a temporary folder first, so readers never see a half written cache
+        temporary_path = tempfile.mkdtemp(dir=self.cache_directory)
+        for f in dataclasses.fields(Dump):
+            np.save(os.path.join(temporary_path, f"{f.name}.npy"), getattr(frame, f.name))
+        try:
+            os.rename(temporary_path, cache_path)
+        except OSError:
+            # another process cached the same file first
+            shutil.rmtree(temporary_path, ignore_errors=True)
@@ -0,0 +1,258 @@
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from seapipy.command import EvolverResult, find_dump_files, get_dump_patterns, record_result
+
+# Printed by a worker after the commands of each job
+DONE_MARKER = "__seapipy_done__"
+# Surface loaded when a worker starts, before it receives any job
+BOOTSTRAP_DATAFILE = "STRING \nSPACE_DIMENSION 2 \n\nvertices \n1   0 0\n2   1 0\n\nedges \n1   1   2\n"
+# Seconds a worker has to quit before it is killed
+CLOSE_TIMEOUT = 5
+
+
+def split_script(script: str) -> tuple:
+    """
+    Split a Surface Evolver file into the datafile, loaded by the workers with replace_load, and the commands of its
+    read section, sent to the workers over their standard input. Quit commands are left out, so the worker stays alive
+
+    :param script: Contents of the Surface Evolver file
+    :type script: str
+    :return: Datafile and list of command lines
+    :rtype: tuple
+    """
+    lines = script.splitlines(keepends=True)
+    for ii, line in enumerate(lines):
+        if line.strip() == "read":
+            commands = [command for command in lines[ii + 1:] if command.strip() not in ("q;", "q", "quit;", "quit")]
+            return "".join(lines[:ii]), commands
+    return script, []
+
+
+class EvolverWorker:
+    """
+    Long lived Surface Evolver process that runs jobs received over its standard input
+
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :param bootstrap_filepath: Datafile loaded when the process starts
+    :type bootstrap_filepath: str
+    """
+    def __init__(self, evolver_filepath: str, bootstrap_filepath: str):
+        self.evolver_filepath = evolver_filepath
+        self.bootstrap_filepath = bootstrap_filepath
+        self.process = None
+        self.lines = None
+        self.reader = None
+        self.jobs_done = 0
+        self.restarts = -1
+        self.start()
+
+    def start(self) -> None:
+        """
+        Start a new Surface Evolver process, killing the current one if it is still running
+
+        :return: None
+        """
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+                self.process.wait()
+            self._close_pipes()
+        self.process = subprocess.Popen([self.evolver_filepath, self.bootstrap_filepath], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self.lines = queue.Queue()
+        self.restarts += 1
+        self.reader = threading.Thread(target=self._read_output, args=(self.process, self.lines), daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def _read_output(process: subprocess.Popen, lines: queue.Queue) -> None:
+        # the reader owns the output pipe, so it is closed once the process exits
+        with process.stdout:
+            for line in process.stdout:
+                lines.put(line)
+        # the process exited
+        lines.put(None)
+
+    def run(self, datafile_path: str, commands: list, job_id: int, timeout: float = None,
+            output_lines: int = 20) -> tuple:
+        """
+        Load a datafile, run commands on it and wait until the worker prints the completion marker of the job. The
+        worker is restarted if it crashes or times out
+
+        :param datafile_path: Path of the datafile to load
+        :type datafile_path: str
+        :param commands: Command lines to run after loading the datafile
+        :type commands: list
+        :param job_id: Number that identifies the completion marker of the job
+        :type job_id: int
+        :param timeout: Seconds after which the worker is restarted
+        :type timeout: float, optional
+        :param output_lines: Number of lines to keep from the end of the output of the job
+        :type output_lines: int
+        :return: Return code, None if the job did not finish, whether it timed out and the end of its output
+        :rtype: tuple
+        """
+        marker = f"{DONE_MARKER} {job_id}"
+        output = deque(maxlen=max(output_lines, 0))
+        try:
+            self.process.stdin.write(f'replace_load "{datafile_path}"\n')
+            self.process.stdin.writelines(command if command.endswith("\n") else command + "\n"
+                                          for command in commands)
+            self.process.stdin.write(f'printf "{marker}\\n"\n')
+            self.process.stdin.flush()
+        except OSError:
+            pass
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            try:
+                remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                self.start()
+                return None, True, "\n".join(output)
+            if line is None:
+                return_code = self.process.wait()
+                self.start()
+                return return_code if return_code != 0 else None, False, "\n".join(output)
+            # the prompt of the interpreter can come before the marker on the same line
+            if line.rstrip().endswith(marker):
+                self.jobs_done += 1
+                return 0, False, "\n".join(output)
+            output.append(line.rstrip("\n"))
+
+    def close(self) -> None:
+        """
+        Ask the process to quit, killing it if it does not
+
+        :return: None
+        """
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write("q\n")
+                self.process.stdin.close()
+                self.process.wait(timeout=CLOSE_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self._close_pipes()
+
+    def _close_pipes(self) -> None:
+        try:
+            self.process.stdin.close()
+        except OSError:
+            # the buffered input could not be flushed to a process that already exited
+            pass
+        self.reader.join(timeout=CLOSE_TIMEOUT)
+
+
+@dataclass
+class EvolverPool:
+    """
+    Pool of long lived Surface Evolver processes. Each job loads its datafile in an idle worker with replace_load and
+    sends the commands of the read section over a pipe, which avoids starting and parsing a new process per file
+
+    :param evolver_filepath: Path to the Surface Evolver interpreter
+    :type evolver_filepath: str
+    :param workers: Number of processes, bounded by the number of cores
+    :type workers: int, optional
+    :param work_directory: Folder for the datafiles of the jobs. Defaults to a temporary folder removed on close
+    :type work_directory: str, optional
+    """
+    evolver_filepath: str = "evolver"
+    workers: int = None
+    work_directory: str = None
+
+    def __post_init__(self):
+        cpu_count = os.cpu_count() or 1
+        self.workers = cpu_count if self.workers is None else max(1, min(self.workers, cpu_count))
+        self._remove_work_directory = self.work_directory is None
+        if self.work_directory is None:
+            self.work_directory = tempfile.mkdtemp(prefix="seapipy_pool_")
+        bootstrap_filepath = os.path.join(self.work_directory, "bootstrap.fe")
+        with open(bootstrap_filepath, mode="w") as f:
+            f.write(BOOTSTRAP_DATAFILE)
+
+        self._job_ids = iter(range(1, 2 ** 63))
+        self._lock = threading.Lock()
+        self.idle_workers = queue.Queue()
+        self.all_workers = [EvolverWorker(self.evolver_filepath, bootstrap_filepath) for _ in range(self.workers)]
+        for worker in self.all_workers:
+            self.idle_workers.put(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, se_input_filepath: str, timeout: float = None, output_lines: int = 20) -> EvolverResult:
+        """
+        Run a Surface Evolver file in the first idle worker
+
+        :param se_input_filepath: Path to Surface Evolver file
+        :type se_input_filepath: str
+        :param timeout: Seconds after which the worker is restarted and the job given up
+        :type timeout: float, optional
+        :param output_lines: Number of lines to keep from the end of the output of the job
+        :type output_lines: int
+        :return: Outcome of the run
+        :rtype: EvolverResult
+        """
+        with open(se_input_filepath) as f:
+            datafile, commands = split_script(f.read())
+        with self._lock:
+            job_id = next(self._job_ids)
+        datafile_path = os.path.join(self.work_directory, f"job_{job_id}.fe")
+        with open(datafile_path, mode="w") as f:
+            f.write(datafile)
+
+        result = EvolverResult(se_input_filepath)
+        patterns = get_dump_patterns(se_input_filepath)
+        started_at = int(time.time())
+        start = time.perf_counter()
+        worker = self.idle_workers.get()
+        try:
+            result.return_code, result.timed_out, result.stderr_tail = worker.run(datafile_path, commands, job_id,
+                                                                                  timeout, output_lines)
+        finally:
+            self.idle_workers.put(worker)
+            os.remove(datafile_path)
+        result.wall_time = time.perf_counter() - start
+        result.dump_files = find_dump_files(patterns, since=started_at)
+        record_result(result)
+        return result
+
+    def map(self, se_input_filepaths: list, timeout: float = None) -> list:
+        """
+        Run many Surface Evolver files on the workers of the pool
+
+        :param se_input_filepaths: Paths to the Surface Evolver files
+        :type se_input_filepaths: list
+        :param timeout: Seconds after which each job is given up
+        :type timeout: float, optional
+        :return: Outcome of every run, in the same order as the files
+        :rtype: list
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(lambda path: self.run(path, timeout), se_input_filepaths))
+
+    def close(self) -> None:
+        """
+        Stop the workers and remove the temporary files of the pool
+
+        :return: None
+        """
+        for worker in self.all_workers:
+            worker.close()
+        if self._remove_work_directory:
+            shutil.rmtree(self.work_directory, ignore_errors=True)
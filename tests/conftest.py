@@ -0,0 +1,100 @@
+import stat
+import sys
+import pytest
+
+STUB_EVOLVER = f"""#!{sys.executable}
+import re
+import sys
+import time
+
+script = open(sys.argv[1]).read()
+sys.stderr.write("stub evolver\\n")
+for pattern in re.findall(r'sprintf "([^"]*)%d.dmp"', script):
+    open(pattern + "0.dmp", "w").write("dump")
+progress = re.search(r"// progress ([0-9]+)", script)
+if progress:
+    for ii in range(int(progress.group(1)), 0, -1):
+        print(f"{{ii:3d}}. area:  {{100 + ii}}.000000 energy:  {{10 * ii}}.5000000  scale: 0.2", flush=True)
+        time.sleep(0.01)
+allocate = re.search(r"// allocate ([0-9]+)", script)
+if allocate:
+    memory = b"x" * (int(allocate.group(1)) * 2 ** 20)
+sleep = re.search(r"// sleep ([0-9.]+)", script)
+if sleep:
+    time.sleep(float(sleep.group(1)))
+if "// fail" in script:
+    sys.exit(3)
+# commands sent by a worker pool
+for line in sys.stdin:
+    if line.startswith("replace_load"):
+        open(re.match(r'replace_load "([^"]*)"', line).group(1)).read()
+    for pattern in re.findall(r'sprintf "([^"]*)%d.dmp"', line):
+        open(pattern + "0.dmp", "w").write("dump")
+    if "// crash" in line:
+        sys.exit(1)
+    sleep = re.search(r"// sleep ([0-9.]+)", line)
+    if sleep:
+        time.sleep(float(sleep.group(1)))
+    marker = re.match(r'printf "(.*)\\\\n"', line)
+    if marker:
+        # the interpreter prints its prompt before the output of each command
+        print("Enter command: " + marker.group(1), flush=True)
+    if line.strip() == "q":
+        break
+"""
+
+SAMPLE_DUMP = b"""// sample.dmp: Dump of structure.
+// Evolver version: 2.70
+
+SPACE_DIMENSION 2
+STRING
+SCALE 0.005 FIXED
+
+vertices        /*  coordinates  */
+  1  0.000000000000000  0.000000000000000
+  2  1.000000000000000  0.000000000000000 original 2
+  5  1.000000000000000  1.000000000000000
+  7  0.000000000000000  1.000000000000000 /* moved */
+
+edges
+  1     1     2    density 1.5
+  2     2     5
+  4     5     7    density 0.25 original 3
+  9     7     1    density 2
+
+faces    /* edge loop */
+  3   1 2 4 9
+  4   -9 -4 \\
+      -2 -1
+
+bodies  /* facets */
+  1     3    volume 1.000000000000000 /* actual: 0.998000000000 */ lagrange_multiplier -0.1
+  2    -4    volume 1.5
+
+read
+
+// Procedures:
+ii := 0
+"""
+
+
+@pytest.fixture()
+def stub_evolver(tmp_path):
+    path = tmp_path / "evolver"
+    path.write_text(STUB_EVOLVER)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture()
+def write_script():
+    def write(directory, name, body=""):
+        path = directory / f"{name}.fe"
+        path.write_text(f'{body}\nff := sprintf "{directory}/{name}_%d.dmp",ii; dump ff; \nq; \n')
+        return str(path)
+    return write
+
+
+@pytest.fixture()
+def sample_dump():
+    return SAMPLE_DUMP
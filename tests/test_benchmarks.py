@@ -0,0 +1,26 @@
+import importlib.util
+import json
+import os
+
+BENCHMARKS_FILEPATH = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "run_benchmarks.py")
+
+
+def test_benchmarks_compare_with_baselines(tmp_path):
+    spec = importlib.util.spec_from_file_location("run_benchmarks", BENCHMARKS_FILEPATH)
+    run_benchmarks = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run_benchmarks)
+
+    baseline = tmp_path / "baselines.json"
+    arguments = ["--sizes", "5", "--repeat", "1", "--jobs", "2", "--baseline", str(baseline)]
+    assert run_benchmarks.main(arguments + ["--save-baseline"]) == 0
+    stored = json.loads(baseline.read_text())
+    assert stored["create_lattice_elements@5"]["peak_memory"] > 0
+    assert "EvolverPool.map@5" in stored
+    assert stored["create_lattice_elements@5"]["relative_time"] > 0
+
+    # absolute times of another machine are not compared
+    baseline.write_text(json.dumps({key: {"time": 1e-9, "peak_memory": None} for key in stored}))
+    assert run_benchmarks.main(arguments + ["--compare", "--no-memory", "--example-max-size", "0"]) == 0
+    baseline.write_text(json.dumps({key: {"time": 1e-9, "relative_time": 1e-9, "peak_memory": None}
+                                    for key in stored}))
+    assert run_benchmarks.main(arguments + ["--compare", "--no-memory", "--example-max-size", "0"]) == 1
@@ -0,0 +1,73 @@
+import numpy as np
+from seapipy.cache import EvolverCache
+from seapipy.lattice_class import Lattice
+from seapipy.surface_evolver import SurfaceEvolver
+
+
+def test_cache_restores_relocated_dumps(stub_evolver, tmp_path, write_script):
+    cache = EvolverCache(str(tmp_path / "cache"))
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+
+    result = cache.run(write_script(first, "run"), stub_evolver)
+    assert result.success and not result.cached
+
+    restored = cache.run(write_script(second, "run"), stub_evolver)
+    assert restored.cached
+    assert restored.dump_files == [f"{second}/run_0.dmp"]
+    assert (second / "run_0.dmp").read_text() == "dump"
+
+    bypassed = cache.run(write_script(second, "run"), stub_evolver, bypass=True)
+    assert not bypassed.cached
+
+    assert not cache.run(write_script(second, "run", "// different"), stub_evolver).cached
+
+
+def test_cache_keeps_folders_apart(stub_evolver, tmp_path):
+    # the folders are in a different alphabetical order in each run
+    cache = EvolverCache(str(tmp_path / "cache"))
+    runs = {"first": ("z", "a"), "second": ("a", "z")}
+    scripts = {}
+    for run, (steps, final) in runs.items():
+        steps, final = tmp_path / run / steps, tmp_path / run / final
+        steps.mkdir(parents=True)
+        final.mkdir(parents=True)
+        scripts[run] = tmp_path / run / "run.fe"
+        scripts[run].write_text(f'ff := sprintf "{steps}/step_%d.dmp",ii; dump ff; \n'
+                                f'ff := sprintf "{final}/final_%d.dmp",ii; dump ff; \nq; \n')
+    assert cache.get_key(str(scripts["first"]), stub_evolver) == cache.get_key(str(scripts["second"]), stub_evolver)
+
+    assert not cache.run(str(scripts["first"]), stub_evolver).cached
+    restored = cache.run(str(scripts["second"]), stub_evolver)
+    assert restored.cached
+    assert restored.dump_files == [f"{tmp_path}/second/a/step_0.dmp", f"{tmp_path}/second/z/final_0.dmp"]
+
+
+def test_cache_eviction(stub_evolver, tmp_path, write_script):
+    cache = EvolverCache(str(tmp_path / "cache"), max_size=len("dump") * 2)
+    for name in ("a", "b", "c"):
+        cache.run(write_script(tmp_path, name), stub_evolver)
+    assert len(cache.list_entries()) == 2
+    assert cache.get_size() == 8
+    assert not cache.run(write_script(tmp_path, "a"), stub_evolver).cached
+
+
+def test_relocatable_script_key(tmp_path):
+    np.random.seed(0)
+    lattice = Lattice(3, 3)
+    vertices, edges, cells = lattice.create_example_lattice()
+    scripts = []
+    for directory in ("first", "second"):
+        se_object = SurfaceEvolver(vertices, edges, cells, {k: 1 for k in edges}, {k: 500 for k in cells})
+        se_object.generate_fe_file()
+        se_object.save_one_step(str(tmp_path / directory), "step_")
+        scripts.append(se_object.get_script(relocatable=True))
+        assert se_object.get_script() == se_object.get_script()
+        expected = se_object.get_script()
+        se_object.save_fe_file(tmp_path / f"{directory}.fe")
+        assert (tmp_path / f"{directory}.fe").read_text() == expected
+
+    cache = EvolverCache(str(tmp_path / "cache"))
+    assert scripts[0] == scripts[1]
+    assert cache.get_key(tmp_path / "first.fe") == cache.get_key(tmp_path / "second.fe")
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+import asyncio
+import pytest
+import seapipy.command as command
+
+
+def test_run_evolver_batch(stub_evolver, tmp_path, write_script):
+    files = [write_script(tmp_path, "ok"), write_script(tmp_path, "failing", "// fail")]
+    results = command.run_evolver_batch(files, stub_evolver, max_workers=2)
+
+    assert [r.se_input_filepath for r in results] == files
+    assert results[0].success
+    assert results[0].dump_files == [f"{tmp_path}/ok_0.dmp"]
+    assert results[0].stderr_tail == "stub evolver"
+    assert results[1].return_code == 3
+    assert not results[1].success
+
+
+def test_run_evolver_batch_timeout_and_cancel(stub_evolver, tmp_path, write_script):
+    slow = write_script(tmp_path, "slow", "// sleep 30")
+    result = command.run_evolver_job(slow, stub_evolver, timeout=0.5)
+    assert result.timed_out
+    assert result.wall_time < 10
+
+    cancel_event = threading.Event()
+    threading.Timer(0.5, cancel_event.set).start()
+    start = time.perf_counter()
+    results = command.run_evolver_batch([slow, slow], stub_evolver, max_workers=1, cancel_event=cancel_event)
+    assert time.perf_counter() - start < 10
+    assert all(r.cancelled for r in results)
+    assert results[1].return_code is None
+
+
+def test_run_evolver_batch_callback_error(stub_evolver, tmp_path, write_script):
+    files = [write_script(tmp_path, "ok"), write_script(tmp_path, "slow", "// sleep 30")]
+
+    def on_result(result):
+        raise RuntimeError(result.se_input_filepath)
+
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="ok.fe"):
+        command.run_evolver_batch(files, stub_evolver, max_workers=2, on_result=on_result)
+    # the slow process is killed instead of waited for
+    assert time.perf_counter() - start < 10
+
+
+def test_run_evolver_async(stub_evolver, tmp_path, write_script):
+    events = []
+    result = asyncio.run(command.run_evolver_async(write_script(tmp_path, "progress", "// progress 5"),
+                                                   stub_evolver, on_progress=events.append))
+    assert result.success
+    assert [e.iteration for e in events] == [5, 4, 3, 2, 1]
+    assert events[0].energy == 50.5
+    assert events[0].area == 105.0
+    assert events[0].scale == 0.2
+
+
+def test_run_evolver_async_stops_early(stub_evolver, tmp_path, write_script):
+    events = []
+
+    def stop_at_three(progress):
+        events.append(progress)
+        return progress.iteration == 3
+
+    script = write_script(tmp_path, "stopped", "// progress 5\n// sleep 30")
+    result = asyncio.run(command.run_evolver_async(script, stub_evolver, on_progress=stop_at_three))
+    assert result.cancelled
+    assert [e.iteration for e in events] == [5, 4, 3]
+
+    result = asyncio.run(command.run_evolver_async(script, stub_evolver, timeout=0.5))
+    assert result.timed_out
+    assert result.wall_time < 10
+
+
+def test_run_evolver_job_resources(stub_evolver, tmp_path, write_script):
+    result = command.run_evolver_job(write_script(tmp_path, "ok"), stub_evolver)
+    assert result.success
+    assert result.cpu_time > 0
+    assert result.max_rss > 2 ** 20
+
+    if not os.path.isdir("/proc"):
+        pytest.skip("memory limit only enforced on Linux")
+    script = write_script(tmp_path, "growing", "// allocate 300\n// sleep 30")
+    result = command.run_evolver_job(script, stub_evolver, memory_limit=100 * 2 ** 20)
+    assert result.memory_exceeded
+    assert not result.success
+    assert result.wall_time < 10
+
+    result = asyncio.run(command.run_evolver_async(script, stub_evolver, memory_limit=100 * 2 ** 20))
+    assert result.memory_exceeded
+    assert result.wall_time < 10
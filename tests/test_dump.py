@@ -0,0 +1,43 @@
+import numpy as np
+from seapipy.dump import parse_dump, read_dump
+from seapipy.lattice_class import Lattice
+from seapipy.surface_evolver import SurfaceEvolver
+
+
+def test_parse_dump(sample_dump):
+    dump = parse_dump(sample_dump)
+
+    np.testing.assert_array_equal(dump.vertex_ids, [1, 2, 5, 7])
+    np.testing.assert_array_equal(dump.vertex_coordinates, [[0, 0], [1, 0], [1, 1], [0, 1]])
+    np.testing.assert_array_equal(dump.edge_vertices, [[1, 2], [2, 5], [5, 7], [7, 1]])
+    np.testing.assert_array_equal(dump.edge_densities, [1.5, 1, 0.25, 2])
+    np.testing.assert_array_equal(dump.face_ids, [3, 4])
+    np.testing.assert_array_equal(dump.face_offsets, [0, 4, 8])
+    np.testing.assert_array_equal(dump.face_edges, [1, 2, 4, 9, -9, -4, -2, -1])
+    np.testing.assert_array_equal(dump.body_faces, [3, -4])
+    np.testing.assert_array_equal(dump.body_volumes, [1, 1.5])
+    np.testing.assert_array_equal(dump.body_actual_volumes, [0.998, np.nan])
+
+    tissue = dump.to_tissue()
+    assert tissue.edges[3] == [3, 4]
+    assert tissue.cells[-2] == [-4, -3, -2, -1]
+
+
+def test_read_generated_file(tmp_path):
+    np.random.seed(0)
+    lattice = Lattice(5, 4)
+    tissue = lattice.create_example_tissue()
+    tissue.edge_densities = np.round(np.random.normal(1, 0.1, len(tissue.edge_vertices)), 3)
+    tissue.cell_volumes = np.random.normal(500, 50, len(tissue.cell_ids)).astype(int)
+    se_object = SurfaceEvolver.from_tissue(tissue)
+    se_object.generate_fe_file(tmp_path / "tissue.fe")
+    se_object.save_fe_file()
+
+    read_tissue = read_dump(tmp_path / "tissue.fe").to_tissue()
+    np.testing.assert_array_equal(read_tissue.vertex_coordinates, np.round(tissue.vertex_coordinates, 3))
+    np.testing.assert_array_equal(read_tissue.edge_vertices, tissue.edge_vertices)
+    np.testing.assert_array_equal(read_tissue.edge_densities, tissue.edge_densities)
+    np.testing.assert_array_equal(read_tissue.cell_ids, tissue.cell_ids)
+    np.testing.assert_array_equal(read_tissue.cell_offsets, tissue.cell_offsets)
+    np.testing.assert_array_equal(read_tissue.cell_edges, tissue.cell_edges)
+    np.testing.assert_array_equal(read_tissue.cell_volumes, tissue.cell_volumes)
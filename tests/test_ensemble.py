@@ -0,0 +1,36 @@
+import os
+from pathlib import Path
+import seapipy.ensemble as ensemble
+from seapipy.example_tissues import CircularFurrow
+
+
+def test_expand_grid():
+    points = ensemble.expand_grid({"a": 1, "b": 2}, {"b": [3, 4], "c": ["x", "y"]})
+    assert points == [{"a": 1, "b": 3, "c": "x"}, {"a": 1, "b": 3, "c": "y"},
+                      {"a": 1, "b": 4, "c": "x"}, {"a": 1, "b": 4, "c": "y"}]
+
+
+def test_generate_ensemble(tmp_path):
+    parameters = dict(n_cells_x=4, n_cells_y=4, cell_v_mean=450, cell_v_std=5, edge_t_mean=6, edge_t_std=20,
+                      axis="x", voronoi_seeds_std=0.15, voronoi_seeds_step=20, file_name="step_")
+    output = str(tmp_path / "ensemble")
+    manifest = ensemble.generate_ensemble(parameters, output, CircularFurrow, replicates=2,
+                                          grid={"edge_t_std": [10, 20]}, seed=42, max_workers=2)
+    assert manifest == ensemble.load_manifest(output)
+    assert manifest["tissue"] == "CircularFurrow"
+    members = manifest["members"]
+    assert [m["name"] for m in members] == ["point_0_replicate_0", "point_0_replicate_1",
+                                            "point_1_replicate_0", "point_1_replicate_1"]
+    assert [m["parameters"]["edge_t_std"] for m in members] == [10, 10, 20, 20]
+    assert members[1]["parameters"]["save_dir"] == f"{output}/point_0_replicate_1"
+
+    scripts = [Path(m["fe_file"]).read_text() for m in members]
+    assert [m["bytes"] for m in members] == [os.path.getsize(m["fe_file"]) for m in members]
+    assert f'"{output}/point_0_replicate_1/step_%d.dmp"' in scripts[1]
+    # the replicates are different tissues
+    assert scripts[0].split("read")[0] != scripts[1].split("read")[0]
+
+    # the same seed writes the same files with any number of processes
+    ensemble.generate_ensemble(parameters, output, CircularFurrow, replicates=2, grid={"edge_t_std": [10, 20]},
+                               seed=42, max_workers=1)
+    assert [Path(m["fe_file"]).read_text() for m in members] == scripts
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+import seapipy.random_generators as random_generators
+from seapipy.example_tissues import RANDOM_STAGES, CircularFurrow, ExampleTissues, NormalFurrow, RandomCellTypes
+
+
+@pytest.fixture()
+def parameters(tmp_path):
+    return dict(n_cells_x=5, n_cells_y=5, cell_v_mean=450, cell_v_std=5, edge_t_mean=6, edge_t_std=20, axis="x",
+                voronoi_seeds_std=0.15, voronoi_seeds_step=20, file_name="step_", save_dir=str(tmp_path))
+
+
+def test_fork_from_relaxed_base(parameters, tmp_path):
+    np.random.seed(0)
+    base = ExampleTissues(parameters)
+    base.save_base_fe_file(tmp_path / "base.fe", f"{tmp_path}/base.dmp")
+    base_script = (tmp_path / "base.fe").read_text()
+    assert f'dump "{tmp_path}/base.dmp"; \nq; \n' in base_script
+    assert "set edges density" not in base_script
+
+    # stand-in for the dump written by Surface Evolver
+    (tmp_path / "base.dmp").write_text("// relaxed tissue\nread\n")
+    for width in (10, 20):
+        variant = NormalFurrow.fork(base, f"{tmp_path}/base.dmp", {"edge_t_std": width, "file_name": f"{width}_"})
+        script = variant.se_object.get_script()
+        assert script.startswith("// relaxed tissue\nread\n")
+        assert "ii := 1; \n" in script
+        assert f'"{tmp_path}/{width}_%d.dmp"' in script
+        assert "g 10000" not in script
+        assert script.count("set edges density") == len(base.edges)
+        assert variant.lattice is base.lattice
+        assert variant.parameters["edge_t_std"] == width
+
+    circular = CircularFurrow.fork(base, f"{tmp_path}/base.dmp", {"save_dir": str(tmp_path / "circular")})
+    assert circular.se_object.get_script().count("set edges density") == len(base.edges)
+    with pytest.raises(ValueError):
+        CircularFurrow.fork(base, f"{tmp_path}/base.dmp", {"edge_t_std": 10})
+
+
+def test_fork_from_rebuilt_base(parameters, tmp_path):
+    # the base file was saved in another session, the rebuilt base has never saved it
+    np.random.seed(0)
+    base = ExampleTissues(parameters, lazy=True)
+    (tmp_path / "base.dmp").write_text("// relaxed tissue\nread\n")
+    script = NormalFurrow.fork(base, f"{tmp_path}/base.dmp", {"file_name": "variant_"}).se_object.get_script()
+    assert "ii := 1; \n" in script
+    assert "ii := 0; \n" not in script
+    assert "ii := 5; \n" in NormalFurrow.fork(base, f"{tmp_path}/base.dmp", {"file_name": "variant_"},
+                                              dump_counter=5).se_object.get_script()
+
+
+def test_stages_are_computed_once(parameters, monkeypatch):
+    np.random.seed(0)
+    calls = []
+    original = CircularFurrow.get_initial_densities
+    monkeypatch.setattr(CircularFurrow, "get_initial_densities",
+                        lambda self: calls.append(1) or original(self))
+    tissue = CircularFurrow(parameters, lazy=True)
+    assert "se_object" not in tissue.__dict__ and not calls
+
+    script = tissue.se_object.get_script()
+    assert len(calls) == 1
+    assert tissue.se_object is tissue.se_object
+    assert script.count("vertices \n") == 1
+    assert script.count("set edges density") == len(tissue.edges)
+
+
+def test_overriding_a_stage_keeps_the_earlier_ones(parameters):
+    class UniformFurrow(NormalFurrow):
+        def get_new_densities(self, axis=None):
+            return {k: 2 for k in self.edges}
+
+    np.random.seed(0)
+    normal = NormalFurrow(parameters)
+    np.random.seed(0)
+    uniform = UniformFurrow(parameters)
+    assert uniform.densities == normal.densities
+    assert uniform.se_object.get_script().count("density 2 where") == len(normal.edges)
+
+
+def test_evolve_until_converged(parameters):
+    np.random.seed(0)
+    script = NormalFurrow({**parameters, "tolerance": 1e-6}, lazy=True).se_object.get_script()
+    assert "g 10000" not in script
+    assert script.count("while conv_change > 1e-06") == 5
+
+
+def test_seeded_tissues_are_reproducible(parameters):
+    parameters["edge_tensions"] = [1, 2, 4]
+    parameters["edge_tensions_std"] = 0.1
+    parameters["seed"] = 5
+    first = RandomCellTypes(parameters, lazy=True)
+    np.random.seed(1)
+    second = RandomCellTypes(parameters, lazy=True)
+    # the new densities are drawn before the initial ones, which does not change either of them
+    new_densities = second.new_densities
+    assert first.se_object.get_script() == second.se_object.get_script()
+    assert new_densities == first.new_densities
+
+    rng = random_generators.get_stage_generators(5, RANDOM_STAGES)["new_densities"]
+    chosen = rng.choice([1, 2, 4], size=len(first.edges))
+    assert list(first.new_densities.values()) == rng.normal(loc=chosen, scale=0.1 * chosen).tolist()
+
+    parameters["seed"] = 6
+    assert RandomCellTypes(parameters, lazy=True).densities != first.densities
@@ -0,0 +1,90 @@
+import numpy as np
+import seapipy.command as command
+import seapipy.ensemble as ensemble
+import seapipy.instrumentation as instrumentation
+from seapipy.example_tissues import CircularFurrow
+from seapipy.lattice_class import Lattice
+from seapipy.surface_evolver import SurfaceEvolver
+
+
+def build_fe_file(tmp_path):
+    np.random.seed(0)
+    lattice = Lattice(4, 4)
+    seeds = lattice.generate_square_seeds(standard_deviation=0.15, spatial_step=20)
+    lattice.generate_voronoi_tessellation(seeds)
+    vertices, edges, cells = lattice.create_lattice_elements()
+    se_object = SurfaceEvolver(vertices, edges, cells, lattice.get_normally_distributed_densities(edges),
+                               lattice.get_normally_distributed_volumes(cells), polygonal=False)
+    se_object.generate_fe_file(str(tmp_path / "tissue.fe"))
+    se_object.evolve_system(10)
+    se_object.save_fe_file()
+    return se_object
+
+
+def test_disabled_records_nothing(tmp_path):
+    assert instrumentation.get_recorder() is None
+    assert instrumentation.span("anything") is instrumentation.DISABLED_SPAN
+    build_fe_file(tmp_path)
+    assert instrumentation.get_recorder() is None
+
+
+def test_spans_and_counters(tmp_path):
+    events = []
+    with instrumentation.instrument(callback=lambda *event: events.append(event)) as recorder:
+        build_fe_file(tmp_path)
+    report = recorder.report()
+
+    for name in ("lattice.seeds", "lattice.tessellation", "lattice.elements", "surface_evolver.generate",
+                 "surface_evolver.save"):
+        assert report["spans"][name]["count"] == 1
+        assert report["spans"][name]["total_time"] >= 0
+    assert report["counters"]["lattice.vertices_deduplicated"] > 0
+    assert report["counters"]["surface_evolver.bytes_written"] == (tmp_path / "tissue.fe").stat().st_size
+    assert report["counters"]["surface_evolver.commands"] == 2
+    assert ("counter", "surface_evolver.commands", 1) in events
+    assert instrumentation.get_recorder() is None
+
+    other = instrumentation.Recorder()
+    other.merge(report)
+    other.merge(report)
+    assert other.report()["counters"]["lattice.vertices_deduplicated"] == \
+        2 * report["counters"]["lattice.vertices_deduplicated"]
+    assert other.report()["spans"]["lattice.seeds"]["count"] == 2
+
+
+def test_batch_aggregates_jobs(stub_evolver, tmp_path, write_script):
+    files = [write_script(tmp_path, "ok"), write_script(tmp_path, "failing", "// fail")]
+    with instrumentation.instrument() as recorder:
+        command.run_evolver_batch(files, stub_evolver, max_workers=2)
+    report = recorder.report()
+
+    assert report["spans"]["command.run_evolver"]["count"] == 2
+    assert report["spans"]["command.batch"]["count"] == 1
+    assert report["counters"]["command.jobs"] == 2
+    assert report["counters"]["command.failed_jobs"] == 1
+    assert report["counters"]["command.user_time"] >= 0
+
+
+def test_lattice_paths_count_the_same():
+    np.random.seed(0)
+    lattice = Lattice(4, 4)
+    lattice.generate_voronoi_tessellation(lattice.generate_square_seeds(standard_deviation=0.15, spatial_step=20))
+    counters = []
+    for vectorized in (True, False):
+        with instrumentation.instrument() as recorder:
+            lattice.create_lattice_elements(vectorized=vectorized)
+        counters.append(recorder.report()["counters"])
+    assert counters[0] == counters[1]
+    assert counters[0]["lattice.edges_deduplicated"] > 0
+
+
+def test_ensemble_merges_process_reports(tmp_path):
+    parameters = dict(n_cells_x=4, n_cells_y=4, cell_v_mean=450, cell_v_std=5, edge_t_mean=6, edge_t_std=20,
+                      axis="x", voronoi_seeds_std=0.15, voronoi_seeds_step=20, file_name="step_")
+    with instrumentation.instrument() as recorder:
+        manifest = ensemble.generate_ensemble(parameters, str(tmp_path), CircularFurrow, replicates=2, seed=42,
+                                              max_workers=2)
+    report = recorder.report()
+
+    assert report["spans"]["lattice.elements"]["count"] == 2
+    assert report["counters"]["surface_evolver.bytes_written"] == sum(m["bytes"] for m in manifest["members"])
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import pytest
+import seapipy.cli as cli
+import seapipy.command as command
+import seapipy.job_queue as job_queue
+
+
+def test_claims_and_retries(tmp_path):
+    queue = job_queue.JobQueue(str(tmp_path / "jobs.db"))
+    files = [str(tmp_path / "a.fe"), str(tmp_path / "b.fe")]
+    assert queue.add(files, max_attempts=2) == 2
+    assert queue.add(files) == 0
+
+    first, second = queue.claim("one"), queue.claim("two")
+    assert [first[1], second[1]] == files
+    assert queue.claim("three") is None
+    assert queue.count() == {"pending": 0, "running": 2, "done": 0, "failed": 0}
+
+    assert queue.complete(first[0], command.EvolverResult(files[0], return_code=0), "one") == "done"
+    failure = command.EvolverResult(files[1], return_code=3, stderr_tail="error")
+    # only the worker running the job records its outcome
+    assert queue.complete(second[0], failure, "one") is None
+    assert queue.complete(second[0], failure, "two") == "pending"
+    assert queue.claim("one") == second
+    assert queue.complete(second[0], failure, "one") == "failed"
+    assert queue.get_jobs("failed")[0]["error"] == "return code 3: error"
+    assert queue.get_jobs("failed")[0]["attempts"] == 2
+
+    assert queue.retry_failed() == 1
+    assert queue.claim() == second
+    queue.release(second[0])
+    assert queue.get_jobs("pending")[0]["attempts"] == 0
+    assert queue.claim() == second
+    assert queue.requeue_stale(older_than=60) == 0
+    assert queue.requeue_stale(older_than=-1) == 1
+    # the last attempt of a job abandoned by its worker fails it
+    assert queue.claim() == second
+    assert queue.requeue_stale(older_than=-1) == 0
+    assert queue.get_jobs("failed")[0]["error"] == "abandoned by its worker"
+
+
+def test_cli_workers(stub_evolver, tmp_path, capsys, write_script):
+    files = [write_script(tmp_path, f"ok_{ii}") for ii in range(4)] + [write_script(tmp_path, "failing", "// fail")]
+    database = str(tmp_path / "jobs.db")
+    assert cli.main(["submit", database, *files, "--max-attempts", "2"]) == 0
+    assert cli.main(["work", database, "--evolver", stub_evolver, "--workers", "2"]) == 0
+    assert cli.main(["status", database, "--failed"]) == 0
+    output = capsys.readouterr().out
+    assert "Ran 6 jobs" in output
+    assert "pending: 0 running: 0 done: 4 failed: 1" in output
+    assert f"{files[-1]}: return code 3" in output
+
+    jobs = job_queue.JobQueue(database).get_jobs("done")
+    assert all(job["attempts"] == 1 and job["cpu_time"] > 0 for job in jobs)
+    assert len({job["worker"] for job in jobs}) <= 2
+
+    # the queue survives the process that created it
+    process = subprocess.run([sys.executable, "-m", "seapipy", "status", database], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(cli.__file__))))
+    assert process.returncode == 0
+    assert "done: 4 failed: 1" in process.stdout
@@ -1,4 +1,7 @@
 import pytest
+import numpy as np
+import seapipy.random_generators as random_generators
+from seapipy.lattice_class import Lattice
 
 
 @pytest.fixture()
@@ -8,3 +11,80 @@ def set_up():
 
 def test_generate_square_seeds():
     pass
+
+
+def test_get_vertex_number_with_index():
+    vertices_scan, vertices_hash, index = {}, {}, {}
+    positions = [(0.0, 0.0), (1.0, 0.0), (0.0, 0.0), (1.0, 1.0), (1.0, 0.0)]
+    ids_scan = [Lattice.get_vertex_number(p, vertices_scan) for p in positions]
+    ids_hash = [Lattice.get_vertex_number(p, vertices_hash, index) for p in positions]
+
+    assert ids_scan == ids_hash == [1, 2, 1, 3, 2]
+    assert vertices_scan == vertices_hash
+
+
+def test_get_enum_with_index():
+    edges_scan, edges_hash, index = {}, {}, {}
+    pairs = [[1, 2], [2, 3], [2, 1], [3, 2], [1, 2]]
+    ids_scan = [Lattice.get_enum(p, edges_scan) for p in pairs]
+    ids_hash = [Lattice.get_enum(p, edges_hash, index) for p in pairs]
+
+    assert ids_scan == ids_hash == [1, 2, -1, -2, 1]
+    assert edges_scan == edges_hash
+
+
+@pytest.mark.parametrize("standard_deviation", [0, 0.15])
+def test_vectorized_lattice_elements(standard_deviation):
+    np.random.seed(0)
+    lattice = Lattice(8, 6)
+    lattice.generate_voronoi_tessellation(lattice.generate_square_seeds(standard_deviation, 20))
+    looped = lattice.create_lattice_elements(vectorized=False)
+    vectorized = lattice.create_lattice_elements(vectorized=True)
+
+    for looped_elements, vectorized_elements in zip(looped, vectorized):
+        assert list(looped_elements.items()) == list(vectorized_elements.items())
+
+
+# seeds of the 4 x 4 interior cells of a 6 x 6 lattice
+INTERIOR_SEEDS = {7, 8, 9, 10, 13, 14, 15, 16, 19, 20, 21, 22, 25, 26, 27, 28}
+
+
+@pytest.mark.parametrize("region_filter, kept_seeds", [("distance", INTERIOR_SEEDS | {1}),
+                                                       ("bounding_box", INTERIOR_SEEDS),
+                                                       ("convex_hull", INTERIOR_SEEDS)])
+def test_remove_infinite_regions(region_filter, kept_seeds):
+    np.random.seed(0)
+    lattice = Lattice(6, 6, region_filter=region_filter)
+    lattice.generate_voronoi_tessellation(lattice.generate_square_seeds(0.15, 20))
+    regions = lattice.remove_infinite_regions(list(lattice.tessellation.regions))
+    kept = {tuple(c) for c in regions if len(c) != 0 and -1 not in c}
+
+    seeds = {seed for seed, region in enumerate(lattice.tessellation.point_region)
+             if tuple(lattice.tessellation.regions[region]) in kept}
+    assert seeds == kept_seeds
+    assert len(kept) == len(kept_seeds)
+    for c in kept:
+        polygon = lattice.tessellation.vertices[list(c)]
+        assert np.all(np.linalg.norm(polygon - np.roll(polygon, 1, axis=0), axis=1) < 50)
+
+
+def test_seeded_random_parameters():
+    lattice = Lattice(6, 4)
+    seeds = lattice.generate_square_seeds(standard_deviation=0.15, spatial_step=20, rng=7)
+    assert seeds == lattice.generate_square_seeds(standard_deviation=0.15, spatial_step=20,
+                                                  rng=np.random.default_rng(7))
+    assert seeds[1][0] == pytest.approx(20, abs=10) and seeds[6][1] == pytest.approx(20, abs=10)
+    lattice.generate_voronoi_tessellation(seeds)
+    _, edges, cells = lattice.create_lattice_elements()
+
+    first, second = random_generators.spawn_generators(11, 2)
+    densities = lattice.get_normally_distributed_densities(edges, rng=first)
+    assert list(densities.keys()) == list(edges.keys())
+    assert densities != lattice.get_normally_distributed_densities(edges, rng=second)
+    assert densities == lattice.get_normally_distributed_densities(edges,
+                                                                   rng=random_generators.spawn_generators(11, 2)[0])
+
+    volumes = lattice.get_normally_distributed_volumes(cells, means=(100, 500), stds=(1, 1), weights=[0.5, 0.5],
+                                                       rng=3)
+    assert list(volumes.keys()) == list(cells.keys())
+    assert all(isinstance(v, int) and (95 < v < 105 or 495 < v < 505) for v in volumes.values())
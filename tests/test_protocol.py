@@ -0,0 +1,17 @@
+from seapipy.protocol import Command, emit, optimize
+
+
+def test_optimize_merges_steps_and_drops_dead_scales():
+    commands = [Command("g", (10,)), Command("g", (5,)), Command("V", (1,)), Command("scale", (0.1,)),
+                Command("V", (2,)), Command("scale", (0.2,)), Command("g", (1,)), Command("scale", (0.3,)),
+                Command("save", ("out", "step_")), Command("scale", (0.4,))]
+    assert emit(optimize(commands)) == ('g 15; \nV 3; \nscale := 0.2; \ng 1; \nscale := 0.3; \n'
+                                        'ff := sprintf "out/step_%d.dmp",ii; dump ff; ii+=1; \nscale := 0.4; \n')
+
+
+def test_optimize_hoists_repeated_blocks():
+    block = [Command("g", (100,)), Command("t1_edgeswap", (0.1,))]
+    optimized = optimize([Command("V", (1,))] + block * 4 + [Command("g", (100,))])
+    assert optimized == [Command("V", (1,)), Command("repeat", (4,), tuple(block)), Command("g", (100,))]
+    assert emit(optimized) == "V 1; \n{ g 100; t1_edgeswap edge where length < 0.1; } 4; \ng 100; \n"
+    assert hash(tuple(optimized)) == hash(tuple(optimize([Command("V", (1,))] + block * 4 + [Command("g", (100,))])))
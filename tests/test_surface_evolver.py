@@ -0,0 +1,156 @@
+import io
+import numpy as np
+import pytest
+from seapipy.lattice_class import Lattice
+from seapipy.surface_evolver import SurfaceEvolver
+
+
+@pytest.fixture()
+def se_arguments():
+    np.random.seed(0)
+    lattice = Lattice(5, 5)
+    vertices, edges, cells = lattice.create_example_lattice()
+    densities = lattice.get_normally_distributed_densities(edges)
+    volumes = lattice.get_normally_distributed_volumes(cells)
+    return vertices, edges, cells, densities, volumes
+
+
+def test_streamed_fe_file_is_identical(se_arguments, tmp_path):
+    in_memory = SurfaceEvolver(*se_arguments, polygonal=False)
+    in_memory.generate_fe_file()
+    in_memory.initial_relaxing()
+    in_memory.save_fe_file(tmp_path / "in_memory.fe")
+
+    streamed = SurfaceEvolver(*se_arguments, polygonal=False)
+    streamed.generate_fe_file(tmp_path / "streamed.fe")
+    streamed.initial_relaxing()
+    streamed.save_fe_file()
+
+    buffer = io.StringIO()
+    to_buffer = SurfaceEvolver(*se_arguments, polygonal=False)
+    to_buffer.generate_fe_file(buffer)
+    to_buffer.initial_relaxing()
+    to_buffer.save_fe_file()
+
+    expected = (tmp_path / "in_memory.fe").read_text()
+    assert (tmp_path / "streamed.fe").read_text() == expected
+    assert buffer.getvalue() == expected
+    assert expected.endswith("q; \n\n")
+
+
+def test_change_line_tensions_table(se_arguments):
+    se_object = SurfaceEvolver(*se_arguments)
+    se_object.change_line_tensions({1: 2.0, -2: 3.0}, mode="table")
+    se_object.change_line_tensions({1: 2.0, 2: 4.0, 3: se_object.density_values[3]}, mode="diff")
+    lines = se_object.fe_file.getvalue().splitlines()
+
+    assert lines[0].startswith("define density_table real[")
+    assert lines[2] == "density_table[1] := 2.0; density_table[2] := 3.0; "
+    assert lines[3] == "set edges density density_table[original] where original > 0; "
+    assert lines[4] == "density_table[2] := 4.0; "
+    assert len(lines) == 6
+    assert se_object.get_loaded_density(-2) == 4.0
+
+
+def test_change_line_tensions_mixed_modes(se_arguments):
+    se_object = SurfaceEvolver(*se_arguments)
+    se_object.change_line_tensions({1: 2.0}, mode="where")
+    se_object.change_line_tensions({2: 3.0}, mode="table")
+    se_object.change_line_tensions({1: 5.0}, mode="where")
+    se_object.change_line_tensions({1: 5.0, 3: 4.0}, mode="diff")
+    lines = se_object.fe_file.getvalue().splitlines()
+
+    # the array is filled from the loaded densities, so it starts with the first "where" change
+    assert lines[0] == "set edges density 2.0 where original == 1; "
+    assert lines[1].startswith("define density_table real[")
+    assert lines[5] == "set edges density 5.0 where original == 1; "
+    # the later "where" change also goes to the array, so the "diff" pass does not undo it
+    assert lines[6] == "density_table[1] := 5.0; "
+    assert lines[7] == "density_table[3] := 4.0; "
+    assert lines[8] == "set edges density density_table[original] where original > 0; "
+    assert len(lines) == 9
+    assert se_object.get_loaded_density(1) == 5.0
+
+
+def test_protocol_is_written_in_order(se_arguments):
+    se_object = SurfaceEvolver(*se_arguments, polygonal=False, optimize=True)
+    se_object.generate_fe_file()
+    se_object.evolve_system(10)
+    se_object.evolve_system(10)
+    se_object.change_line_tensions({1: 2})
+    se_object.evolve_relaxing(3, 5)
+    assert se_object.get_script().endswith("g 20; \nset edges density 2 where original == 1; \n"
+                                           "{ g 5; t1_edgeswap edge where length < 0.1; } 3; \nq; \n\n")
+
+    unoptimized = SurfaceEvolver(*se_arguments, polygonal=False)
+    unoptimized.generate_fe_file()
+    unoptimized.evolve_system(10)
+    unoptimized.evolve_system(10)
+    assert unoptimized.get_script().endswith("g 10; \ng 10; \nq; \n\n")
+    assert unoptimized.get_commands_key() != se_object.get_commands_key()
+
+
+def test_raw_text_between_protocol_calls(se_arguments):
+    se_object = SurfaceEvolver(*se_arguments, polygonal=False, optimize=True)
+    se_object.generate_fe_file()
+    assert se_object.evolve_system(123) is None
+    assert se_object.fe_file.getvalue().endswith("r 3; \ng 123; \n")
+    se_object.fe_file.write("print total_energy; \n")
+    se_object.evolve_system(7)
+    assert se_object.get_script().endswith("g 123; \nprint total_energy; \ng 7; \nq; \n\n")
+
+    with pytest.raises(ValueError):
+        with se_object.repeat(2):
+            se_object.fe_file.write("print total_energy; \n")
+
+
+def test_loops_do_not_grow_with_iterations(se_arguments, tmp_path):
+    scripts = []
+    for number_of_times in (10, 10000):
+        se_object = SurfaceEvolver(*se_arguments, polygonal=False, optimize=False)
+        se_object.generate_fe_file()
+        se_object.evolve_relaxing(number_of_times, 5)
+        with se_object.repeat(number_of_times, variable="kk"):
+            se_object.change_scale("0.1 / kk")
+            se_object.evolve_system(5)
+            se_object.save_one_step(str(tmp_path), "step_")
+        scripts.append(se_object.get_script())
+        assert se_object.dump_counter == number_of_times
+    assert len(scripts[0]) + 6 == len(scripts[1])
+    assert scripts[0].endswith("{ g 5; t1_edgeswap edge where length < 0.1; } 10; \n"
+                               "for ( kk := 1 ; kk <= 10 ; kk += 1 ) { scale := 0.1 / kk; g 5; "
+                               f'ff := sprintf "{tmp_path}/step_%d.dmp",ii; dump ff; ii+=1; }} \nq; \n\n')
+
+
+def test_tension_schedule(se_arguments):
+    se_object = SurfaceEvolver(*se_arguments, polygonal=False)
+    se_object.generate_fe_file()
+    se_object.add_tension_schedule({1: 2, 2: 3}, 100, steps=50)
+    script = se_object.get_script()
+    assert "density_table[1] := 2; density_table[2] := 3; \n" in script
+    assert script.endswith("for ( tt := 1 ; tt <= 100 ; tt += 1 ) { set edges density density_start[original] + "
+                           "(density_table[original] - density_start[original]) * tt / 100 where original > 0; "
+                           "g 50; t1_edgeswap edge where length < 0.1; } \nq; \n\n")
+    assert se_object.get_loaded_density(2) == 3
+
+    with pytest.raises(ValueError):
+        with se_object.repeat(2):
+            se_object.change_line_tensions({1: 1})
+
+
+def test_evolve_until_converged(se_arguments):
+    se_object = SurfaceEvolver(*se_arguments, polygonal=False, optimize=True)
+    se_object.generate_fe_file()
+    se_object.evolve_relaxing(10, 2500, tolerance=1e-5)
+    se_object.evolve_until_converged(0.01, 500, criterion="displacement")
+    se_object.evolve_until_converged(0.01, 500, criterion="displacement")
+    script = se_object.get_script()
+    assert ("conv_steps := 0; do { conv_energy := total_energy; g 2500; t1_edgeswap edge where length < 0.1; "
+            "conv_steps += 2500; conv_change := abs(total_energy - conv_energy) / maximum(abs(conv_energy), 1e-12) } "
+            "while conv_change > 1e-05 and conv_steps < 25000; \n") in script
+    assert script.count("define vertex attribute old_x real") == 1
+    assert script.count("conv_change := max(vertex, sqrt((x - old_x)^2 + (y - old_y)^2))") == 1
+    assert "} 2; \nq; \n\n" in script
+
+    with pytest.raises(NotImplementedError):
+        se_object.evolve_until_converged(criterion="area")
@@ -0,0 +1,95 @@
+import json
+import os
+import numpy as np
+import pytest
+import seapipy.sweep as sweep
+from seapipy.example_tissues import CircularFurrow
+
+
+class FailingFurrow(CircularFurrow):
+    def get_new_densities(self):
+        if self.parameters["edge_t_std"] == 20:
+            raise ValueError("no tissue")
+        return super().get_new_densities()
+
+
+@pytest.fixture()
+def parameters():
+    return dict(n_cells_x=4, n_cells_y=4, cell_v_mean=450, cell_v_std=5, edge_t_mean=6, edge_t_std=20, axis="x",
+                voronoi_seeds_std=0.15, voronoi_seeds_step=20, file_name="step_")
+
+
+def test_random_design():
+    points = sweep.random_design({"a": 1}, {"b": [10, 20], "c": (0, 1), "d": lambda rng: rng.integers(5, 6)}, 20,
+                                 seed=3)
+    assert points == sweep.random_design({"a": 1}, {"b": [10, 20], "c": (0, 1), "d": lambda rng: 5}, 20, seed=3)
+    assert {point["b"] for point in points} == {10, 20}
+    assert all(0 <= point["c"] < 1 and point["a"] == 1 and point["d"] == 5 for point in points)
+    assert all(type(point["d"]) is int for point in points)
+
+
+def test_point_keys(tmp_path):
+    assert sweep.get_point_key({"a": 5}) == sweep.get_point_key({"a": np.int64(5)})
+    assert sweep.get_point_key({"a": 5}) != sweep.get_point_key({"a": "5"})
+    with pytest.raises(TypeError):
+        sweep.get_point_key({"a": object()})
+
+    directory = tmp_path / "sweep"
+    sweep_object = sweep.Sweep(str(directory), CircularFurrow, seed=7)
+    sweep_object.points["bad"] = {"parameters": {"a": object()}}
+    with pytest.raises(TypeError):
+        sweep_object.save()
+    assert os.listdir(directory) == []
+
+
+def test_sweep_is_incremental(stub_evolver, parameters, tmp_path):
+    directory = str(tmp_path / "sweep")
+    first = sweep.Sweep(directory, CircularFurrow, seed=7)
+    # CircularFurrow does not use the axis, so both values give the same file
+    keys = first.add_grid(parameters, {"edge_t_std": [10, 20], "axis": ["x", "y"]})
+    assert len(set(keys)) == 4
+    assert first.generate(max_workers=2) == 2
+    assert set(first.get_status().values()) == {"pending"}
+    assert first.points[keys[0]]["script"] == first.points[keys[1]]["script"]
+    script_key = first.points[keys[0]]["script"]
+    with open(first.scripts[script_key]["fe_file"]) as f:
+        assert f'"{directory}/results/{script_key}/step_%d.dmp"' in f.read()
+
+    # make one of the files fail
+    failing = first.scripts[first.points[keys[2]]["script"]]["fe_file"]
+    with open(failing, mode="a") as f:
+        f.write("// fail\n")
+    results = first.run(stub_evolver, max_workers=2)
+    assert sorted(r.success for r in results) == [False, True]
+    status = first.get_status()
+    assert [status[key] for key in keys] == ["done", "done", "failed", "failed"]
+
+    # a new value of an axis only generates its points, and the failed file is run again
+    extended = sweep.Sweep(directory, CircularFurrow)
+    assert extended.seed == 7
+    new_keys = extended.add_grid(parameters, {"edge_t_std": [10, 20, 40], "axis": ["x", "y"]})
+    assert new_keys[:4] == keys
+    assert extended.generate() == 1
+    with open(failing) as f:
+        script = f.read()
+    with open(failing, mode="w") as f:
+        f.write(script.replace("// fail\n", ""))
+    results = extended.run(stub_evolver)
+    assert sorted(r.se_input_filepath for r in results) == sorted([failing, extended.scripts[
+        extended.points[new_keys[4]]["script"]]["fe_file"]])
+    assert set(extended.get_status().values()) == {"done"}
+    with open(os.path.join(directory, sweep.MANIFEST_NAME)) as f:
+        assert json.load(f)["scripts"][script_key]["status"] == "done"
+    assert extended.run(stub_evolver) == []
+
+    with pytest.raises(ValueError):
+        sweep.Sweep(directory, CircularFurrow, seed=8)
+
+
+def test_generate_keeps_finished_points(parameters, tmp_path):
+    directory = str(tmp_path / "sweep")
+    keys = sweep.Sweep(directory, FailingFurrow, seed=7).add_grid(parameters, {"edge_t_std": [10, 20, 40]})
+    with pytest.raises(ValueError, match="no tissue"):
+        sweep.Sweep(directory, FailingFurrow).generate(max_workers=2)
+    status = sweep.Sweep(directory, FailingFurrow).get_status()
+    assert [status[key] for key in keys] == ["pending", "new", "pending"]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import seapipy.tension_fields as tension_fields
+from seapipy.lattice_class import Lattice
+
+
+@pytest.fixture
+def lattice_elements():
+    np.random.seed(0)
+    lattice = Lattice(5, 4)
+    lattice.generate_voronoi_tessellation(lattice.generate_square_seeds(standard_deviation=0.15, spatial_step=20))
+    return lattice
+
+
+def test_edge_centroids(lattice_elements):
+    vertices, edges, _ = lattice_elements.create_lattice_elements()
+    edge_ids, centroids = tension_fields.get_edge_centroids(vertices, edges)
+    assert edge_ids.tolist() == list(edges.keys())
+    for edge_id, centroid in zip(edge_ids.tolist(), centroids):
+        assert centroid == pytest.approx(Lattice.get_edge_centroid(edge_id, vertices, edges))
+
+    tissue = lattice_elements.create_tissue()
+    tissue_ids, tissue_centroids = tension_fields.get_edge_centroids(tissue.vertices, tissue.edges)
+    assert tissue_ids.tolist() == list(range(1, len(tissue.edge_vertices) + 1))
+    assert tissue_centroids[0] == pytest.approx(Lattice.get_edge_centroid(1, tissue.vertices, tissue.edges))
+
+    # ids that are not numbered from 1
+    shuffled_vertices = {10 * k: value for k, value in reversed(list(vertices.items()))}
+    shuffled_edges = {k + 5: [10 * v for v in edge] for k, edge in edges.items()}
+    shuffled_ids, shuffled_centroids = tension_fields.get_edge_centroids(shuffled_vertices, shuffled_edges)
+    assert shuffled_ids.tolist() == [k + 5 for k in edges.keys()]
+    assert np.allclose(shuffled_centroids, centroids)
+    with pytest.raises(KeyError):
+        tension_fields.get_edge_centroids(shuffled_vertices, {1: [1, 2]})
+
+
+def test_profiles():
+    centroids = np.array([[0.0, 0.0], [3.0, 4.0], [6.0, 8.0]])
+    stripe = tension_fields.gaussian_stripe(centroids, (3, 0), 3, axis="x")
+    assert stripe == pytest.approx([np.exp(-0.5), 1, np.exp(-0.5)])
+    assert tension_fields.gaussian_stripe(centroids, (0, 4), 4, axis="y") == pytest.approx(stripe)
+    with pytest.raises(NotImplementedError):
+        tension_fields.gaussian_stripe(centroids, (0, 0), 1, axis="z")
+
+    assert tension_fields.gaussian_ring(centroids, (0, 0), 5, radius=5) == pytest.approx([np.exp(-0.5), 1,
+                                                                                         np.exp(-0.5)])
+    assert tension_fields.radial_gradient(centroids, (0, 0)) == pytest.approx([1, 0.5, 0])
+    assert tension_fields.radial_gradient(centroids, (0, 0), radius=5) == pytest.approx([1, 0, 0])
+    assert tension_fields.from_function(lambda x, y: x + y, centroids) == pytest.approx([0, 7, 14])
+    assert tension_fields.from_function(lambda x, y: 2, centroids) == pytest.approx([2, 2, 2])
+
+    ids = np.array([3, 1, 2])
+    assert tension_fields.get_aligned_values({1: 10.0, 2: 20.0, 3: 30.0}, ids) == pytest.approx([30, 10, 20])
+    assert tension_fields.to_dict(ids, np.array([1.5, 2.5, 3.5])) == {3: 1.5, 1: 2.5, 2: 3.5}
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from seapipy.lattice_class import Lattice
+from seapipy.surface_evolver import SurfaceEvolver
+from seapipy.tissue import Tissue
+
+
+@pytest.fixture()
+def lattice_elements():
+    np.random.seed(0)
+    lattice = Lattice(6, 5)
+    vertices, edges, cells = lattice.create_example_lattice()
+    densities = lattice.get_normally_distributed_densities(edges)
+    volumes = lattice.get_normally_distributed_volumes(cells)
+    return vertices, edges, cells, densities, volumes
+
+
+def test_views_match_dicts(lattice_elements):
+    vertices, edges, cells, densities, volumes = lattice_elements
+    tissue = Tissue.from_dicts(vertices, edges, cells, densities, volumes)
+
+    assert dict(tissue.vertices) == vertices
+    assert dict(tissue.edges) == edges
+    assert list(tissue.cells.items()) == list(cells.items())
+    assert dict(tissue.densities) == densities
+    assert dict(tissue.volumes) == volumes
+    assert tissue.vertex_coordinates.dtype == np.float64
+    assert tissue.edge_vertices.dtype == np.int32
+
+
+def test_views_reject_unknown_ids(lattice_elements):
+    tissue = Tissue.from_dicts(*lattice_elements)
+    first_cell = int(tissue.cell_ids[0])
+
+    assert 0 not in tissue.vertices
+    assert -1 not in tissue.edges
+    assert -first_cell not in tissue.cells
+    assert first_cell in tissue.cells
+
+
+def test_surface_evolver_from_tissue(lattice_elements):
+    vertices, edges, cells, densities, volumes = lattice_elements
+    from_dicts = SurfaceEvolver(vertices, edges, cells, densities, volumes, polygonal=False)
+    from_tissue = SurfaceEvolver.from_tissue(Tissue.from_dicts(*lattice_elements), polygonal=False)
+
+    assert from_dicts.generate_fe_file().getvalue() == from_tissue.generate_fe_file().getvalue()
+
+
+def test_lattice_create_tissue():
+    np.random.seed(0)
+    lattice = Lattice(6, 5)
+    lattice.generate_voronoi_tessellation(lattice.generate_square_seeds(0.15, 20))
+    tissue = lattice.create_tissue()
+    vertices, edges, cells = lattice.create_lattice_elements()
+
+    assert dict(tissue.vertices) == vertices
+    assert dict(tissue.edges) == edges
+    assert dict(tissue.cells) == cells
@@ -0,0 +1,24 @@
+import os
+import numpy as np
+from seapipy.trajectory import Trajectory
+
+
+def test_trajectory_cache(sample_dump, tmp_path):
+    for step in (0, 2, 10):
+        (tmp_path / f"step_{step}.dmp").write_bytes(sample_dump.replace(b"1.5\n", f"{step}.5\n".encode()))
+    (tmp_path / "other_0.dmp").write_bytes(sample_dump)
+
+    trajectory = Trajectory(str(tmp_path), "step_")
+    assert trajectory.steps == [0, 2, 10]
+    assert not os.path.exists(trajectory.cache_directory)
+
+    assert trajectory[-1].body_volumes[1] == 10.5
+    assert len(os.listdir(trajectory.cache_directory)) == 1
+
+    cached = Trajectory(str(tmp_path), "step_")[-1]
+    assert isinstance(cached.body_volumes, np.memmap)
+    assert cached.body_volumes[1] == 10.5
+
+    (tmp_path / "step_10.dmp").write_bytes(sample_dump.replace(b"1.5\n", b"20.5\n"))
+    assert [frame.body_volumes[1] for frame in trajectory] == [0.5, 2.5, 20.5]
+    assert len(os.listdir(trajectory.cache_directory)) == 3
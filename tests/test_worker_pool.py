@@ -0,0 +1,28 @@
+from seapipy.worker_pool import EvolverPool, split_script
+
+
+def test_split_script():
+    datafile, commands = split_script("vertices \n1   0 0\n\nread \n \nii := 0; \ng 10; \nq; \n\n")
+    assert datafile == "vertices \n1   0 0\n\n"
+    assert commands == [" \n", "ii := 0; \n", "g 10; \n", "\n"]
+
+
+def test_pool_reuses_workers(stub_evolver, tmp_path, write_script):
+    files = [write_script(tmp_path, f"job_{ii}", "read\n") for ii in range(4)]
+    with EvolverPool(stub_evolver, workers=2) as pool:
+        results = pool.map(files)
+        assert all(result.success for result in results)
+        assert results[2].dump_files == [str(tmp_path / "job_2_0.dmp")]
+        assert sum(worker.jobs_done for worker in pool.all_workers) == 4
+
+        processes = [worker.process for worker in pool.all_workers]
+        crashed = pool.run(write_script(tmp_path, "crash", "read\n// crash"))
+        assert crashed.return_code == 1 and not crashed.success
+        slow = pool.run(write_script(tmp_path, "slow", "read\n// sleep 5"), timeout=0.5)
+        assert slow.timed_out
+        assert sum(worker.restarts for worker in pool.all_workers) == 2
+
+        assert pool.run(files[0]).success
+    # the pipes of the restarted and closed processes are not left open
+    assert all(process.stdin.closed and process.stdout.closed for process in processes)
+    assert all(worker.process.stdin.closed and worker.process.stdout.closed for worker in pool.all_workers)